@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+异步批量抓取引擎
+每个应用的子请求（manifest、README、Releases、图标探测、Preview 列表）并发执行，
+所有请求共享一个全局并发上限，输出的记录与线程池引擎完全一致
+"""
+
+import asyncio
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils import fetch_github_api, fetch_github_raw, configure_connection_pool, parse_github_url, validate_app_key
+from utils.readme_scanner import fetch_readme
+from utils.repo_tree import fetch_repo_tree
+from fetch_app_info import (
+    ICON_VARIANTS,
+    parse_manifest,
+    commit_date_of,
+    resolve_last_update,
+    readme_needs,
+    reuse_unchanged_app,
+    build_app_info
+)
+from fetch_fnpack_info import (
+    FNPACK_ICON_VARIANTS,
+    reuse_unchanged_repo,
+    reuse_unchanged_app as reuse_unchanged_fnpack_app,
+    app_tree_sha,
+    app_entry_hash,
+    screenshots_from_listing,
+    build_fnpack_app_info,
+    build_fnpack_app_detail
+)
+
+
+# 默认全局并发请求数
+DEFAULT_CONCURRENCY = 16
+
+
+class AsyncCrawler:
+    """异步抓取引擎，阻塞的 HTTP 请求在线程池中执行，由信号量限制全局并发"""
+
+    def __init__(self, github_token=None, concurrency=DEFAULT_CONCURRENCY):
+        """
+        参数:
+        - github_token: GitHub API token
+        - concurrency: 全局并发请求上限
+        """
+        self.github_token = github_token
+        self.concurrency = concurrency
+        self._executor = None
+        self._semaphore = None
+
+    async def get(self, url, **kwargs):
+        """并发受限的 fetch_github_api"""
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor,
+                partial(fetch_github_api, url, self.github_token, **kwargs)
+            )
+
+    async def get_tree(self, owner, repo, ref):
+        """并发受限的 fetch_repo_tree，失败或被截断时返回 None"""
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor,
+                partial(fetch_repo_tree, owner, repo, ref, self.github_token)
+            )
+
+    async def _first_existing(self, names, url_for, **kwargs):
+        """并发探测多个候选文件，按候选顺序返回第一个存在的文件名"""
+        results = await asyncio.gather(*(self.get(url_for(name), **kwargs) for name in names))
+        for name, result in zip(names, results):
+            if result:
+                return name
+        return None
+
+    async def _get_decoded(self, url):
+        """并发受限的 fetch_github_raw，以原始格式获取 contents/readme 接口的文件内容"""
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor,
+                partial(fetch_github_raw, url, self.github_token)
+            )
+
+    async def get_readme(self, owner, repo, need_version=True, need_category=True):
+        """并发受限的 fetch_readme（流式扫描 README）"""
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor,
+                partial(fetch_readme, owner, repo, self.github_token, need_version, need_category)
+            )
+
+    async def fetch_app_info(self, repo_url, existing_app=None, prefetched=None):
+        """异步版 fetch_app_info.fetch_app_info"""
+        owner, repo = parse_github_url(repo_url)
+        if not owner or not repo:
+            raise ValueError('无效的 GitHub 仓库 URL')
+
+        api = f'https://api.github.com/repos/{owner}/{repo}'
+        prefetched_files = prefetched.get('files', {}) if prefetched else {}
+
+        # 1-2. 仓库信息、manifest 提交和 Releases 并发获取
+        if prefetched:
+            repo_info = prefetched['repo_info']
+            releases = prefetched.get('releases') or []
+            manifest_update = prefetched.get('path_commit_date')
+        else:
+            repo_info, manifest_commits, releases = await asyncio.gather(
+                self.get(api),
+                self.get(f'{api}/commits?path=manifest&per_page=1'),
+                self.get(f'{api}/releases?per_page=1')
+            )
+            if not repo_info:
+                raise ValueError('无法获取仓库信息')
+            releases = releases or []
+            manifest_update = commit_date_of(manifest_commits)
+
+        current_last_update = resolve_last_update(repo_info, manifest_update, releases)
+
+        # 3. 增量更新检查
+        unchanged_app = reuse_unchanged_app(existing_app, current_last_update, repo_info, repo)
+        if unchanged_app:
+            return unchanged_app
+
+        # 4. manifest、README 和文件树并发获取，图标在文件树中查找
+        default_branch = repo_info.get('default_branch', 'main')
+        async def get_manifest():
+            if prefetched_files.get('manifest') is not None:
+                return prefetched_files['manifest']
+            return await self._get_decoded(f'{api}/contents/manifest')
+
+        async def get_readme():
+            # manifest 与 README 并发获取，manifest 未预取时按需要全部信息扫描
+            needs = (True, True)
+            if prefetched_files.get('manifest') is not None:
+                needs = readme_needs(parse_manifest(prefetched_files['manifest']), releases)
+            return await self.get_readme(owner, repo, *needs)
+
+        async def get_icon_name():
+            tree = await self.get_tree(owner, repo, default_branch)
+            if tree is not None:
+                return tree.first_existing('', ICON_VARIANTS)
+            # 文件树不可用时回退到并发探测
+            return await self._first_existing(
+                ICON_VARIANTS,
+                lambda name: f'{api}/contents/{name}',
+                max_retries=1,
+                silent=True
+            )
+
+        manifest_content, readme, icon_name = await asyncio.gather(
+            get_manifest(),
+            get_readme(),
+            get_icon_name(),
+            return_exceptions=True
+        )
+
+        manifest_data = {}
+        if isinstance(manifest_content, Exception):
+            print(f"获取 manifest 文件失败: {str(manifest_content)}")
+        elif manifest_content:
+            manifest_data = parse_manifest(manifest_content)
+
+        if isinstance(readme, Exception):
+            print(f"获取 README 失败: {str(readme)}")
+            readme = None
+
+        icon_url = ''
+        if icon_name and not isinstance(icon_name, Exception):
+            icon_url = f'https://raw.githubusercontent.com/{owner}/{repo}/{default_branch}/{icon_name}'
+            print(f"找到图标: {icon_url}")
+
+        return build_app_info(
+            owner, repo, repo_info, current_last_update,
+            manifest_data, readme, icon_url, releases
+        )
+
+    async def fetch_app_detail(self, app_data, existing_app=None, prefetched=None):
+        """异步版 fetch_app_info.fetch_and_process_app"""
+        app_id = app_data.get('id')
+        app_name = app_data.get('name')
+        repo_url = app_data.get('repository')
+
+        if not app_id or not repo_url:
+            return None
+
+        try:
+            app_info = await self.fetch_app_info(repo_url, existing_app, prefetched)
+            return {
+                'id': app_id,
+                'name': app_name,
+                'repository': repo_url,
+                **app_info
+            }
+        except Exception as e:
+            print(f"处理应用 {app_name} ({app_id}) 失败: {str(e)}")
+            return None
+
+    async def _process_single_fnpack_app(self, app_config, app_key, owner, repo, repo_info, tree=None):
+        """
+        异步版 fetch_fnpack_info._process_single_app
+
+        提供文件树时图标、安装包和预览图直接在文件树中查找，否则并发探测
+        """
+        try:
+            if not validate_app_key(app_key):
+                print(f"警告: 应用键 '{app_key}' 不符合规范，仅允许使用小写字母(a-z)、数字(0-9)和连字符(-)")
+
+            api = f'https://api.github.com/repos/{owner}/{repo}/contents/{app_key}'
+            raw = f'https://raw.githubusercontent.com/{owner}/{repo}/main/{app_key}'
+            configured_download_url = app_config.get('download_url')
+
+            if tree is not None:
+                icon_name = tree.first_existing(app_key, FNPACK_ICON_VARIANTS)
+                fpk_res = None if configured_download_url else tree.exists(f'{app_key}/{app_key}.fpk')
+                preview_res = tree.list_dir(f'{app_key}/Preview')
+            else:
+                async def check_fpk():
+                    if configured_download_url:
+                        return None
+                    return await self.get(f'{api}/{app_key}.fpk')
+
+                icon_name, fpk_res, preview_res = await asyncio.gather(
+                    self._first_existing(FNPACK_ICON_VARIANTS, lambda name: f'{api}/{name}'),
+                    check_fpk(),
+                    self.get(f'{api}/Preview'),
+                    return_exceptions=True
+                )
+
+            icon_url = ''
+            if isinstance(icon_name, Exception):
+                print(f"获取图标失败: {str(icon_name)}")
+            elif icon_name:
+                icon_url = f'{raw}/{icon_name}'
+                print(f"找到图标: {icon_url}")
+            else:
+                print(f"警告: 未找到图标文件 /{app_key}/ICON.PNG (尝试了多种大小写变体)")
+
+            if configured_download_url:
+                download_url = configured_download_url
+                print(f"使用配置的下载URL: {download_url}")
+            else:
+                download_url = f'{raw}/{app_key}.fpk'
+                if fpk_res and not isinstance(fpk_res, Exception):
+                    print(f"找到安装包: {download_url}")
+                else:
+                    print(f"警告: 未找到规范的安装包文件 /{app_key}/{app_key}.fpk")
+
+            screenshots = []
+            if isinstance(preview_res, Exception):
+                print(f"获取预览图失败: {str(preview_res)}")
+            else:
+                screenshots = screenshots_from_listing(owner, repo, app_key, preview_res)
+
+            return build_fnpack_app_info(app_config, app_key, repo_info, icon_url, download_url, screenshots)
+        except Exception as error:
+            print(f"处理应用 {app_key} 时出错: {str(error)}")
+            return None
+
+    async def _refresh_single_fnpack_app(self, app_config, app_key, owner, repo, repo_info, existing_app, tree):
+        """异步版 fetch_fnpack_info._refresh_single_app"""
+        app_info = reuse_unchanged_fnpack_app(existing_app, app_config, app_key, repo_info, tree)
+        if app_info is None:
+            app_info = await self._process_single_fnpack_app(app_config, app_key, owner, repo, repo_info, tree)
+        if app_info:
+            app_info['fnpack_tree_sha'] = app_tree_sha(tree, app_key) if tree is not None else ''
+            app_info['fnpack_entry_hash'] = app_entry_hash(app_config)
+        return app_info
+
+    async def fetch_fnpack_info(self, repo_url, existing_apps=None, prefetched=None):
+        """异步版 fetch_fnpack_info.fetch_fnpack_info（返回仓库内所有应用）"""
+        try:
+            owner, repo = parse_github_url(repo_url)
+            if not owner or not repo:
+                raise ValueError('无效的GitHub仓库URL')
+
+            if repo != 'FnDepot':
+                print(f"警告: 仓库名称 '{repo}' 不符合规范，推荐使用 'FnDepot'")
+
+            api = f'https://api.github.com/repos/{owner}/{repo}'
+            prefetched_fnpack = prefetched.get('files', {}).get('fnpack.json') if prefetched else None
+
+            if prefetched:
+                repo_info = dict(prefetched['repo_info'])
+                current_last_update = prefetched.get('path_commit_date') or repo_info.get('updated_at')
+            else:
+                repo_info, fnpack_commits = await asyncio.gather(
+                    self.get(api),
+                    self.get(f'{api}/commits?path=fnpack.json&per_page=1')
+                )
+                if not repo_info:
+                    raise ValueError('无法获取仓库信息')
+                current_last_update = commit_date_of(fnpack_commits) or repo_info.get('updated_at')
+
+            tree = await self.get_tree(owner, repo, repo_info.get('default_branch', 'main'))
+
+            unchanged = reuse_unchanged_repo(existing_apps, repo_url, repo, repo_info, current_last_update, tree=tree)
+            if unchanged is not None:
+                return unchanged
+
+            try:
+                fnpack_content = prefetched_fnpack
+                if fnpack_content is None:
+                    fnpack_content = await self._get_decoded(f'{api}/contents/fnpack.json')
+                if fnpack_content is None:
+                    print(f"仓库中未找到fnpack.json文件: {owner}/{repo}")
+                    return None
+                fnpack_data = json.loads(fnpack_content)
+                print(f"成功获取fnpack.json文件内容")
+            except Exception as e:
+                print(f"获取或解析fnpack.json失败: {str(e)}")
+                return None
+
+            if not fnpack_data:
+                print("fnpack.json中没有应用信息")
+                return None
+
+            repo_info['fnpack_commit_date'] = current_last_update
+            existing_by_key = {
+                app.get('fnpack_app_key'): app
+                for app in existing_apps or []
+                if app.get('repository', '').lower() == repo_url.lower() and app.get('fnpack_app_key')
+            }
+
+            # 仓库内所有应用并发处理，结果按 fnpack.json 中的顺序排列
+            app_keys = list(fnpack_data.keys())
+            results = await asyncio.gather(*(
+                self._refresh_single_fnpack_app(
+                    fnpack_data[app_key], app_key, owner, repo, repo_info, existing_by_key.get(app_key), tree
+                )
+                for app_key in app_keys
+            ))
+            all_apps = {app_key: info for app_key, info in zip(app_keys, results) if info}
+
+            print(f"成功解析fnpack.json，获取到 {len(all_apps)} 个应用信息")
+            return all_apps
+        except Exception as error:
+            print(f"获取fnpack信息失败: {str(error)}")
+            return None
+
+    async def fetch_fnpack_repo(self, fnpack, existing_apps=None, prefetched=None):
+        """异步版 process_fnpack_apps.process_repo_for_batch"""
+        repo_key = fnpack.get('key')
+        repo_url = fnpack.get('repo')
+        try:
+            app_info_map = await self.fetch_fnpack_info(repo_url, existing_apps or [], prefetched)
+            if not app_info_map:
+                return []
+            return [
+                build_fnpack_app_detail(repo_key, repo_url, app_key, single_app_info)
+                for app_key, single_app_info in app_info_map.items()
+            ]
+        except Exception as e:
+            print(f"处理仓库 {repo_key} 失败: {str(e)}")
+            return []
+
+    def run(self, coroutine_factory, items, on_result=None):
+        """
+        在事件循环中并发处理所有条目
+
+        参数:
+        - coroutine_factory: 接收单个条目并返回协程的函数
+        - items: 条目列表
+        - on_result: 每个条目成功完成时的回调 on_result(条目, 结果)（可选）
+
+        返回:
+        - list: [(条目, 结果)]，顺序与 items 一致
+        """
+        async def track(item):
+            result = await coroutine_factory(item)
+            if on_result:
+                on_result(item, result)
+            return result
+
+        async def main():
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            results = await asyncio.gather(
+                *(track(item) for item in items),
+                return_exceptions=True
+            )
+            return list(zip(items, results))
+
+        configure_connection_pool(self.concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        try:
+            return asyncio.run(main())
+        finally:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+def crawl_apps(apps, existing_details, github_token=None, prefetched_map=None, concurrency=DEFAULT_CONCURRENCY,
+               on_result=None):
+    """
+    异步批量抓取 2FStore 应用
+
+    参数:
+    - apps: apps.json 中的应用列表
+    - existing_details: {app_id: 已存储的应用详情}
+    - github_token: GitHub API token
+    - prefetched_map: {(owner, repo): GraphQL 批量抓取数据}
+    - concurrency: 全局并发请求上限
+    - on_result: 每个应用完成时的回调 on_result(app, 结果)（可选）
+
+    返回:
+    - list: [(app, 应用详情或 None 或异常)]
+    """
+    prefetched_map = prefetched_map or {}
+    crawler = AsyncCrawler(github_token, concurrency)
+    return crawler.run(
+        lambda app: crawler.fetch_app_detail(
+            app,
+            existing_details.get(app.get('id')),
+            prefetched_map.get(parse_github_url(app.get('repository')))
+        ),
+        apps,
+        on_result
+    )
+
+
+def crawl_fnpacks(fnpacks, existing_apps_map, github_token=None, prefetched_map=None, concurrency=DEFAULT_CONCURRENCY,
+                  on_result=None):
+    """
+    异步批量抓取 FnDepot 仓库
+
+    参数:
+    - fnpacks: fnpacks.json 中的仓库列表
+    - existing_apps_map: {repo_url: 已存储的应用详情列表}
+    - github_token: GitHub API token
+    - prefetched_map: {(owner, repo): GraphQL 批量抓取数据}
+    - concurrency: 全局并发请求上限
+    - on_result: 每个仓库完成时的回调 on_result(fnpack, 结果)（可选）
+
+    返回:
+    - list: [(fnpack, 应用详情列表或异常)]
+    """
+    prefetched_map = prefetched_map or {}
+    crawler = AsyncCrawler(github_token, concurrency)
+    return crawler.run(
+        lambda fnpack: crawler.fetch_fnpack_repo(
+            fnpack,
+            existing_apps_map.get(fnpack.get('repo'), []),
+            prefetched_map.get(parse_github_url(fnpack.get('repo')))
+        ),
+        fnpacks,
+        on_result
+    )
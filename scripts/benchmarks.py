@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+性能基准工具
+对比热点函数优化前后的耗时，并校验两者结果一致；
+graphql 子命令用本地假服务校验 GraphQL 批量抓取转换出的 REST 结构
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils import DataStore, get_app_details_path, get_fnpack_details_path
+from utils.data_store import AppDetailsStore
+from utils.classifier import CATEGORY_KEYWORDS, auto_classify_app
+from utils.validators import LEGAL_SENSITIVE_WORDS, ENGLISH_SENSITIVE_WORDS, check_content_guidelines
+from utils.github_graphql import fetch_repos_batch
+from fetch_app_info import resolve_last_update
+
+
+def legacy_classify_app(name, description=''):
+    """
+    优化前的 auto_classify_app 实现（逐个关键词编译正则），作为对照基准
+    """
+    if not name:
+        return 'uncategorized'
+
+    name_lower = name.lower()
+    desc_lower = (description or '').lower()
+
+    best_category = 'uncategorized'
+    highest_score = 0
+
+    for category, keywords in CATEGORY_KEYWORDS.items():
+        score = 0
+        for keyword in keywords:
+            is_english = all(ord(c) < 128 for c in keyword)
+
+            def check_match(text, weight):
+                if not text: return 0
+                count = 0
+                if is_english:
+                    if re.search(r'\b' + re.escape(keyword) + r'\b', text):
+                        count += weight
+                else:
+                    if keyword in text:
+                        count += weight
+                return count
+
+            score += check_match(name_lower, 3)
+            score += check_match(desc_lower, 1)
+
+        if score > highest_score:
+            highest_score = score
+            best_category = category
+
+    return best_category if highest_score > 0 else 'uncategorized'
+
+
+def load_app_text_corpus(repeat=1):
+    """
+    读取现有应用详情中的名称和描述作为基准样本
+
+    参数:
+    - repeat: 样本重复次数，用于放大耗时
+
+    返回:
+    - list: [(name, description)]
+    """
+    samples = []
+    for path in (get_app_details_path(), get_fnpack_details_path()):
+        for app in DataStore.load_json(path, {'apps': []}).get('apps', []):
+            samples.append((app.get('name', ''), app.get('description', '')))
+
+    if not samples:
+        # 没有数据文件时使用内置样本
+        samples = [
+            ('Jellyfin', '开源的家庭影音媒体服务器，支持视频和音乐流媒体播放'),
+            ('Alist', 'A file list program that supports multiple storage, powered by Gin'),
+            ('Gitea', '轻量级的代码托管服务，支持 git 和 CI'),
+            ('Vaultwarden', 'Bitwarden compatible password manager server'),
+            ('Clash Dashboard', '代理规则管理面板'),
+            ('Planet Notes', 'Markdown 笔记与知识库'),
+        ]
+    return samples * repeat
+
+
+def _time_calls(func, samples, rounds):
+    """返回 rounds 轮中单轮最短耗时（秒）"""
+    best = None
+    for _ in range(rounds):
+        started_at = time.perf_counter()
+        for name, description in samples:
+            func(name, description)
+        elapsed = time.perf_counter() - started_at
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_classify(repeat=20, rounds=5):
+    """
+    分类器基准：对比 legacy_classify_app 与 auto_classify_app
+
+    返回:
+    - bool: 两种实现的结果是否完全一致
+    """
+    samples = load_app_text_corpus(repeat)
+    unique_samples = samples[:len(samples) // repeat or len(samples)]
+
+    mismatches = [
+        (name, legacy_classify_app(name, desc), auto_classify_app(name, desc))
+        for name, desc in unique_samples
+        if legacy_classify_app(name, desc) != auto_classify_app(name, desc)
+    ]
+
+    legacy_time = _time_calls(legacy_classify_app, samples, rounds)
+    new_time = _time_calls(auto_classify_app, samples, rounds)
+
+    print(f"分类样本: {len(unique_samples)} 个 x {repeat} 次")
+    print(f"优化前: {legacy_time * 1000:.1f} ms ({legacy_time / len(samples) * 1e6:.1f} µs/次)")
+    print(f"优化后: {new_time * 1000:.1f} ms ({new_time / len(samples) * 1e6:.1f} µs/次)")
+    print(f"加速比: {legacy_time / new_time:.1f}x")
+
+    if mismatches:
+        print(f"✗ {len(mismatches)} 个样本结果不一致:")
+        for name, old, new in mismatches[:20]:
+            print(f"  {name}: {old} -> {new}")
+        return False
+    print("✓ 结果完全一致")
+    return True
+
+
+def legacy_check_content_guidelines(text):
+    """
+    优化前的 check_content_guidelines 实现（逐个词汇做子串查找），作为对照基准
+    """
+    if not text or not isinstance(text, str):
+        return True, []
+
+    flagged_items = []
+    lower_text = text.lower()
+
+    for word in LEGAL_SENSITIVE_WORDS:
+        if word in text:
+            flagged_items.append(word)
+
+    for word in ENGLISH_SENSITIVE_WORDS:
+        if word in lower_text:
+            flagged_items.append(word)
+
+    return len(flagged_items) == 0, flagged_items
+
+
+def bench_content(repeat=20, rounds=5):
+    """
+    内容审核基准：对比 legacy_check_content_guidelines 与 check_content_guidelines
+
+    分别统计应用名称/描述这类短文本，以及拼接成长文本时的耗时。
+
+    返回:
+    - bool: 两种实现的结果是否完全一致
+    """
+    samples = load_app_text_corpus(1)
+    texts = [text for sample in samples for text in sample if text]
+    long_texts = ['\n'.join(texts)]
+
+    mismatches = [
+        text for text in texts + long_texts
+        if legacy_check_content_guidelines(text) != check_content_guidelines(text)
+    ]
+
+    for label, batch in (('短文本', texts * repeat), ('长文本', long_texts * repeat)):
+        legacy_time = _time_calls(lambda text, _: legacy_check_content_guidelines(text), [(t, None) for t in batch], rounds)
+        new_time = _time_calls(lambda text, _: check_content_guidelines(text), [(t, None) for t in batch], rounds)
+        print(f"{label} ({len(batch)} 条, 平均 {sum(map(len, batch)) // len(batch)} 字符): "
+              f"优化前 {legacy_time * 1000:.1f} ms, 优化后 {new_time * 1000:.1f} ms, "
+              f"加速比 {legacy_time / new_time:.1f}x")
+
+    if mismatches:
+        print(f"✗ {len(mismatches)} 条文本结果不一致")
+        return False
+    print("✓ 结果完全一致")
+    return True
+
+
+def make_synthetic_catalogue(count=10000):
+    """
+    生成合成的详情数据（字段与 app_details.json 相同），用于保存基准
+    """
+    apps = []
+    for i in range(count):
+        apps.append({
+            'id': f'app-{i}',
+            'name': f'示例应用 {i}',
+            'repository': f'https://github.com/owner{i % 97}/app-{i}',
+            'description': f'第 {i} 个示例应用，用于测试详情文件的写入性能。A sample app for benchmarking.',
+            'category': ['工具', '影音', '网络', '开发'][i % 4],
+            'author': f'owner{i % 97}',
+            'version': f'1.{i % 10}.{i % 7}',
+            'iconUrl': f'https://raw.githubusercontent.com/owner{i % 97}/app-{i}/main/ICON.PNG',
+            'downloadUrl': f'https://github.com/owner{i % 97}/app-{i}/releases/download/v1/app.fpk',
+            'screenshots': [
+                f'https://raw.githubusercontent.com/owner{i % 97}/app-{i}/main/screenshots/{n}.png'
+                for n in range(1, 3)
+            ],
+            'history': [
+                {'version': f'1.{n}.0', 'date': '2025-12-01T00:00:00Z', 'size': 1024 * (i % 500 + n)}
+                for n in range(3)
+            ],
+            'stars': i * 3 % 1000,
+            'forks': i % 50,
+            'lastUpdate': '2026-01-01T00:00:00Z'
+        })
+    return {'apps': apps, 'lastUpdated': '2026-01-01T00:00:00Z'}
+
+
+def legacy_save_details(file_path, data):
+    """
+    优化前的详情保存流程：sort_keys 序列化一遍计算哈希，再整体序列化一遍写入文件
+    """
+    content = json.dumps({'apps': data.get('apps', [])}, sort_keys=True, ensure_ascii=False)
+    content_hash = hashlib.md5(content.encode('utf-8')).hexdigest()[:8]
+    DataStore.save_json(file_path, data)
+    return content_hash
+
+
+def stream_save_details(file_path, data):
+    """流式保存：写入文件的同时计算各应用摘要并组合出整体哈希"""
+    digests = []
+    DataStore.save_json_stream(
+        file_path, data, 'apps',
+        on_item=lambda app, app_bytes: digests.append((app['id'], AppDetailsStore._app_digest(app_bytes)))
+    )
+    return AppDetailsStore._combine_digests(digests)
+
+
+def bench_save(count=10000, rounds=5):
+    """
+    详情文件保存基准：对比 legacy_save_details 与 stream_save_details
+
+    返回:
+    - bool: 两种实现写出的文件是否完全一致，且流式哈希、增量哈希与单独计算的哈希一致
+    """
+    data = make_synthetic_catalogue(count)
+    store = AppDetailsStore()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        legacy_path = os.path.join(tmp_dir, 'legacy.json')
+        stream_path = os.path.join(tmp_dir, 'stream.json')
+
+        def best_time(func, path):
+            best, result = None, None
+            for _ in range(rounds):
+                started_at = time.perf_counter()
+                result = func(path, data)
+                elapsed = time.perf_counter() - started_at
+                best = elapsed if best is None else min(best, elapsed)
+            return best, result
+
+        legacy_time, _ = best_time(legacy_save_details, legacy_path)
+        stream_time, stream_hash = best_time(stream_save_details, stream_path)
+
+        with open(legacy_path, 'rb') as f:
+            legacy_bytes = f.read()
+        with open(stream_path, 'rb') as f:
+            stream_bytes = f.read()
+
+    print(f"合成详情数据: {count} 个应用, {len(stream_bytes) / 1024 / 1024:.1f} MiB")
+    print(f"优化前 (哈希 + 写入各序列化一次): {legacy_time * 1000:.1f} ms")
+    print(f"优化后 (流式写入同时计算哈希): {stream_time * 1000:.1f} ms")
+    print(f"加速比: {legacy_time / stream_time:.1f}x")
+
+    stream_hash_ok = stream_hash == store._get_apps_hash(data)
+
+    # 单个应用更新后重新计算哈希：全部重新计算 vs 沿用其余应用的摘要
+    old_digests = dict(store._get_app_digests(data['apps']))
+    data['apps'][count // 2] = {**data['apps'][count // 2], 'stars': -1}
+    changed_ids = {data['apps'][count // 2]['id']}
+    full_time, full_hash = best_time(lambda _, d: store._get_apps_hash(d), None)
+    incremental_time, incremental_hash = best_time(
+        lambda _, d: store._combine_digests(store._get_app_digests(d['apps'], changed_ids, old_digests)), None
+    )
+    print(f"单个应用更新后计算哈希: 全部重新计算 {full_time * 1000:.1f} ms, "
+          f"沿用摘要 {incremental_time * 1000:.2f} ms")
+
+    ok = True
+    if legacy_bytes != stream_bytes:
+        print("✗ 写出的文件内容不一致")
+        ok = False
+    if not stream_hash_ok:
+        print("✗ 流式哈希与单独计算的哈希不一致")
+        ok = False
+    if incremental_hash != full_hash:
+        print("✗ 增量哈希与全部重新计算的哈希不一致")
+        ok = False
+    if ok:
+        print("✓ 文件内容与哈希完全一致")
+    return ok
+
+
+# 假 GraphQL 服务中不存在的仓库（返回 null 并附带 errors，与 GitHub 的部分失败响应一致）
+FAKE_MISSING_REPOS = {('someone', 'deleted-repo'), ('someone', 'private-repo')}
+
+
+def fake_repository_node(owner, repo, files):
+    """构造假 GraphQL 服务返回的单个仓库节点"""
+    node = {
+        'description': f'{repo} description',
+        'stargazerCount': len(repo),
+        'forkCount': len(owner),
+        'updatedAt': '2024-01-01T00:00:00Z',
+        'owner': {'login': owner},
+        'defaultBranchRef': {
+            'name': 'dev',
+            'target': {'history': {'nodes': [{'committedDate': '2024-02-01T00:00:00Z'}]}}
+        },
+        'releases': {'nodes': [{
+            'tagName': f'v1.0-{repo}',
+            'publishedAt': '2024-03-01T00:00:00Z',
+            'createdAt': '2024-02-28T00:00:00Z',
+            'releaseAssets': {'nodes': [
+                {'name': f'{repo}.fpk', 'downloadUrl': f'https://example.com/{owner}/{repo}.fpk'}
+            ]}
+        }]}
+    }
+    for i, path in enumerate(files):
+        # 第二个文件模拟二进制内容
+        node[f'f{i}'] = {'text': None, 'isBinary': True} if i == 1 else {'text': f'{path} of {repo}', 'isBinary': False}
+    return node
+
+
+class FakeGraphQLHandler(BaseHTTPRequestHandler):
+    """按查询中的仓库别名返回假数据，FAKE_MISSING_REPOS 中的仓库返回 null 和 errors"""
+
+    files = ()
+    queries = []
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        query = json.loads(self.rfile.read(length))['query']
+        self.queries.append(query)
+
+        data, errors = {}, []
+        pattern = r'(r\d+): repository\(owner: ("(?:[^"\\]|\\.)*"), name: ("(?:[^"\\]|\\.)*")\)'
+        for alias, owner, repo in re.findall(pattern, query):
+            owner, repo = json.loads(owner), json.loads(repo)
+            if (owner, repo) in FAKE_MISSING_REPOS:
+                data[alias] = None
+                errors.append({
+                    'type': 'NOT_FOUND',
+                    'path': [alias],
+                    'message': f"Could not resolve to a Repository with the name '{owner}/{repo}'."
+                })
+            else:
+                data[alias] = fake_repository_node(owner, repo, self.files)
+
+        payload = {'data': data}
+        if errors:
+            payload['errors'] = errors
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def check_graphql_batch(batch_size=2):
+    """
+    GraphQL 批量抓取校验：用本地假服务返回部分失败的响应，检查
+    不存在的仓库不出现在结果中（由调用方回退到 REST），其余仓库的文件内容、
+    Release 资产和 history 提交时间转换为 fetch_app_info/fetch_fnpack_info 使用的 REST 结构
+
+    返回:
+    - bool: 所有检查是否通过
+    """
+    files = ['manifest', 'ICON.PNG']
+    repos = [('alice', 'app-one'), ('someone', 'deleted-repo'), ('bob', 'app-two'), ('someone', 'private-repo')]
+    expected_repos = [r for r in repos if r not in FAKE_MISSING_REPOS]
+
+    FakeGraphQLHandler.files = files
+    FakeGraphQLHandler.queries = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeGraphQLHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    old_url = os.environ.get('GITHUB_GRAPHQL_URL')
+    os.environ['GITHUB_GRAPHQL_URL'] = f'http://127.0.0.1:{server.server_address[1]}/graphql'
+    try:
+        results = fetch_repos_batch(
+            repos, github_token='fake-token', history_path='manifest', files=files, batch_size=batch_size
+        )
+    finally:
+        if old_url is None:
+            os.environ.pop('GITHUB_GRAPHQL_URL', None)
+        else:
+            os.environ['GITHUB_GRAPHQL_URL'] = old_url
+        server.shutdown()
+        server.server_close()
+
+    failures = []
+    expected_queries = (len(repos) + batch_size - 1) // batch_size
+    if len(FakeGraphQLHandler.queries) != expected_queries:
+        failures.append(f"查询次数 {len(FakeGraphQLHandler.queries)}，应为 {expected_queries}")
+    if sorted(results) != sorted(expected_repos):
+        failures.append(f"结果仓库 {sorted(results)}，应为 {sorted(expected_repos)}（缺失的别名应回退到 REST）")
+
+    for owner, repo in expected_repos:
+        item = results.get((owner, repo))
+        if not item:
+            continue
+        expected = {
+            'repo_info': {
+                'description': f'{repo} description',
+                'stargazers_count': len(repo),
+                'forks_count': len(owner),
+                'updated_at': '2024-01-01T00:00:00Z',
+                'default_branch': 'dev',
+                'owner': {'login': owner}
+            },
+            'path_commit_date': '2024-02-01T00:00:00Z',
+            'releases': [{
+                'tag_name': f'v1.0-{repo}',
+                'published_at': '2024-03-01T00:00:00Z',
+                'created_at': '2024-02-28T00:00:00Z',
+                'assets': [{'name': f'{repo}.fpk', 'browser_download_url': f'https://example.com/{owner}/{repo}.fpk'}]
+            }],
+            'files': {'manifest': f'manifest of {repo}', 'ICON.PNG': None}
+        }
+        for field, value in expected.items():
+            if item.get(field) != value:
+                failures.append(f"{owner}/{repo} 的 {field} 为 {item.get(field)!r}，应为 {value!r}")
+
+        # 调用方按 REST 结构取更新时间：Release 发布时间晚于 manifest 提交时间
+        last_update = resolve_last_update(item['repo_info'], item['path_commit_date'], item['releases'])
+        if last_update != '2024-03-01T00:00:00Z':
+            failures.append(f"{owner}/{repo} 的更新时间为 {last_update}，应为 Release 发布时间")
+
+    print(f"GraphQL 批量抓取: {len(repos)} 个仓库, {len(FakeGraphQLHandler.queries)} 次查询, "
+          f"{len(results)} 个仓库返回数据")
+    for failure in failures:
+        print(f"✗ {failure}")
+    if not failures:
+        print("✓ 缺失仓库已回退，文件内容、Release 资产和提交时间均为 REST 结构")
+    return not failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="2FStore 性能基准工具")
+    subparsers = parser.add_subparsers(dest='command', help='可用基准')
+
+    classify_parser = subparsers.add_parser('classify', help='自动分类器基准')
+    classify_parser.add_argument('--repeat', type=int, default=20, help='样本重复次数')
+    classify_parser.add_argument('--rounds', type=int, default=5, help='计时轮数（取最短）')
+
+    content_parser = subparsers.add_parser('content', help='内容审核基准')
+    content_parser.add_argument('--repeat', type=int, default=20, help='样本重复次数')
+    content_parser.add_argument('--rounds', type=int, default=5, help='计时轮数（取最短）')
+
+    save_parser = subparsers.add_parser('save', help='详情文件保存基准')
+    save_parser.add_argument('--count', type=int, default=10000, help='合成应用数量')
+    save_parser.add_argument('--rounds', type=int, default=5, help='计时轮数（取最短）')
+
+    graphql_parser = subparsers.add_parser('graphql', help='GraphQL 批量抓取结构校验（本地假服务）')
+    graphql_parser.add_argument('--batch-size', type=int, default=2, help='每次查询包含的仓库数')
+
+    args = parser.parse_args()
+
+    if args.command == 'classify':
+        ok = bench_classify(args.repeat, args.rounds)
+        sys.exit(0 if ok else 1)
+    elif args.command == 'content':
+        ok = bench_content(args.repeat, args.rounds)
+        sys.exit(0 if ok else 1)
+    elif args.command == 'save':
+        ok = bench_save(args.count, args.rounds)
+        sys.exit(0 if ok else 1)
+    elif args.command == 'graphql':
+        ok = check_graphql_batch(args.batch_size)
+        sys.exit(0 if ok else 1)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,6 @@
 import sys
 import os
 import re
-import base64
 from datetime import datetime
 
 # 添加项目根目录到 Python 路径
@@ -16,10 +15,14 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from utils import (
     fetch_github_api,
+    fetch_github_raw,
+    create_release_resolver,
     auto_classify_app,
     parse_github_url
 )
 from utils.data_store import AppDetailsStore
+from utils.readme_scanner import fetch_readme
+from utils.repo_tree import fetch_repo_tree
 
 
 def parse_manifest(content):
@@ -84,41 +87,22 @@ def parse_manifest(content):
 
 
 
-def fetch_app_info(repo_url, github_token=None, existing_app=None):
-    """
-    从 GitHub 获取应用信息 (支持增量更新)
-    
-    参数:
-    - repo_url: GitHub 仓库 URL
-    - github_token: GitHub API token
-    - existing_app: 已存在的应用信息（用于对比更新时间）
-    
-    返回:
-    - dict: 应用信息字典 (如果无需更新且提供了 existing_app，可能返回 existing_app)
-    """
-    owner, repo = parse_github_url(repo_url)
-    if not owner or not repo:
-        raise ValueError('无效的 GitHub 仓库 URL')
-    
-    # 1. 获取仓库基础信息 (轻量请求)
-    repo_info = fetch_github_api(f'https://api.github.com/repos/{owner}/{repo}', github_token)
-    if not repo_info:
-        raise ValueError('无法获取仓库信息')
-    
-    # 2. 获取 manifest 文件的提交信息和 Releases 信息 (用于判断是否需要更新)
-    manifest_commits = fetch_github_api(
-        f'https://api.github.com/repos/{owner}/{repo}/commits?path=manifest&per_page=1',
-        github_token
-    )
-    releases = fetch_github_api(
-        f'https://api.github.com/repos/{owner}/{repo}/releases',
-        github_token
-    ) or []
+# 仓库根目录图标文件名（按优先级排列）
+ICON_VARIANTS = [
+    'ICON_256.PNG', 'ICON_256.png', 'icon_256.png',
+    'ICON.PNG', 'ICON.png', 'icon.png', 'Icon.png'
+]
+
+
+def commit_date_of(commits):
+    """从 commits 接口的返回结果中取最新提交时间"""
+    if commits and isinstance(commits, list) and len(commits) > 0:
+        return commits[0].get('commit', {}).get('committer', {}).get('date')
+    return None
 
-    manifest_update = None
-    if manifest_commits and isinstance(manifest_commits, list) and len(manifest_commits) > 0:
-        manifest_update = manifest_commits[0].get('commit', {}).get('committer', {}).get('date')
 
+def resolve_last_update(repo_info, manifest_update, releases):
+    """取 manifest 提交时间和最新 Release 时间中较晚的一个作为应用更新时间"""
     release_update = None
     if releases:
         release_update = releases[0].get('published_at') or releases[0].get('created_at')
@@ -126,73 +110,59 @@ def fetch_app_info(repo_url, github_token=None, existing_app=None):
     # 取 manifest 和 release 的最大时间
     update_times = [t for t in [manifest_update, release_update] if t]
     if update_times:
-        current_last_update = max(update_times)
-    else:
-        current_last_update = repo_info.get('updated_at')
+        return max(update_times)
+    return repo_info.get('updated_at')
 
-    # 3. 增量更新检查
+
+def reuse_unchanged_app(existing_app, current_last_update, repo_info, repo):
+    """
+    增量更新检查
+    
+    返回:
+    - dict: 无变更时返回更新了 Star/Fork 的现有应用副本，否则返回 None
+    """
     if existing_app:
         cached_last_update = existing_app.get('lastUpdate')
         
         # 如果时间戳一致，且数据完整
         if cached_last_update == current_last_update:
-             if existing_app.get('version') and existing_app.get('description'):
+            if existing_app.get('version') and existing_app.get('description'):
                 print(f"应用 {repo} Manifest 无变更 (Last update: {current_last_update})，更新动态数据")
-                # 仅更新 Star 和 Fork
-                existing_app['stars'] = repo_info.get('stargazers_count', 0)
-                existing_app['forks'] = repo_info.get('forks_count', 0)
-                # 依然返回现有对象
-                return existing_app
+                # 仅更新 Star 和 Fork（不修改传入的对象，变化由调用方 upsert）
+                app_info = dict(existing_app)
+                app_info['stars'] = repo_info.get('stargazers_count', 0)
+                app_info['forks'] = repo_info.get('forks_count', 0)
+                return app_info
+    return None
 
-    # 4. 详细抓取 (Manifest, README, Icon, Releases) - 只有检测到变更才执行
-    # 获取 manifest 文件
-    manifest_data = {}
-    try:
-        manifest_res = fetch_github_api(
-            f'https://api.github.com/repos/{owner}/{repo}/contents/manifest',
-            github_token
-        )
-        if manifest_res and 'content' in manifest_res:
-            manifest_content = base64.b64decode(manifest_res['content']).decode('utf-8')
-            manifest_data = parse_manifest(manifest_content)
-    except Exception as e:
-        print(f"获取 manifest 文件失败: {str(e)}")
+
+def readme_needs(manifest_data, releases):
+    """
+    判断 build_app_info 是否需要从 README 提取版本号和分类
+
+    返回:
+    - tuple: (是否需要版本号, 是否需要分类)
+    """
+    version = manifest_data.get('version') or (releases[0].get('tag_name') if releases else None) or '1.0.0'
+    return version == '1.0.0', manifest_data.get('category', 'uncategorized') == 'uncategorized'
+
+
+def build_app_info(owner, repo, repo_info, current_last_update, manifest_data, readme, icon_url, releases):
+    """
+    根据已获取的数据构建应用信息（不发起网络请求）
     
-    # 获取 README 内容
-    readme_content = ''
-    try:
-        readme_res = fetch_github_api(
-            f'https://api.github.com/repos/{owner}/{repo}/readme',
-            github_token
-        )
-        if readme_res and 'content' in readme_res:
-            readme_content = base64.b64decode(readme_res['content']).decode('utf-8')
-    except Exception as e:
-        print(f"获取 README 失败: {str(e)}")
-    icon_url = ''
-    icon_variants = [
-        'ICON_256.PNG', 'ICON_256.png', 'icon_256.png',
-        'ICON.PNG', 'ICON.png', 'icon.png', 'Icon.png'
-    ]
-    default_branch = repo_info.get('default_branch', 'main')
-    for icon_name in icon_variants:
-        icon_res = fetch_github_api(
-            f'https://api.github.com/repos/{owner}/{repo}/contents/{icon_name}',
-            github_token,
-            max_retries=1,
-            silent=True
-        )
-        if icon_res:
-            icon_url = f'https://raw.githubusercontent.com/{owner}/{repo}/{default_branch}/{icon_name}'
-            print(f"找到图标: {icon_url}")
-            break
-            
-    # 获取 Release 信息
-    releases = fetch_github_api(
-        f'https://api.github.com/repos/{owner}/{repo}/releases',
-        github_token
-    ) or []
+    参数:
+    - owner, repo: 仓库所有者和名称
+    - repo_info: 仓库信息
+    - current_last_update: 应用更新时间
+    - manifest_data: 解析后的 manifest
+    - readme: fetch_readme 返回的 ReadmeScanner（已在下载时提取版本号、分类和截图），没有 README 时为 None
+    - icon_url: 图标地址
+    - releases: Release 列表（最新的在前，只用到第一项）
     
+    返回:
+    - dict: 应用信息字典
+    """
     app_info = {
         'description': manifest_data.get('desc') or repo_info.get('description', '') or '暂无描述',
         'version': manifest_data.get('version') or (releases[0].get('tag_name') if releases else None) or '1.0.0',
@@ -207,29 +177,20 @@ def fetch_app_info(repo_url, github_token=None, existing_app=None):
     }
     
     # 从 README 补充版本号
-    if app_info['version'] == '1.0.0' and readme_content:
-        version_match = re.search(r'version[:\s]+v?([\d.]+)', readme_content, re.IGNORECASE)
-        if version_match:
-            app_info['version'] = version_match.group(1)
+    if app_info['version'] == '1.0.0' and readme and readme.version:
+        app_info['version'] = readme.version
     
     # 智能分类
     if app_info['category'] == 'uncategorized':
-        category_match = re.search(r'category[:\s]+([\w]+)', readme_content, re.IGNORECASE)
-        if category_match:
-            app_info['category'] = category_match.group(1)
+        if readme and readme.category:
+            app_info['category'] = readme.category
         else:
             app_info['category'] = auto_classify_app(repo, app_info['description'])
             print(f"为应用 {repo} 自动分类为: {app_info['category']}")
     
-    # 提取 README 中的截图
-    screenshot_matches = re.findall(r'!\[[^\]]*\]\((https?://[^)]+)\)', readme_content)
-    if screenshot_matches:
-        # 筛选支持的图片格式
-        image_extensions = ['.png', '.jpg', '.jpeg', '.webp']
-        # 过滤掉不支持的格式，只保留支持的格式
-        supported_screenshots = [url for url in screenshot_matches if any(url.lower().endswith(ext) for ext in image_extensions)]
-        # 限制最多 9 张截图
-        app_info['screenshots'] = supported_screenshots[:9]
+    # README 中的截图（扫描时已只保留支持的图片格式，最多 9 张）
+    if readme and readme.screenshots:
+        app_info['screenshots'] = list(readme.screenshots)
     
     # 获取下载链接（.fpk 文件）
     if releases:
@@ -245,10 +206,115 @@ def fetch_app_info(repo_url, github_token=None, existing_app=None):
     return app_info
 
 
-def fetch_and_process_app(app_data, store, github_token):
+def fetch_app_info(repo_url, github_token=None, existing_app=None, prefetched=None):
+    """
+    从 GitHub 获取应用信息 (支持增量更新)
+    
+    参数:
+    - repo_url: GitHub 仓库 URL
+    - github_token: GitHub API token
+    - existing_app: 已存在的应用信息（用于对比更新时间）
+    - prefetched: GraphQL 批量抓取的仓库数据（utils.github_graphql.fetch_repos_batch 的结果项），
+                  提供时直接使用其中的仓库信息、提交时间、Release 和文件内容，省去对应的 REST 请求
+    
+    返回:
+    - dict: 应用信息字典 (如果无需更新且提供了 existing_app，可能返回 existing_app)
+    """
+    owner, repo = parse_github_url(repo_url)
+    if not owner or not repo:
+        raise ValueError('无效的 GitHub 仓库 URL')
+    
+    prefetched_files = prefetched.get('files', {}) if prefetched else {}
+    # 最新 Release 在本次刷新内只请求一次，变更检查和下载地址共用
+    release_resolver = create_release_resolver(github_token)
+    
+    if prefetched:
+        # 1-2. 使用 GraphQL 批量抓取的数据
+        repo_info = prefetched['repo_info']
+        releases = prefetched.get('releases') or []
+        manifest_update = prefetched.get('path_commit_date')
+    else:
+        # 1. 获取仓库基础信息 (轻量请求)
+        repo_info = fetch_github_api(f'https://api.github.com/repos/{owner}/{repo}', github_token)
+        if not repo_info:
+            raise ValueError('无法获取仓库信息')
+        
+        # 2. 获取 manifest 文件的提交信息和 Releases 信息 (用于判断是否需要更新)
+        manifest_commits = fetch_github_api(
+            f'https://api.github.com/repos/{owner}/{repo}/commits?path=manifest&per_page=1',
+            github_token
+        )
+        releases = release_resolver.releases(owner, repo)
+        
+        manifest_update = commit_date_of(manifest_commits)
+
+    current_last_update = resolve_last_update(repo_info, manifest_update, releases)
+
+    # 3. 增量更新检查
+    unchanged_app = reuse_unchanged_app(existing_app, current_last_update, repo_info, repo)
+    if unchanged_app:
+        return unchanged_app
+
+    # 4. 详细抓取 (Manifest, README, Icon, Releases) - 只有检测到变更才执行
+    # 获取 manifest 文件
+    manifest_data = {}
+    try:
+        if prefetched_files.get('manifest') is not None:
+            manifest_data = parse_manifest(prefetched_files['manifest'])
+        else:
+            manifest_content = fetch_github_raw(
+                f'https://api.github.com/repos/{owner}/{repo}/contents/manifest',
+                github_token
+            )
+            if manifest_content is not None:
+                manifest_data = parse_manifest(manifest_content)
+    except Exception as e:
+        print(f"获取 manifest 文件失败: {str(e)}")
+    
+    # 获取 README（流式扫描，所需信息都找到后停止下载）
+    readme = None
+    try:
+        need_version, need_category = readme_needs(manifest_data, releases)
+        readme = fetch_readme(owner, repo, github_token, need_version, need_category)
+    except Exception as e:
+        print(f"获取 README 失败: {str(e)}")
+    
+    # 获取图标：一次获取文件树在内存中查找，文件树不可用时回退到逐个探测
+    icon_url = ''
+    default_branch = repo_info.get('default_branch', 'main')
+    tree = fetch_repo_tree(owner, repo, default_branch, github_token)
+    if tree is not None:
+        icon_name = tree.first_existing('', ICON_VARIANTS)
+    else:
+        icon_name = None
+        for candidate in ICON_VARIANTS:
+            icon_res = fetch_github_api(
+                f'https://api.github.com/repos/{owner}/{repo}/contents/{candidate}',
+                github_token,
+                max_retries=1,
+                silent=True
+            )
+            if icon_res:
+                icon_name = candidate
+                break
+    if icon_name:
+        icon_url = f'https://raw.githubusercontent.com/{owner}/{repo}/{default_branch}/{icon_name}'
+        print(f"找到图标: {icon_url}")
+            
+    # 最新 Release 已在变更检查时获取（或由 GraphQL 批量抓取提供），这里直接复用
+    return build_app_info(
+        owner, repo, repo_info, current_last_update,
+        manifest_data, readme, icon_url, releases
+    )
+
+
+def fetch_and_process_app(app_data, store, github_token, prefetched=None):
     """
     处理单个应用的获取和更新（供并发调用）
     
+    参数:
+    - prefetched: 该应用仓库的 GraphQL 批量抓取数据（可选）
+    
     返回:
     - dict: 更新后的应用详情，失败返回 None
     """
@@ -263,7 +329,7 @@ def fetch_and_process_app(app_data, store, github_token):
         existing_app = store.find_app(app_id)
         
         # 传入 existing_app 触发增量检查
-        app_info = fetch_app_info(repo_url, github_token, existing_app)
+        app_info = fetch_app_info(repo_url, github_token, existing_app, prefetched)
         
         app_detail = {
             'id': app_id,
@@ -10,16 +10,18 @@ import json
 import sys
 import os
 import re
-import base64
+import hashlib
 from datetime import datetime
 
 # 添加项目根目录到 Python 路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from utils import fetch_github_api, auto_classify_app, validate_app_key, parse_github_url
+from utils import fetch_github_api, fetch_github_raw, auto_classify_app, validate_app_key, parse_github_url
+from utils.repo_tree import fetch_repo_tree
 
 
-def fetch_fnpack_info(repo_url, app_name_in_fnpack=None, github_token=None, existing_apps=None):
+def fetch_fnpack_info(repo_url, app_name_in_fnpack=None, github_token=None, existing_apps=None, prefetched=None,
+                      mirror=None, app_executor=None):
     """
     从GitHub仓库读取fnpack.json文件并提取应用信息
     严格按照fnpack.json规范解析数据
@@ -29,6 +31,12 @@ def fetch_fnpack_info(repo_url, app_name_in_fnpack=None, github_token=None, exis
     - app_name_in_fnpack: fnpack.json中应用的键名，如果不提供则返回所有应用
     - github_token: GitHub API token，用于提高API调用限制
     - existing_apps: 已存在的应用列表（用于增量更新检查），列表中的元素为已存储的应用详情字典
+    - prefetched: GraphQL 批量抓取的仓库数据（utils.github_graphql.fetch_repos_batch 的结果项），
+                  提供时直接使用其中的仓库信息、fnpack.json 提交时间和内容
+    - mirror: 仓库的本地 Git 镜像（utils.git_mirror.GitMirror），提供时 fnpack.json 的提交时间、
+              内容和文件树都从镜像读取；镜像同步失败时回退到 REST API
+    - app_executor: 处理仓库内各个应用的执行器（可选，需提供 submit()，如 utils.scheduler.WorkScheduler），
+                    提供时各应用并发处理，结果仍按 fnpack.json 中的顺序排列；不提供时逐个处理
     
     返回:
     - 如果指定了app_name_in_fnpack: 返回单个应用信息字典
@@ -47,99 +55,115 @@ def fetch_fnpack_info(repo_url, app_name_in_fnpack=None, github_token=None, exis
         if repo != 'FnDepot':
             print(f"警告: 仓库名称 '{repo}' 不符合规范，推荐使用 'FnDepot'")
         
-        # 获取仓库基本信息
-        repo_info = fetch_github_api(f'https://api.github.com/repos/{owner}/{repo}', github_token)
-        if not repo_info:
-            raise ValueError('无法获取仓库信息')
-
-        # 增量更新检查：获取 fnpack.json 的最后提交时间
-        fnpack_commits = fetch_github_api(
-            f'https://api.github.com/repos/{owner}/{repo}/commits?path=fnpack.json&per_page=1',
-            github_token
-        )
+        prefetched_fnpack = prefetched.get('files', {}).get('fnpack.json') if prefetched else None
         
-        current_last_update = repo_info.get('updated_at')
-        if fnpack_commits and isinstance(fnpack_commits, list) and len(fnpack_commits) > 0:
-            current_last_update = fnpack_commits[0].get('commit', {}).get('committer', {}).get('date')
+        if mirror is not None and not mirror.sync():
+            print(f"回退到 REST API 获取仓库 {owner}/{repo}")
+            mirror = None
+        
+        if prefetched:
+            # 使用 GraphQL 批量抓取的仓库信息和 fnpack.json 提交时间
+            repo_info = dict(prefetched['repo_info'])
+            current_last_update = prefetched.get('path_commit_date') or repo_info.get('updated_at')
+        else:
+            # 获取仓库基本信息
+            repo_info = fetch_github_api(f'https://api.github.com/repos/{owner}/{repo}', github_token)
+            if not repo_info:
+                raise ValueError('无法获取仓库信息')
+
+            current_last_update = repo_info.get('updated_at')
+            if mirror is None:
+                # 增量更新检查：获取 fnpack.json 的最后提交时间
+                fnpack_commits = fetch_github_api(
+                    f'https://api.github.com/repos/{owner}/{repo}/commits?path=fnpack.json&per_page=1',
+                    github_token
+                )
+                if fnpack_commits and isinstance(fnpack_commits, list) and len(fnpack_commits) > 0:
+                    current_last_update = fnpack_commits[0].get('commit', {}).get('committer', {}).get('date')
+        
+        if mirror is not None:
+            # 使用镜像中默认分支上 fnpack.json 的最后提交时间
+            ref = mirror.resolve_ref(repo_info.get('default_branch'))
+            current_last_update = mirror.last_commit_date('fnpack.json', ref) or current_last_update
 
+        # 一次获取整个仓库的文件树：既用于按应用目录的 SHA 检测变更，
+        # 也让所有应用的图标、安装包和预览图都在内存中查找
+        if mirror is not None:
+            tree = mirror.tree(ref)
+        else:
+            tree = fetch_repo_tree(owner, repo, repo_info.get('default_branch', 'main'), github_token)
+        
         # 检查是否可以跳过更新
-        # 只要现有的应用中有一个记录的 lastUpdate 与 fnpack.json 的 commit 时间一致，就可以认为没变
-        if existing_apps:
-            # 找到任意一个来自此仓库的有效应用
-            sample_app = None
-            for app in existing_apps:
-                # 简单验证一下 app 是否属于当前仓库 (通过 id 或 url)
-                if app.get('repository', '').lower() == repo_url.lower():
-                    sample_app = app
-                    break
-            
-            if sample_app:
-                cached_last_update = sample_app.get('lastUpdate')
-                if cached_last_update == current_last_update:
-                    print(f"Fnpack仓库 {repo} 无变更 (Last update: {current_last_update})，更新动态数据")
-                    
-                    # 构建返回结果，直接复用 existing_apps，但更新 Stars/Forks
-                    result_apps = {}
-                    
-                    # 重新映射 existing_apps 为 {app_key: app_info} 格式
-                    relevant_apps = [a for a in existing_apps if a.get('repository', '').lower() == repo_url.lower()]
-                    
-                    for app in relevant_apps:
-                        app_key = app.get('fnpack_app_key')
-                        if not app_key:
-                             continue # 跳过没有 key 的旧数据
-                        
-                        # 更新动态数据
-                        app['stars'] = repo_info.get('stargazers_count', 0)
-                        app['forks'] = repo_info.get('forks_count', 0)
-                        
-                        # 如果指定了只获取特定应用
-                        if app_name_in_fnpack and app_key != app_name_in_fnpack:
-                            continue
-
-                        result_apps[app_key] = app
-                    
-                    if app_name_in_fnpack:
-                        return result_apps.get(app_name_in_fnpack)
-                    return result_apps
+        unchanged = reuse_unchanged_repo(existing_apps, repo_url, repo, repo_info, current_last_update, app_name_in_fnpack, tree)
+        if unchanged is not None:
+            return unchanged
 
         # 获取fnpack.json文件内容
         fnpack_content = ''
         fnpack_data = {}
         try:
-            fnpack_res = fetch_github_api(f'https://api.github.com/repos/{owner}/{repo}/contents/fnpack.json', github_token)
-            if fnpack_res and 'content' in fnpack_res:
-                fnpack_content = base64.b64decode(fnpack_res['content']).decode('utf-8')
-                fnpack_data = json.loads(fnpack_content)
-                print(f"成功获取fnpack.json文件内容")
+            if mirror is not None:
+                fnpack_content = mirror.read_file('fnpack.json', ref)
+                if fnpack_content is None:
+                    print(f"仓库中未找到fnpack.json文件: {owner}/{repo}")
+                    return None
+            elif prefetched_fnpack is not None:
+                fnpack_content = prefetched_fnpack
             else:
-                print(f"仓库中未找到fnpack.json文件: {owner}/{repo}")
-                return None
+                fnpack_content = fetch_github_raw(f'https://api.github.com/repos/{owner}/{repo}/contents/fnpack.json', github_token)
+                if fnpack_content is None:
+                    print(f"仓库中未找到fnpack.json文件: {owner}/{repo}")
+                    return None
+            fnpack_data = json.loads(fnpack_content)
+            print(f"成功获取fnpack.json文件内容")
         except Exception as e:
             print(f"获取或解析fnpack.json失败: {str(e)}")
             return None
         
         # 传递 current_last_update 给 _process_single_app 以便使用统一的 commit 时间
         repo_info['fnpack_commit_date'] = current_last_update
+        
+        # 按 app_key 索引现有应用，用于逐个应用的增量检查
+        existing_by_key = {
+            app.get('fnpack_app_key'): app
+            for app in existing_apps or []
+            if app.get('repository', '').lower() == repo_url.lower() and app.get('fnpack_app_key')
+        }
 
         # 如果指定了应用键名，只返回单个应用
         if app_name_in_fnpack:
             if app_name_in_fnpack not in fnpack_data:
                 print(f"应用键 '{app_name_in_fnpack}' 不存在于fnpack.json中")
                 return None
-            return _process_single_app(fnpack_data[app_name_in_fnpack], app_name_in_fnpack, owner, repo, repo_info, github_token)
+            return _refresh_single_app(
+                fnpack_data[app_name_in_fnpack], app_name_in_fnpack, owner, repo, repo_info,
+                existing_by_key.get(app_name_in_fnpack), github_token, tree
+            )
         
         # 如果未指定应用键名，返回所有应用
         if not fnpack_data:
             print("fnpack.json中没有应用信息")
             return None
         
-        all_apps = {}
-        for app_key, app_config in fnpack_data.items():
-            print(f"处理应用: {app_key}")
-            app_info = _process_single_app(app_config, app_key, owner, repo, repo_info, github_token)
-            if app_info:
-                all_apps[app_key] = app_info
+        if app_executor is not None:
+            # 提交到共享执行器，大仓库的应用分摊到所有工作线程上，按提交顺序收集结果
+            futures = [
+                (app_key, app_executor.submit(
+                    _refresh_single_app, app_config, app_key, owner, repo, repo_info,
+                    existing_by_key.get(app_key), github_token, tree
+                ))
+                for app_key, app_config in fnpack_data.items()
+            ]
+            results = [(app_key, future.result()) for app_key, future in futures]
+        else:
+            results = []
+            for app_key, app_config in fnpack_data.items():
+                print(f"处理应用: {app_key}")
+                results.append((app_key, _refresh_single_app(
+                    app_config, app_key, owner, repo, repo_info, existing_by_key.get(app_key), github_token, tree
+                )))
+        
+        all_apps = {app_key: app_info for app_key, app_info in results if app_info}
         
         print(f"成功解析fnpack.json，获取到 {len(all_apps)} 个应用信息")
         return all_apps
@@ -148,9 +172,157 @@ def fetch_fnpack_info(repo_url, app_name_in_fnpack=None, github_token=None, exis
         print(f"获取fnpack信息失败: {str(error)}")
         return None
 
-def _process_single_app(app_config, app_key, owner, repo, repo_info, github_token=None):
+# 应用目录下的图标文件名（按优先级排列）
+FNPACK_ICON_VARIANTS = ['ICON.PNG', 'ICON.png', 'icon.png', 'Icon.png', 'icon.PNG']
+
+# 预览图支持的图片格式
+IMAGE_EXTENSIONS = ['.png', '.jpg', '.jpeg', '.webp']
+
+# 标签到系统分类的映射
+LABEL_TO_CATEGORY = {
+    '工具': 'utility',
+    '终端': 'system',
+    '开发': 'development',
+    '游戏': 'games',
+    '媒体': 'media',
+    '网络': 'network',
+    '办公': 'productivity',
+    '系统': 'system',
+    '教育': 'productivity',
+    '社交': 'network',
+    '娱乐': 'games'
+}
+
+
+def app_entry_hash(app_config):
+    """计算应用在 fnpack.json 中配置项的哈希（键顺序无关）"""
+    canonical = json.dumps(app_config, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def app_tree_sha(tree, app_key):
+    """返回应用目录 /{app_key}/ 在文件树中的 SHA，目录不存在时返回空字符串"""
+    entry = tree.entry(app_key)
+    return (entry.get('sha') or '') if entry else ''
+
+
+def reuse_unchanged_app(existing_app, app_config, app_key, repo_info, tree):
+    """
+    应用级增量更新检查
+    应用目录的树 SHA 和 fnpack.json 中的配置项哈希都未变化时，复用现有记录，只更新动态数据
+    
+    返回:
+    - 无变更时返回复用的应用信息，否则返回 None
+    """
+    if not existing_app or tree is None:
+        return None
+    if existing_app.get('fnpack_tree_sha') != app_tree_sha(tree, app_key):
+        return None
+    if existing_app.get('fnpack_entry_hash') != app_entry_hash(app_config):
+        return None
+    
+    print(f"应用 {app_key} 无变更，复用现有数据")
+    app_info = dict(existing_app)
+    app_info['stars'] = repo_info.get('stargazers_count', 0)
+    app_info['forks'] = repo_info.get('forks_count', 0)
+    app_info['lastUpdate'] = repo_info.get('fnpack_commit_date') or app_info.get('lastUpdate')
+    return app_info
+
+
+def _refresh_single_app(app_config, app_key, owner, repo, repo_info, existing_app=None, github_token=None, tree=None):
+    """
+    获取单个应用的信息：无变更时复用现有记录，否则重新解析，并记录用于下次增量检查的树 SHA 和配置哈希
+    """
+    app_info = reuse_unchanged_app(existing_app, app_config, app_key, repo_info, tree)
+    if app_info is None:
+        app_info = _process_single_app(app_config, app_key, owner, repo, repo_info, github_token, tree)
+    if app_info:
+        app_info['fnpack_tree_sha'] = app_tree_sha(tree, app_key) if tree is not None else ''
+        app_info['fnpack_entry_hash'] = app_entry_hash(app_config)
+    return app_info
+
+
+def reuse_unchanged_repo(existing_apps, repo_url, repo, repo_info, current_last_update, app_name_in_fnpack=None,
+                         tree=None):
+    """
+    仓库级增量更新检查
+    只要现有的应用中有一个记录的 lastUpdate 与 fnpack.json 的 commit 时间一致，就可以认为没变；
+    提供文件树时还要求每个应用目录的树 SHA 都未变化，只修改了图标、安装包或预览图也能被发现
+    
+    返回:
+    - 无变更时返回复用的结果（格式与 fetch_fnpack_info 相同），否则返回 None
+    """
+    if not existing_apps:
+        return None
+    
+    # 找到任意一个来自此仓库的有效应用
+    sample_app = None
+    for app in existing_apps:
+        # 简单验证一下 app 是否属于当前仓库 (通过 id 或 url)
+        if app.get('repository', '').lower() == repo_url.lower():
+            sample_app = app
+            break
+    
+    if not sample_app or sample_app.get('lastUpdate') != current_last_update:
+        return None
+    
+    relevant_apps = [a for a in existing_apps if a.get('repository', '').lower() == repo_url.lower()]
+    
+    if tree is not None:
+        for app in relevant_apps:
+            app_key = app.get('fnpack_app_key')
+            if app_key and app.get('fnpack_tree_sha') != app_tree_sha(tree, app_key):
+                print(f"Fnpack仓库 {repo} 的应用目录 {app_key}/ 有变更")
+                return None
+    
+    print(f"Fnpack仓库 {repo} 无变更 (Last update: {current_last_update})，更新动态数据")
+    
+    # 构建返回结果，直接复用 existing_apps，但更新 Stars/Forks
+    # 重新映射 existing_apps 为 {app_key: app_info} 格式
+    result_apps = {}
+    
+    for app in relevant_apps:
+        app_key = app.get('fnpack_app_key')
+        if not app_key:
+            continue # 跳过没有 key 的旧数据
+        
+        # 更新动态数据
+        app['stars'] = repo_info.get('stargazers_count', 0)
+        app['forks'] = repo_info.get('forks_count', 0)
+        
+        # 如果指定了只获取特定应用
+        if app_name_in_fnpack and app_key != app_name_in_fnpack:
+            continue
+
+        result_apps[app_key] = app
+    
+    if app_name_in_fnpack:
+        return result_apps.get(app_name_in_fnpack)
+    return result_apps
+
+
+def screenshots_from_listing(owner, repo, app_key, preview_res):
+    """从 Preview 目录列表中筛选预览图地址（最多 9 张）"""
+    screenshots = []
+    if preview_res and isinstance(preview_res, list):
+        # 筛选支持的图片格式
+        for item in preview_res:
+            if any(item.get('name', '').lower().endswith(ext) for ext in IMAGE_EXTENSIONS):
+                img_url = f'https://raw.githubusercontent.com/{owner}/{repo}/main/{app_key}/Preview/{item.get("name")}'
+                screenshots.append(img_url)
+        # 限制最多 9 张预览图
+        screenshots = screenshots[:9]
+        print(f"找到 {len(screenshots)} 张预览图")
+    return screenshots
+
+
+def _process_single_app(app_config, app_key, owner, repo, repo_info, github_token=None, tree=None):
     """
     处理单个应用配置，提取应用信息
+    
+    参数:
+    - tree: 仓库文件树（RepoTree），提供时图标、安装包和预览图直接在文件树中查找，
+            否则逐个请求 contents 接口探测
     """
     try:
         # 验证应用唯一标识是否符合规范
@@ -159,15 +331,20 @@ def _process_single_app(app_config, app_key, owner, repo, repo_info, github_toke
         
         # 获取图标URL，支持多种大小写变体
         icon_url = ''
-        icon_variants = ['ICON.PNG', 'ICON.png', 'icon.png', 'Icon.png', 'icon.PNG']
         try:
-            for icon_name in icon_variants:
-                icon_res = fetch_github_api(f'https://api.github.com/repos/{owner}/{repo}/contents/{app_key}/{icon_name}', github_token)
-                if icon_res:
-                    icon_url = f'https://raw.githubusercontent.com/{owner}/{repo}/main/{app_key}/{icon_name}'
-                    print(f"找到图标: {icon_url}")
-                    break
-            if not icon_url:
+            if tree is not None:
+                icon_name = tree.first_existing(app_key, FNPACK_ICON_VARIANTS)
+            else:
+                icon_name = None
+                for candidate in FNPACK_ICON_VARIANTS:
+                    icon_res = fetch_github_api(f'https://api.github.com/repos/{owner}/{repo}/contents/{app_key}/{candidate}', github_token)
+                    if icon_res:
+                        icon_name = candidate
+                        break
+            if icon_name:
+                icon_url = f'https://raw.githubusercontent.com/{owner}/{repo}/main/{app_key}/{icon_name}'
+                print(f"找到图标: {icon_url}")
+            else:
                 print(f"警告: 未找到图标文件 /{app_key}/ICON.PNG (尝试了多种大小写变体)")
         except Exception as e:
             print(f"获取图标失败: {str(e)}")
@@ -185,7 +362,10 @@ def _process_single_app(app_config, app_key, owner, repo, repo_info, github_toke
                 # 严格按照规范在/{app_key}/目录下查找{app_key}.fpk
                 download_url = f'https://raw.githubusercontent.com/{owner}/{repo}/main/{app_key}/{app_key}.fpk'
                 # 验证安装包是否存在
-                fpk_res = fetch_github_api(f'https://api.github.com/repos/{owner}/{repo}/contents/{app_key}/{app_key}.fpk', github_token)
+                if tree is not None:
+                    fpk_res = tree.exists(f'{app_key}/{app_key}.fpk')
+                else:
+                    fpk_res = fetch_github_api(f'https://api.github.com/repos/{owner}/{repo}/contents/{app_key}/{app_key}.fpk', github_token)
                 if fpk_res:
                     print(f"找到安装包: {download_url}")
                 else:
@@ -197,79 +377,98 @@ def _process_single_app(app_config, app_key, owner, repo, repo_info, github_toke
         screenshots = []
         try:
             # 检查Preview目录是否存在
-            preview_res = fetch_github_api(f'https://api.github.com/repos/{owner}/{repo}/contents/{app_key}/Preview', github_token)
-            if preview_res and isinstance(preview_res, list):
-                # 筛选支持的图片格式
-                image_extensions = ['.png', '.jpg', '.jpeg', '.webp']
-                for item in preview_res:
-                    if any(item.get('name', '').lower().endswith(ext) for ext in image_extensions):
-                        img_url = f'https://raw.githubusercontent.com/{owner}/{repo}/main/{app_key}/Preview/{item.get("name")}'
-                        screenshots.append(img_url)
-                # 限制最多 9 张预览图
-                screenshots = screenshots[:9]
-                print(f"找到 {len(screenshots)} 张预览图")
+            if tree is not None:
+                preview_res = tree.list_dir(f'{app_key}/Preview')
+            else:
+                preview_res = fetch_github_api(f'https://api.github.com/repos/{owner}/{repo}/contents/{app_key}/Preview', github_token)
+            screenshots = screenshots_from_listing(owner, repo, app_key, preview_res)
         except Exception as e:
             print(f"获取预览图失败: {str(e)}")
         
-        # 提取标签作为分类
-        category = 'uncategorized'
-        labels = app_config.get('labels', '')
-        if labels:
-            # 将标签按逗号分割，取第一个作为分类
-            first_label = labels.split(',')[0].strip().lower()
-            # 标签到系统分类的映射
-            label_to_category = {
-                '工具': 'utility',
-                '终端': 'system',
-                '开发': 'development',
-                '游戏': 'games',
-                '媒体': 'media',
-                '网络': 'network',
-                '办公': 'productivity',
-                '系统': 'system',
-                '教育': 'productivity',
-                '社交': 'network',
-                '娱乐': 'games'
-            }
-            category = label_to_category.get(first_label, 'utility')
-        else:
-            # 使用智能分类
-            display_name = app_config.get('display_name', '')
-            desc = app_config.get('desc', '')
-            category = auto_classify_app(display_name, desc)
-            print(f"为应用 {display_name} 自动分类为: {category}")
-        
-        # 构建应用信息字典，格式与fetch_app_info.py保持一致
-        # 根据规范要求包含所有必填字段
-        app_info = {
-            'name': app_config.get('display_name', app_key),  # 使用display_name作为应用名称
-            'description': app_config.get('desc', '') or '暂无描述',
-            'version': app_config.get('version', '1.0.0'),
-            'iconUrl': icon_url,
-            'downloadUrl': download_url,
-            'screenshots': screenshots,
-            'author': app_config.get('author', '') or repo_info.get('owner', {}).get('login', ''),
-            'author_url': app_config.get('author_url', ''),  # 规范要求的作者主页
-            'bug_report_url': app_config.get('bug_report_url', ''),  # 规范要求的问题反馈链接
-            'history': app_config.get('history', {}),  # 规范要求的版本更新记录
-            'stars': repo_info.get('stargazers_count', 0),
-            'forks': repo_info.get('forks_count', 0),
-            'category': category,
-            'lastUpdate': repo_info.get('fnpack_commit_date') or repo_info.get('updated_at', datetime.utcnow().isoformat() + 'Z'),
-            # 额外存储规范要求的字段
-            'app_key': app_key,
-            'install_type': app_config.get('install_type', ''),
-            'size': app_config.get('size', '')
-        }
-        
-        print(f"成功解析应用信息: {app_info}")
-        return app_info
+        return build_fnpack_app_info(app_config, app_key, repo_info, icon_url, download_url, screenshots)
         
     except Exception as error:
         print(f"处理应用 {app_key} 时出错: {str(error)}")
         return None
 
-def update_apps_from_fnpack(app_id, app_name, repo_url, app_name_in_fnpack=None, github_token=None):
+
+def build_fnpack_app_info(app_config, app_key, repo_info, icon_url, download_url, screenshots):
+    """
+    根据已获取的数据构建单个 fnpack 应用信息（不发起网络请求）
+    """
+    # 提取标签作为分类
+    category = 'uncategorized'
+    labels = app_config.get('labels', '')
+    if labels:
+        # 将标签按逗号分割，取第一个作为分类
+        first_label = labels.split(',')[0].strip().lower()
+        category = LABEL_TO_CATEGORY.get(first_label, 'utility')
+    else:
+        # 使用智能分类
+        display_name = app_config.get('display_name', '')
+        desc = app_config.get('desc', '')
+        category = auto_classify_app(display_name, desc)
+        print(f"为应用 {display_name} 自动分类为: {category}")
+    
+    # 构建应用信息字典，格式与fetch_app_info.py保持一致
+    # 根据规范要求包含所有必填字段
+    app_info = {
+        'name': app_config.get('display_name', app_key),  # 使用display_name作为应用名称
+        'description': app_config.get('desc', '') or '暂无描述',
+        'version': app_config.get('version', '1.0.0'),
+        'iconUrl': icon_url,
+        'downloadUrl': download_url,
+        'screenshots': screenshots,
+        'author': app_config.get('author', '') or repo_info.get('owner', {}).get('login', ''),
+        'author_url': app_config.get('author_url', ''),  # 规范要求的作者主页
+        'bug_report_url': app_config.get('bug_report_url', ''),  # 规范要求的问题反馈链接
+        'history': app_config.get('history', {}),  # 规范要求的版本更新记录
+        'stars': repo_info.get('stargazers_count', 0),
+        'forks': repo_info.get('forks_count', 0),
+        'category': category,
+        'lastUpdate': repo_info.get('fnpack_commit_date') or repo_info.get('updated_at', datetime.utcnow().isoformat() + 'Z'),
+        # 额外存储规范要求的字段
+        'app_key': app_key,
+        'install_type': app_config.get('install_type', ''),
+        'size': app_config.get('size', '')
+    }
+    
+    print(f"成功解析应用信息: {app_info}")
+    return app_info
+
+
+def build_fnpack_app_detail(repo_key, repo_url, app_key, app_info, default_last_update=''):
+    """
+    把 fetch_fnpack_info 返回的单个应用信息转换为 fnpack_details.json 中的记录
+    应用唯一ID: repo_key + '_' + app_key
+    """
+    return {
+        'id': f"{repo_key}_{app_key}",
+        'name': app_info.get('name', app_key),
+        'repository': repo_url,
+        'description': app_info.get('description', ''),
+        'version': app_info.get('version', '1.0.0'),
+        'iconUrl': app_info.get('iconUrl', ''),
+        'downloadUrl': app_info.get('downloadUrl', ''),
+        'screenshots': app_info.get('screenshots', []),
+        'author': app_info.get('author', ''),
+        'author_url': app_info.get('author_url', ''),  # 规范要求的作者主页
+        'bug_report_url': app_info.get('bug_report_url', ''),  # 规范要求的问题反馈链接
+        'history': app_info.get('history', {}),  # 规范要求的版本更新记录
+        'stars': app_info.get('stars', 0),
+        'forks': app_info.get('forks', 0),
+        'category': app_info.get('category', 'uncategorized'),
+        'lastUpdate': app_info.get('lastUpdate', default_last_update),
+        'fnpack_app_key': app_key,
+        'fnpack_repo_key': repo_key,  # 使用仓库key作为标识
+        'install_type': app_info.get('install_type', ''),
+        'size': app_info.get('size', ''),
+        # 增量更新依据：应用目录的树 SHA 和 fnpack.json 中配置项的哈希
+        'fnpack_tree_sha': app_info.get('fnpack_tree_sha', ''),
+        'fnpack_entry_hash': app_info.get('fnpack_entry_hash', '')
+    }
+
+def update_apps_from_fnpack(app_id, app_name, repo_url, app_name_in_fnpack=None, github_token=None, app_info=None):
     """
     从fnpack.json更新应用信息到独立的fnpack_details.json文件
     严格按照fnpack.json规范处理数据，使用与app_details.json相同的格式供网页端读取
@@ -279,6 +478,12 @@ def update_apps_from_fnpack(app_id, app_name, repo_url, app_name_in_fnpack=None,
     - 使用display_name作为应用显示名称
     - 图标路径：/{app_name}/ICON.PNG
     - 安装包路径：/{app_name}/{app_name}.fpk
+    
+    仓库内所有应用的记录先全部构建好，再通过一次 upsert_apps_batch 写入，
+    详情文件每次调用只读写一次。
+    
+    参数:
+    - app_info: 调用方已获取的 fetch_fnpack_info 结果（可选），提供时不再重复请求
     """
     # 从URL提取仓库key（用户名或组织名）
     import re
@@ -290,95 +495,41 @@ def update_apps_from_fnpack(app_id, app_name, repo_url, app_name_in_fnpack=None,
         from utils.data_store import FnpackDetailsStore
         store = FnpackDetailsStore()
         
-        # 获取当前存储的数据
-        fnpack_details_data = store.load()
-        apps_list = fnpack_details_data.get('apps', [])
-        
         # 获取应用详细信息（从fnpack.json）
-        print(f"开始获取仓库 {repo_url} 的fnpack详细信息...")
-        app_info = fetch_fnpack_info(repo_url, app_name_in_fnpack, github_token)
+        if app_info is None:
+            print(f"开始获取仓库 {repo_url} 的fnpack详细信息...")
+            app_info = fetch_fnpack_info(repo_url, app_name_in_fnpack, github_token)
         
-        # 处理获取到的应用信息
-        updated_count = 0
+        # 先构建所有应用记录，最后统一写入
+        new_app_details = []
+        default_last_update = datetime.utcnow().isoformat() + 'Z'
         
         if isinstance(app_info, dict):
             # 检查是否是单个应用还是多个应用
             if 'name' in app_info and 'description' in app_info:
                 # 单个应用情况
-                display_name = app_info.get('name', app_name)
                 app_key = app_info.get('app_key', app_name_in_fnpack)
-                
-                # 构建应用唯一ID: repo_key + '_' + app_key
-                final_app_id = f"{repo_key}_{app_key}"
-                
-                new_app_detail = {
-                    'id': final_app_id,
-                    'name': display_name,
-                    'repository': repo_url,
-                    'description': app_info.get('description', ''),
-                    'version': app_info.get('version', '1.0.0'),
-                    'iconUrl': app_info.get('iconUrl', ''),
-                    'downloadUrl': app_info.get('downloadUrl', ''),
-                    'screenshots': app_info.get('screenshots', []),
-                    'author': app_info.get('author', ''),
-                    'author_url': app_info.get('author_url', ''),  # 规范要求的作者主页
-                    'bug_report_url': app_info.get('bug_report_url', ''),  # 规范要求的问题反馈链接
-                    'history': app_info.get('history', {}),  # 规范要求的版本更新记录
-                    'stars': app_info.get('stars', 0),
-                    'forks': app_info.get('forks', 0),
-                    'category': app_info.get('category', 'uncategorized'),
-                    'lastUpdate': app_info.get('lastUpdate', datetime.utcnow().isoformat() + 'Z'),
-                    'fnpack_app_key': app_key,
-                    'fnpack_repo_key': repo_key,  # 使用仓库key作为标识
-                    'install_type': app_info.get('install_type', ''),
-                    'size': app_info.get('size', '')
-                }
-                
-                store.upsert_app(new_app_detail)
-                print(f"更新fnpack应用详细信息: {final_app_id} ({display_name})")
-                updated_count = 1
+                new_app_details.append(
+                    build_fnpack_app_detail(repo_key, repo_url, app_key, app_info, default_last_update)
+                )
             else:
                 # 多个应用情况（从仓库获取所有应用）
                 print(f"开始处理仓库中的 {len(app_info)} 个应用...")
                 for app_key, single_app_info in app_info.items():
-                    display_name = single_app_info.get('name', app_key)
-                    
-                    # 构建应用唯一ID: repo_key + '_' + app_key
-                    final_app_id = f"{repo_key}_{app_key}"
-                    
-                    new_app_detail = {
-                        'id': final_app_id,
-                        'name': display_name,
-                        'repository': repo_url,
-                        'description': single_app_info.get('description', ''),
-                        'version': single_app_info.get('version', '1.0.0'),
-                        'iconUrl': single_app_info.get('iconUrl', ''),
-                        'downloadUrl': single_app_info.get('downloadUrl', ''),
-                        'screenshots': single_app_info.get('screenshots', []),
-                        'author': single_app_info.get('author', ''),
-                        'author_url': single_app_info.get('author_url', ''),  # 规范要求的作者主页
-                        'bug_report_url': single_app_info.get('bug_report_url', ''),  # 规范要求的问题反馈链接
-                        'history': single_app_info.get('history', {}),  # 规范要求的版本更新记录
-                        'stars': single_app_info.get('stars', 0),
-                        'forks': single_app_info.get('forks', 0),
-                        'category': single_app_info.get('category', 'uncategorized'),
-                        'lastUpdate': single_app_info.get('lastUpdate', datetime.utcnow().isoformat() + 'Z'),
-                        'fnpack_app_key': app_key,
-                        'fnpack_repo_key': repo_key,  # 使用仓库key作为标识
-                        'install_type': single_app_info.get('install_type', ''),
-                        'size': single_app_info.get('size', '')
-                    }
-                    
-                    store.upsert_app(new_app_detail)
-                    print(f"更新fnpack应用详细信息: {final_app_id} ({display_name})")
-                    updated_count += 1
+                    new_app_details.append(
+                        build_fnpack_app_detail(repo_key, repo_url, app_key, single_app_info, default_last_update)
+                    )
         
-        if updated_count > 0:
-            print(f'fnpack应用详细元数据更新成功，共处理 {updated_count} 个应用')
-            return True
-        else:
+        if not new_app_details:
             print(f"无法获取应用信息或没有需要更新的应用")
             return False
+        
+        store.upsert_apps_batch(new_app_details)
+        for app_detail in new_app_details:
+            print(f"更新fnpack应用详细信息: {app_detail['id']} ({app_detail['name']})")
+        
+        print(f'fnpack应用详细元数据更新成功，共处理 {len(new_app_details)} 个应用')
+        return True
     
     except Exception as error:
         print(f"更新fnpack应用详细元数据失败: {str(error)}")
@@ -15,7 +15,7 @@ import subprocess
 # 添加项目根目录到 Python 路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from utils import validate_app_info, GitHubAPI, get_apps_json_path
+from utils import validate_app_info, GitHubAPI, get_apps_json_path, DataStore
 from utils.validators import validate_content
 from fetch_app_info import fetch_app_info
 
@@ -72,8 +72,8 @@ def update_apps_json(app_id, app_name, repo_url):
             apps_data['apps'].append(app_info)
             print(f"添加新应用到apps.json: {app_id}")
         
-        with open(apps_json_path, 'w', encoding='utf-8') as f:
-            json.dump(apps_data, f, ensure_ascii=False, indent=2)
+        if not DataStore.save_json(apps_json_path, apps_data):
+            raise IOError(f"无法写入 {apps_json_path}")
         print('apps.json文件已更新')
         return True
         
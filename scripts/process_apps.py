@@ -3,18 +3,32 @@
 
 """
 FN-Free-Store 应用管理工具
-提供添加、移除、列出、预览和批量更新应用的命令行功能
+提供添加、移除、列出、预览、内容审核和批量更新应用的命令行功能
 """
 
 import os
 import sys
+import time
 import argparse
 
 # 添加项目根目录到 Python 路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from utils import AppsStore, AppDetailsStore
+from utils import (
+    AppsStore,
+    AppDetailsStore,
+    configure_connection_pool,
+    get_response_cache,
+    get_request_coalescer,
+    get_rate_limit_budget,
+    parse_github_url,
+    audit_catalogue
+)
+from utils.github_graphql import fetch_repos_batch
+from utils.checkpoint import BatchCheckpoint, DEFAULT_RESUME_WINDOW_HOURS
+from utils.readme_scanner import get_readme_stats
+from utils.scheduler import WorkScheduler, parse_max_workers
+from utils.repo_stats import refresh_store_stats
 from fetch_app_info import fetch_app_info, update_apps, fetch_and_process_app
 
 
@@ -67,9 +81,70 @@ def preview_app(repo_url):
         print(f"获取应用信息时出错: {str(e)}")
         return None
 
-def batch_update_apps():
+def audit_content():
+    """
+    重新审核 app_details.json 和 fnpack_details.json 中所有应用的名称和描述
+    
+    返回:
+    - bool: 是否全部通过
+    """
+    findings = audit_catalogue()
+    if not findings:
+        print("内容审核通过：未发现不当内容")
+        return True
+    
+    print(f"内容审核发现 {len(findings)} 处不当内容:")
+    for finding in findings:
+        words = "、".join(f"{word}@{start}" for start, word in finding['hits'])
+        field = '名称' if finding['field'] == 'name' else '描述'
+        print(f"- [{finding['source']}] {finding['name']} ({finding['id']}) {field}: {words}")
+    return False
+
+# 单个应用刷新预计消耗的 API 请求数（仓库信息 + manifest 提交 + Releases，变更时更多）
+ESTIMATED_REQUESTS_PER_APP = 4
+
+
+def prioritise_apps(apps, existing_details, budget):
+    """
+    根据剩余配额决定应用的刷新顺序
+    
+    配额足够时保持原顺序；不足时优先刷新尚无详情或详情不完整的应用，
+    其余按 Star 数从高到低排列，确保配额耗尽前先覆盖最重要的应用。
+    
+    参数:
+    - apps: apps.json 中的应用列表
+    - existing_details: {app_id: 已存储的应用详情}
+    - budget: get_rate_limit_budget() 返回的配额信息
+    """
+    remaining = budget.get('remaining')
+    needed = len(apps) * ESTIMATED_REQUESTS_PER_APP
+    if remaining is None or remaining >= needed:
+        return list(apps)
+    
+    print(f"⚠ 剩余 API 配额 {remaining} 次，预计需要 {needed} 次，按优先级排序刷新")
+    
+    def priority(app):
+        detail = existing_details.get(app.get('id'))
+        if not detail:
+            return (0, 0)
+        if not detail.get('version') or not detail.get('description'):
+            return (1, 0)
+        return (2, -detail.get('stars', 0))
+    
+    return sorted(apps, key=priority)
+
+
+def batch_update_apps(engine='thread', resume=False, resume_window=DEFAULT_RESUME_WINDOW_HOURS, max_workers='auto'):
     """
     批量更新所有应用信息（并发版）
+    
+    参数:
+    - engine: 抓取引擎，'thread' 为线程池（每个应用的子请求串行），
+              'async' 为异步引擎（子请求并发，受全局并发上限控制）
+    - resume: 是否从断点续跑，跳过本轮运行窗口内已完成的应用
+    - resume_window: 断点的有效运行窗口（小时）
+    - max_workers: 线程池引擎的工作线程数，'auto' 表示根据请求延迟和剩余配额自动调整；
+                   异步引擎下为全局并发请求上限（'auto' 时使用默认值）
     """
     apps_store = AppsStore()
     app_details_store = AppDetailsStore()
@@ -82,44 +157,112 @@ def batch_update_apps():
     # 获取 GitHub Token
     github_token = os.environ.get('GITHUB_TOKEN') or os.environ.get('PERSONAL_TOKEN')
     
-    # 获取当前活跃的应用ID集合并清理已删除应用
-    active_app_ids = apps_store.get_app_ids()
-    app_details_store.sync_with_apps_list(active_app_ids)
-    
-    print(f"开始批量更新 {len(apps)} 个应用...")
-    
-    updated_apps = []
-    success_count = 0
-    fail_count = 0
+    # 断点记录已完成的应用，续跑时跳过（其结果由预写日志恢复）
+    checkpoint = BatchCheckpoint('batch_apps', resume_window)
+    resumed_count = checkpoint.start(resume)
     
-    # 使用线程池并发抓取
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        future_to_app = {
-            executor.submit(fetch_and_process_app, app, app_details_store, github_token): app 
-            for app in apps
-        }
+    # 批量模式下详情文件只加载一次，各线程共享内存索引，结束时统一写回；
+    # 每个应用的结果先写入预写日志，续跑本轮运行窗口时重放
+    with app_details_store.batch(journal=True, replay=checkpoint.resumed):
+        # 获取当前活跃的应用ID集合并清理已删除应用
+        active_app_ids = apps_store.get_app_ids()
+        app_details_store.sync_with_apps_list(active_app_ids)
+        
+        if resumed_count:
+            remaining_apps = [app for app in apps if not checkpoint.is_done(app.get('id'))]
+            print(f"从断点续跑：跳过本轮已完成的 {len(apps) - len(remaining_apps)} 个应用")
+            apps = remaining_apps
+        
+        def record_result(app, result):
+            """单个应用完成时写入预写日志并记录断点"""
+            if result:
+                app_details_store.append_journal([result])
+                checkpoint.mark_done(app.get('id'))
+        
+        # 配额不足时优先刷新重要的应用
+        budget = get_rate_limit_budget(github_token, refresh=True)
+        existing_details = {app.get('id'): app for app in app_details_store.get_apps()}
+        apps = prioritise_apps(apps, existing_details, budget)
+        
+        # 先用 GraphQL 批量获取所有仓库的基础数据，获取失败的仓库回退到 REST；
+        # README 不预取，只有检测到变更的应用才通过流式扫描按需下载
+        prefetched_map = fetch_repos_batch(
+            [parse_github_url(app.get('repository')) for app in apps if app.get('repository')],
+            github_token,
+            history_path='manifest',
+            files=['manifest']
+        )
+        
+        print(f"开始批量更新 {len(apps)} 个应用 (引擎: {engine})...")
+        started_at = time.time()
+        
+        updated_apps = []
+        success_count = 0
+        fail_count = 0
         
-        for future in as_completed(future_to_app):
-            app = future_to_app[future]
+        if engine == 'async':
+            # 异步引擎：所有应用及其子请求并发执行
+            from async_crawler import crawl_apps, DEFAULT_CONCURRENCY
+            results = crawl_apps(
+                apps, existing_details, github_token, prefetched_map,
+                concurrency=DEFAULT_CONCURRENCY if max_workers == 'auto' else max_workers,
+                on_result=record_result
+            )
+        else:
+            # 使用调度器并发抓取，连接池大小与线程数上限一致以复用 keep-alive 连接
+            scheduler = WorkScheduler(max_workers, github_token)
+            configure_connection_pool(scheduler.max_workers)
+            with scheduler:
+                results = scheduler.run(
+                    lambda app: fetch_and_process_app(
+                        app, app_details_store, github_token,
+                        prefetched_map.get(parse_github_url(app.get('repository')))
+                    ),
+                    apps,
+                    on_result=record_result
+                )
+            print(scheduler.summary())
+        checkpoint.flush()
+        
+        for app, result in results:
             app_name = app.get('name')
-            try:
-                result = future.result()
-                if result:
-                    updated_apps.append(result)
-                    success_count += 1
-                else:
-                    print(f"应用 {app_name} 更新失败或无需更新")
-
-            except Exception as e:
-                print(f"应用 {app_name} 处理异常: {str(e)}")
+            if isinstance(result, Exception):
+                print(f"应用 {app_name} 处理异常: {str(result)}")
                 fail_count += 1
-                
-    # 批量保存结果
-    if updated_apps:
-        print(f"正在保存 {len(updated_apps)} 个应用的数据...")
-        app_details_store.upsert_apps_batch(updated_apps)
+            elif result:
+                updated_apps.append(result)
+                success_count += 1
+            else:
+                print(f"应用 {app_name} 更新失败或无需更新")
+                    
+        # 批量保存结果
+        if updated_apps:
+            print(f"正在保存 {len(updated_apps)} 个应用的数据...")
+            app_details_store.upsert_apps_batch(updated_apps)
     
-    print(f"\n批量更新完成: 成功 {success_count} 个，失败 {fail_count} 个")
+    # 详情已写回，之后的 --resume 不再续用本轮断点
+    checkpoint.finish()
+    print(f"\n批量更新完成: 成功 {success_count} 个，失败 {fail_count} 个，耗时 {time.time() - started_at:.1f} 秒")
+    cache = get_response_cache()
+    print(f"条件请求缓存: 命中 {cache.hits} 次，未命中 {cache.misses} 次")
+    removed, freed = cache.prune()
+    if removed:
+        print(f"清理过期缓存: {removed} 个条目，{freed / 1024:.1f} KiB")
+    print(get_request_coalescer().summary())
+    for line in get_readme_stats().summary():
+        print(line)
+
+
+def refresh_app_stats():
+    """
+    只刷新所有应用的 Star/Fork 数（batch-update --stats-only）
+    不重新抓取应用元数据，供比完整更新更频繁的定时任务使用
+    """
+    github_token = os.environ.get('GITHUB_TOKEN') or os.environ.get('PERSONAL_TOKEN')
+    started_at = time.time()
+    changed_count, repo_count = refresh_store_stats(AppDetailsStore(), github_token)
+    print(f"Star/Fork 刷新完成: 查询 {repo_count} 个仓库，{changed_count} 个应用有变化，"
+          f"耗时 {time.time() - started_at:.1f} 秒")
 
 
 def main():
@@ -143,8 +286,21 @@ def main():
     preview_parser = subparsers.add_parser('preview', help='预览应用信息')
     preview_parser.add_argument('repo', help='仓库URL')
     
+    # 内容审核命令
+    subparsers.add_parser('audit-content', help='重新审核所有应用详情的名称和描述')
+    
     # 批量更新命令
-    subparsers.add_parser('batch-update', help='批量更新所有应用元数据')
+    batch_parser = subparsers.add_parser('batch-update', help='批量更新所有应用元数据')
+    batch_parser.add_argument('--engine', choices=['thread', 'async'], default='thread',
+                              help='抓取引擎：thread 为线程池，async 为异步并发引擎')
+    batch_parser.add_argument('--resume', action='store_true',
+                              help='从断点续跑，跳过本轮运行窗口内已完成的应用')
+    batch_parser.add_argument('--resume-window', type=float, default=DEFAULT_RESUME_WINDOW_HOURS,
+                              help=f'断点有效的运行窗口（小时，默认 {DEFAULT_RESUME_WINDOW_HOURS}）')
+    batch_parser.add_argument('--max-workers', type=parse_max_workers, default='auto',
+                              help='并发线程数，auto（默认）根据请求延迟和剩余 API 配额自动调整')
+    batch_parser.add_argument('--stats-only', action='store_true',
+                              help='只刷新 Star/Fork 数（GraphQL 批量查询），不重新抓取应用元数据')
     
     args = parser.parse_args()
     
@@ -156,8 +312,16 @@ def main():
         list_apps()
     elif args.command == 'preview':
         preview_app(args.repo)
+    elif args.command == 'audit-content':
+        if not audit_content():
+            sys.exit(1)
+    elif args.command == 'batch-update' and args.stats_only:
+        refresh_app_stats()
     elif args.command == 'batch-update':
-        batch_update_apps()
+        batch_update_apps(
+            engine=args.engine, resume=args.resume, resume_window=args.resume_window,
+            max_workers=args.max_workers
+        )
     else:
         parser.print_help()
 
@@ -10,13 +10,26 @@ import json
 import os
 import sys
 import re
+import time
 import argparse
 
 # 添加项目根目录到 Python 路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from utils import FnpacksStore, parse_github_url
-from fetch_fnpack_info import fetch_fnpack_info, update_apps_from_fnpack
+from utils import (
+    FnpacksStore,
+    parse_github_url,
+    configure_connection_pool,
+    get_response_cache,
+    get_request_coalescer,
+    get_rate_limit_budget
+)
+from utils.github_graphql import fetch_repos_batch
+from utils.checkpoint import BatchCheckpoint, DEFAULT_RESUME_WINDOW_HOURS
+from utils.git_mirror import GitMirror
+from utils.scheduler import WorkScheduler, parse_max_workers
+from utils.repo_stats import refresh_store_stats
+from fetch_fnpack_info import fetch_fnpack_info, update_apps_from_fnpack, build_fnpack_app_detail
 
 
 def add_fnpack_app(repo_url, app_key=None, github_token=None):
@@ -37,8 +50,7 @@ def add_fnpack_app(repo_url, app_key=None, github_token=None):
             return False
         
         # 获取仓库所有者作为 key
-        parsed = parse_github_url(repo_url)
-        owner = parsed['owner'] if parsed else None
+        owner, _ = parse_github_url(repo_url)
         
         if not owner:
             print("无法解析仓库URL")
@@ -53,8 +65,8 @@ def add_fnpack_app(repo_url, app_key=None, github_token=None):
         # 添加到 fnpacks 列表
         store.add_or_update_fnpack(owner, repo_url)
         
-        # 更新到 fnpack_details.json
-        update_apps_from_fnpack(owner, owner, repo_url, app_key, github_token)
+        # 更新到 fnpack_details.json（复用上面已获取的信息）
+        update_apps_from_fnpack(owner, owner, repo_url, app_key, github_token, app_info=app_info)
         
         # 根据 fnpack_info 类型确定显示信息
         if isinstance(app_info, dict) and 'name' in app_info:
@@ -93,18 +105,24 @@ def update_fnpack_app(app_id=None, repo_url=None, app_key=None, github_token=Non
                 print("未找到有效的fnpack.json或解析失败")
                 return False
             
-            current_app_id = app_info.get('fnpack_app_key')
-            display_name = app_info.get('name')
-            
             # 获取仓库所有者作为 key
-            parsed = parse_github_url(repo_url)
-            if parsed:
-                owner = parsed['owner']
+            owner, _ = parse_github_url(repo_url)
+            if owner:
                 store = FnpacksStore()
                 store.add_or_update_fnpack(owner, repo_url)
             
-            # 更新到 fnpack_details.json
-            success = update_apps_from_fnpack(current_app_id, display_name, repo_url, app_key, github_token)
+            # 指定 app_key 时返回单个应用，否则返回整个仓库的应用
+            if app_key:
+                current_app_id = f"{owner}_{app_info.get('app_key', app_key)}"
+                display_name = app_info.get('name')
+            else:
+                current_app_id = f"{owner}_*"
+                display_name = f"{len(app_info)} 个应用"
+            
+            # 更新到 fnpack_details.json（复用上面已获取的信息）
+            success = update_apps_from_fnpack(
+                current_app_id, display_name, repo_url, app_key, github_token, app_info=app_info
+            )
             
             if success:
                 print(f"成功更新应用: {display_name} (ID: {current_app_id})")
@@ -153,11 +171,13 @@ def update_fnpack_app(app_id=None, repo_url=None, app_key=None, github_token=Non
         return False
 
 
-from concurrent.futures import ThreadPoolExecutor, as_completed
-
-def process_repo_for_batch(fnpack, existing_apps_map, github_token):
+def process_repo_for_batch(fnpack, existing_apps_map, github_token, prefetched=None, backend='api',
+                           app_executor=None):
     """
     处理单个仓库的更新（供并发调用）
+    prefetched 为该仓库的 GraphQL 批量抓取数据（可选）
+    backend 为 'git' 时从本地 Git 镜像读取仓库文件
+    app_executor 为处理仓库内各个应用的调度器（可选）
     返回: list of app_details
     """
     repo_key = fnpack.get('key')
@@ -167,8 +187,16 @@ def process_repo_for_batch(fnpack, existing_apps_map, github_token):
         # 获取此仓库的现有应用数据，用于增量检查
         repo_existing_apps = existing_apps_map.get(repo_url, [])
         
+        mirror = None
+        if backend == 'git':
+            owner, repo = parse_github_url(repo_url)
+            if owner and repo:
+                mirror = GitMirror(owner, repo)
+        
         # 获取应用信息 (支持增量)
-        app_info_map = fetch_fnpack_info(repo_url, None, github_token, repo_existing_apps)
+        app_info_map = fetch_fnpack_info(
+            repo_url, None, github_token, repo_existing_apps, prefetched, mirror, app_executor
+        )
         
         if not app_info_map:
             return []
@@ -180,35 +208,8 @@ def process_repo_for_batch(fnpack, existing_apps_map, github_token):
         # 如果返回的是跳过的结果 (复用了 existing_apps 且更新了 star/fork)，结构是一样的
         
         if isinstance(app_info_map, dict):
-             for app_key, single_app_info in app_info_map.items():
-                display_name = single_app_info.get('name', app_key)
-                
-                # 构建应用唯一ID: repo_key + '_' + app_key
-                final_app_id = f"{repo_key}_{app_key}"
-                
-                new_app_detail = {
-                    'id': final_app_id,
-                    'name': display_name,
-                    'repository': repo_url,
-                    'description': single_app_info.get('description', ''),
-                    'version': single_app_info.get('version', '1.0.0'),
-                    'iconUrl': single_app_info.get('iconUrl', ''),
-                    'downloadUrl': single_app_info.get('downloadUrl', ''),
-                    'screenshots': single_app_info.get('screenshots', []),
-                    'author': single_app_info.get('author', ''),
-                    'author_url': single_app_info.get('author_url', ''),
-                    'bug_report_url': single_app_info.get('bug_report_url', ''),
-                    'history': single_app_info.get('history', {}),
-                    'stars': single_app_info.get('stars', 0),
-                    'forks': single_app_info.get('forks', 0),
-                    'category': single_app_info.get('category', 'uncategorized'),
-                    'lastUpdate': single_app_info.get('lastUpdate', ''),
-                    'fnpack_app_key': app_key,
-                    'fnpack_repo_key': repo_key,
-                    'install_type': single_app_info.get('install_type', ''),
-                    'size': single_app_info.get('size', '')
-                }
-                processed_apps.append(new_app_detail)
+            for app_key, single_app_info in app_info_map.items():
+                processed_apps.append(build_fnpack_app_detail(repo_key, repo_url, app_key, single_app_info))
         
         return processed_apps
         
@@ -216,13 +217,66 @@ def process_repo_for_batch(fnpack, existing_apps_map, github_token):
         print(f"处理仓库 {repo_key} 失败: {str(e)}")
         return []
 
-def batch_update_fnpack_apps(github_token=None):
+# 单个仓库刷新预计消耗的 API 请求数（仓库信息 + fnpack.json 提交 + 内容，变更时每个应用更多）
+ESTIMATED_REQUESTS_PER_REPO = 3
+
+
+def is_budget_short(fnpacks, budget):
+    """剩余配额是否不足以刷新所有仓库"""
+    remaining = budget.get('remaining')
+    return remaining is not None and remaining < len(fnpacks) * ESTIMATED_REQUESTS_PER_REPO
+
+
+def prioritise_fnpacks(fnpacks, existing_apps_map, budget):
+    """
+    根据剩余配额决定 fnpack 仓库的刷新顺序
+    
+    配额足够时保持原顺序；不足时优先刷新尚无应用数据的仓库，
+    其余按仓库 Star 数从高到低排列。
+    
+    参数:
+    - fnpacks: fnpacks.json 中的仓库列表
+    - existing_apps_map: {repo_url: 已存储的应用详情列表}
+    - budget: get_rate_limit_budget() 返回的配额信息
+    """
+    if not is_budget_short(fnpacks, budget):
+        return list(fnpacks)
+    
+    needed = len(fnpacks) * ESTIMATED_REQUESTS_PER_REPO
+    print(f"⚠ 剩余 API 配额 {budget.get('remaining')} 次，预计需要 {needed} 次，按优先级排序刷新")
+    
+    def priority(fnpack):
+        repo_apps = existing_apps_map.get(fnpack.get('repo'))
+        if not repo_apps:
+            return (0, 0)
+        return (1, -max(app.get('stars', 0) for app in repo_apps))
+    
+    return sorted(fnpacks, key=priority)
+
+
+def batch_update_fnpack_apps(github_token=None, engine='thread', resume=False,
+                             resume_window=DEFAULT_RESUME_WINDOW_HOURS, backend='api', max_workers='auto'):
     """
     批量更新所有使用 fnpack.json 格式的应用 (并发版)
+    
+    参数:
+    - github_token: GitHub API token
+    - engine: 抓取引擎，'thread' 为线程池（仓库内请求串行），
+              'async' 为异步引擎（所有子请求并发，受全局并发上限控制）
+    - resume: 是否从断点续跑，跳过本轮运行窗口内已完成的仓库
+    - resume_window: 断点的有效运行窗口（小时）
+    - backend: 仓库文件的读取方式，'api' 为 GitHub REST/GraphQL API，
+               'git' 为本地 Git 镜像（fnpack.json、图标、安装包和预览图均不消耗 API 配额）
+    - max_workers: 线程池引擎的工作线程数，'auto' 表示根据请求延迟和剩余配额自动调整；
+                   异步引擎下为全局并发请求上限（'auto' 时使用默认值）
     """
     if not github_token:
         github_token = os.environ.get('GITHUB_TOKEN')
     
+    if backend == 'git' and engine == 'async':
+        print("Git 镜像后端使用线程池引擎")
+        engine = 'thread'
+    
     try:
         from utils.data_store import FnpacksStore, FnpackDetailsStore
         
@@ -234,63 +288,131 @@ def batch_update_fnpack_apps(github_token=None):
             return False
             
         details_store = FnpackDetailsStore()
-        # 加载所有现有应用，用于增量更新
-        all_existing_data = details_store.load()
-        existing_apps_list = all_existing_data.get('apps', [])
+        # 断点记录已完成的仓库，续跑时跳过（其结果由预写日志恢复）
+        checkpoint = BatchCheckpoint('batch_fnpacks', resume_window)
+        resumed_count = checkpoint.start(resume)
         
-        # 按仓库URL分组现有应用，以便传递给 worker
-        existing_apps_map = {}
-        for app in existing_apps_list:
-            repo_url = app.get('repository')
-            if repo_url:
-                if repo_url not in existing_apps_map:
-                    existing_apps_map[repo_url] = []
-                existing_apps_map[repo_url].append(app)
+        # 批量模式下详情文件只加载一次，结束时统一写回；
+        # 每个仓库的结果先写入预写日志，续跑本轮运行窗口时重放
+        with details_store.batch(journal=True, replay=checkpoint.resumed):
+            # 加载所有现有应用，用于增量更新
+            all_existing_data = details_store.load()
+            existing_apps_list = all_existing_data.get('apps', [])
+            
+            # 按仓库URL分组现有应用，以便传递给 worker
+            existing_apps_map = {}
+            for app in existing_apps_list:
+                repo_url = app.get('repository')
+                if repo_url:
+                    if repo_url not in existing_apps_map:
+                        existing_apps_map[repo_url] = []
+                    existing_apps_map[repo_url].append(app)
+            
+            resumed_fnpacks = []
+            if resumed_count:
+                resumed_fnpacks = [fnpack for fnpack in fnpacks if checkpoint.is_done(fnpack.get('repo'))]
+                fnpacks = [fnpack for fnpack in fnpacks if not checkpoint.is_done(fnpack.get('repo'))]
+                print(f"从断点续跑：跳过本轮已完成的 {len(resumed_fnpacks)} 个仓库")
+            
+            def record_result(fnpack, repo_apps):
+                """单个仓库完成时写入预写日志并记录断点"""
+                if repo_apps:
+                    details_store.append_journal(repo_apps)
+                    checkpoint.mark_done(fnpack.get('repo'))
 
-        print(f"开始批量更新 {len(fnpacks)} 个fnpack仓库 (并发)...")
-        
-        all_new_apps = []
-        valid_app_ids = set()
-        repo_success_count = 0
-        repo_fail_count = 0
-        
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            future_to_fnpack = {
-                executor.submit(process_repo_for_batch, fnpack, existing_apps_map, github_token): fnpack 
-                for fnpack in fnpacks
+            # 配额不足时优先刷新重要的仓库
+            budget = get_rate_limit_budget(github_token, refresh=True)
+            budget_short = is_budget_short(fnpacks, budget)
+            fnpacks = prioritise_fnpacks(fnpacks, existing_apps_map, budget)
+            
+            # 先用 GraphQL 批量获取所有仓库的基础数据，获取失败的仓库回退到 REST；
+            # Git 镜像后端只需要仓库信息，fnpack.json 的提交时间和内容从镜像读取
+            use_git = backend == 'git'
+            prefetched_map = fetch_repos_batch(
+                [parse_github_url(fnpack.get('repo')) for fnpack in fnpacks if fnpack.get('repo')],
+                github_token,
+                history_path=None if use_git else 'fnpack.json',
+                files=[] if use_git else ['fnpack.json']
+            )
+            
+            print(f"开始批量更新 {len(fnpacks)} 个fnpack仓库 (并发, 引擎: {engine}, 后端: {backend})...")
+            started_at = time.time()
+            
+            all_new_apps = []
+            # 续跑时跳过的仓库保留现有应用，不参与清理
+            valid_app_ids = {
+                app.get('id')
+                for fnpack in resumed_fnpacks
+                for app in existing_apps_map.get(fnpack.get('repo'), [])
             }
+            repo_success_count = 0
+            repo_fail_count = 0
+            
+            if engine == 'async':
+                # 异步引擎：所有仓库、应用及其子请求并发执行
+                from async_crawler import crawl_fnpacks, DEFAULT_CONCURRENCY
+                results = crawl_fnpacks(
+                    fnpacks, existing_apps_map, github_token, prefetched_map,
+                    concurrency=DEFAULT_CONCURRENCY if max_workers == 'auto' else max_workers,
+                    on_result=record_result
+                )
+            else:
+                # 仓库和仓库内的应用共用同一个调度器：应用作为子任务提交，空闲线程可以窃取，
+                # 单个大仓库不会拖慢整批更新；连接池大小与线程数上限一致以复用 keep-alive 连接
+                scheduler = WorkScheduler(max_workers, github_token)
+                configure_connection_pool(scheduler.max_workers)
+                # 配额充足时应用多的仓库先开始，配额不足时保持按优先级排好的顺序
+                weight = None if budget_short else (
+                    lambda fnpack: len(existing_apps_map.get(fnpack.get('repo'), []))
+                )
+                with scheduler:
+                    # 结果按仓库列表的顺序排列，新应用写入详情文件的顺序不受完成先后影响
+                    results = scheduler.run(
+                        lambda fnpack: process_repo_for_batch(
+                            fnpack, existing_apps_map, github_token,
+                            prefetched_map.get(parse_github_url(fnpack.get('repo'))), backend, scheduler
+                        ),
+                        fnpacks,
+                        weight=weight,
+                        on_result=record_result
+                    )
+                print(scheduler.summary())
+            checkpoint.flush()
             
-            for future in as_completed(future_to_fnpack):
-                fnpack = future_to_fnpack[future]
+            for fnpack, repo_apps in results:
                 repo_key = fnpack.get('key')
-                
-                try:
-                    repo_apps = future.result()
-                    if repo_apps:
-                        repo_success_count += 1
-                        all_new_apps.extend(repo_apps)
-                        for app in repo_apps:
-                            valid_app_ids.add(app['id'])
-                        print(f"✓ 成功更新: {repo_key} ({len(repo_apps)} 个应用)")
-                    else:
-                        # 可能是空仓库或失败
-                        # 如果没有返回数据，就不计入成功，但也不一定是严重错误
-                        print(f"⚠ 仓库 {repo_key} 未返回应用数据或更新失败")
-                        
-                except Exception as exc:
+                if isinstance(repo_apps, Exception):
                     repo_fail_count += 1
-                    print(f"✗ 更新仓库 {repo_key} 发生异常: {exc}")
+                    print(f"✗ 更新仓库 {repo_key} 发生异常: {repo_apps}")
+                elif repo_apps:
+                    repo_success_count += 1
+                    all_new_apps.extend(repo_apps)
+                    for app in repo_apps:
+                        valid_app_ids.add(app['id'])
+                    print(f"✓ 成功更新: {repo_key} ({len(repo_apps)} 个应用)")
+                else:
+                    # 可能是空仓库或失败
+                    # 如果没有返回数据，就不计入成功，但也不一定是严重错误
+                    print(f"⚠ 仓库 {repo_key} 未返回应用数据或更新失败")
 
-        # 批量保存
-        if all_new_apps:
-            print(f"正在保存 {len(all_new_apps)} 个应用的数据...")
-            details_store.upsert_apps_batch(all_new_apps)
-        
-        # 清理已删除的应用
-        cleaned_count = _cleanup_deleted_fnpack_apps(valid_app_ids)
+            # 批量保存
+            if all_new_apps:
+                print(f"正在保存 {len(all_new_apps)} 个应用的数据...")
+                details_store.upsert_apps_batch(all_new_apps)
+            
+            # 清理已删除的应用
+            cleaned_count = _cleanup_deleted_fnpack_apps(valid_app_ids, details_store)
         
-        print(f"\n批量更新完成!")
+        # 详情已写回，之后的 --resume 不再续用本轮断点
+        checkpoint.finish()
+        print(f"\n批量更新完成! 耗时 {time.time() - started_at:.1f} 秒")
         print(f"成功获取应用总数: {len(all_new_apps)}")
+        cache = get_response_cache()
+        print(f"条件请求缓存: 命中 {cache.hits} 次，未命中 {cache.misses} 次")
+        removed, freed = cache.prune()
+        if removed:
+            print(f"清理过期缓存: {removed} 个条目，{freed / 1024:.1f} KiB")
+        print(get_request_coalescer().summary())
         if cleaned_count > 0:
             print(f"清理删除: {cleaned_count} 个应用")
             
@@ -301,13 +423,33 @@ def batch_update_fnpack_apps(github_token=None):
         return False
 
 
-def _cleanup_deleted_fnpack_apps(valid_app_ids):
+def refresh_fnpack_stats(github_token=None):
+    """
+    只刷新所有 fnpack 应用的 Star/Fork 数（batch-update --stats-only）
+    不重新读取 fnpack.json，供比完整更新更频繁的定时任务使用
+    """
+    if not github_token:
+        github_token = os.environ.get('GITHUB_TOKEN')
+    
+    from utils.data_store import FnpackDetailsStore
+    started_at = time.time()
+    changed_count, repo_count = refresh_store_stats(FnpackDetailsStore(), github_token)
+    print(f"Star/Fork 刷新完成: 查询 {repo_count} 个仓库，{changed_count} 个应用有变化，"
+          f"耗时 {time.time() - started_at:.1f} 秒")
+
+
+def _cleanup_deleted_fnpack_apps(valid_app_ids, store=None):
     """
     清理已从 fnpacks.json 或仓库 fnpack.json 中移除的应用
+    
+    参数:
+    - valid_app_ids: 仍然有效的应用ID集合
+    - store: 复用的 FnpackDetailsStore（批量模式下共享内存快照）
     """
     try:
-        from utils.data_store import FnpackDetailsStore
-        store = FnpackDetailsStore()
+        if store is None:
+            from utils.data_store import FnpackDetailsStore
+            store = FnpackDetailsStore()
         
         # 获取当前存储的数据
         fnpack_details_data = store.load()
@@ -405,6 +547,19 @@ def main():
     
     # 批量更新命令
     batch_parser = subparsers.add_parser('batch-update', help='批量更新所有应用，尝试使用fnpack.json')
+    batch_parser.add_argument('--engine', choices=['thread', 'async'], default='thread',
+                              help='抓取引擎：thread 为线程池，async 为异步并发引擎')
+    batch_parser.add_argument('--resume', action='store_true',
+                              help='从断点续跑，跳过本轮运行窗口内已完成的仓库')
+    batch_parser.add_argument('--resume-window', type=float, default=DEFAULT_RESUME_WINDOW_HOURS,
+                              help=f'断点有效的运行窗口（小时，默认 {DEFAULT_RESUME_WINDOW_HOURS}）')
+    batch_parser.add_argument('--backend', choices=['api', 'git'], default='api',
+                              help='仓库文件读取方式：api 为 GitHub API，git 为本地 Git 镜像'
+                                   '（镜像源可通过 FSTORE_GIT_BASE_URL 指定）')
+    batch_parser.add_argument('--max-workers', type=parse_max_workers, default='auto',
+                              help='并发线程数，auto（默认）根据请求延迟和剩余 API 配额自动调整')
+    batch_parser.add_argument('--stats-only', action='store_true',
+                              help='只刷新 Star/Fork 数（GraphQL 批量查询），不重新读取 fnpack.json')
     
     # 预览fnpack应用命令
     preview_parser = subparsers.add_parser('preview', help='预览从fnpack.json获取的应用信息')
@@ -422,8 +577,14 @@ def main():
             update_fnpack_app(repo_url=args.target, app_key=args.app_key, github_token=args.token)
         else:
             update_fnpack_app(app_id=args.target, app_key=args.app_key, github_token=args.token)
+    elif args.command == 'batch-update' and args.stats_only:
+        refresh_fnpack_stats(args.token)
     elif args.command == 'batch-update':
-        batch_update_fnpack_apps(github_token=args.token)
+        batch_update_fnpack_apps(
+            github_token=args.token, engine=args.engine,
+            resume=args.resume, resume_window=args.resume_window,
+            backend=args.backend, max_workers=args.max_workers
+        )
     elif args.command == 'preview':
         preview_fnpack_app(args.repo, args.app_key, args.token)
 
@@ -14,7 +14,7 @@ import re
 # 添加项目根目录到 Python 路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from utils import GitHubAPI, FnpacksStore, parse_github_url, get_fnpacks_json_path
+from utils import GitHubAPI, FnpacksStore, parse_github_url, get_fnpacks_json_path, DataStore
 from utils.validators import validate_content
 from fetch_fnpack_info import fetch_fnpack_info, update_apps_from_fnpack
 
@@ -55,8 +55,8 @@ def update_fnpacks_json(owner, repo_url):
             fnpacks_data['fnpacks'].append(fnpack_info)
             print(f"添加新仓库到fnpacks.json: {repo_url}")
         
-        with open(fnpacks_json_path, 'w', encoding='utf-8') as f:
-            json.dump(fnpacks_data, f, ensure_ascii=False, indent=2)
+        if not DataStore.save_json(fnpacks_json_path, fnpacks_data):
+            raise IOError(f"无法写入 {fnpacks_json_path}")
         print('fnpacks.json文件已更新')
         return True
         
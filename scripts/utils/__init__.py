@@ -9,13 +9,24 @@
     from utils.data_store import AppsStore, AppDetailsStore
 """
 
-from .github_api import GitHubAPI, fetch_github_api
+from .github_api import (
+    GitHubAPI,
+    ReleaseResolver,
+    create_release_resolver,
+    fetch_github_api,
+    fetch_github_raw,
+    configure_connection_pool,
+    get_response_cache,
+    get_request_coalescer,
+    get_rate_limit_budget
+)
 from .validators import (
     validate_app_info,
     validate_app_key,
     validate_github_url,
     parse_github_url,
-    validate_version
+    validate_version,
+    audit_catalogue
 )
 from .classifier import auto_classify_app, get_all_categories, get_category_display_name
 from .config import (
@@ -26,6 +37,7 @@ from .config import (
     get_fnpacks_json_path,
     get_app_details_path,
     get_fnpack_details_path,
+    get_cache_dir,
     ensure_data_dir
 )
 from .data_store import (
@@ -39,13 +51,21 @@ from .data_store import (
 __all__ = [
     # GitHub API
     'GitHubAPI',
+    'ReleaseResolver',
+    'create_release_resolver',
     'fetch_github_api',
+    'fetch_github_raw',
+    'configure_connection_pool',
+    'get_response_cache',
+    'get_request_coalescer',
+    'get_rate_limit_budget',
     # 验证器
     'validate_app_info',
     'validate_app_key',
     'validate_github_url',
     'parse_github_url',
     'validate_version',
+    'audit_catalogue',
     # 分类器
     'auto_classify_app',
     'get_all_categories',
@@ -58,6 +78,7 @@ __all__ = [
     'get_fnpacks_json_path',
     'get_app_details_path',
     'get_fnpack_details_path',
+    'get_cache_dir',
     'ensure_data_dir',
     # 数据存储
     'DataStore',
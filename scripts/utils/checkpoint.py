@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+批量更新断点模块
+记录一次批量更新中已完成的条目，任务中断后可通过 --resume 跳过这些条目
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+from .config import get_data_path, ensure_data_dir
+from .data_store import DataStore
+
+
+# 默认的运行窗口（小时）：窗口内开始的断点才会被续用
+DEFAULT_RESUME_WINDOW_HOURS = 12
+
+# 每完成多少个条目或间隔多少秒写一次断点文件
+FLUSH_EVERY = 10
+FLUSH_INTERVAL = 30
+
+
+class BatchCheckpoint:
+    """
+    批量更新断点文件（data/<name>.checkpoint.json）
+
+    文件内容:
+    {
+        "started": 本轮运行窗口的开始时间,
+        "finished": 整批完成的时间（未完成时没有该字段）,
+        "done": {条目 key: 完成时间}
+    }
+
+    已完成条目的数据本身由详情存储的预写日志保存，这里只记录哪些条目无需重新获取。
+    整批完成后标记为 finished，之后的 --resume 不会再续用这个运行窗口。
+    """
+
+    def __init__(self, name, window_hours=DEFAULT_RESUME_WINDOW_HOURS):
+        ensure_data_dir()
+        self.file_path = get_data_path(f'{name}.checkpoint.json')
+        self.window = timedelta(hours=window_hours)
+        self.started = None
+        self.done = {}
+        # start() 是否续用了上次的运行窗口
+        self.resumed = False
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._last_flush = time.time()
+
+    def start(self, resume=False):
+        """
+        开始一轮批量更新
+
+        参数:
+        - resume: 是否续用上次的断点。只有上次运行窗口仍在有效期内时才会续用，
+                  否则开始新的运行窗口
+
+        返回:
+        - int: 续用的已完成条目数量
+        """
+        now = datetime.utcnow()
+        if resume:
+            data = DataStore.load_json(self.file_path, {})
+            try:
+                started = datetime.fromisoformat(data.get('started', '').rstrip('Z'))
+            except ValueError:
+                started = None
+
+            if data.get('finished'):
+                print("上次批量更新已全部完成，开始新的运行窗口")
+            elif started and now - started <= self.window:
+                self.started = started
+                self.done = dict(data.get('done', {}))
+                self.resumed = True
+                return len(self.done)
+            elif started:
+                print(f"断点文件已超出 {self.window.total_seconds() / 3600:g} 小时的运行窗口，重新开始")
+
+        self.started = now
+        self.done = {}
+        self.resumed = False
+        self.flush()
+        return 0
+
+    def is_done(self, key):
+        """条目是否已在本轮运行窗口内完成"""
+        return key in self.done
+
+    def mark_done(self, key):
+        """记录条目已完成，按数量或时间间隔定期写入断点文件"""
+        with self._lock:
+            self.done[key] = datetime.utcnow().isoformat() + 'Z'
+            self._pending += 1
+            due = (self._pending >= FLUSH_EVERY or
+                   time.time() - self._last_flush >= FLUSH_INTERVAL)
+        if due:
+            self.flush()
+
+    def flush(self, finished=False):
+        """
+        写入断点文件
+
+        参数:
+        - finished: 是否标记整批已完成（详情已写回后调用），之后不再续用本轮运行窗口
+        """
+        with self._lock:
+            data = {
+                'started': self.started.isoformat() + 'Z',
+                'done': dict(self.done)
+            }
+            if finished:
+                data['finished'] = datetime.utcnow().isoformat() + 'Z'
+            self._pending = 0
+            self._last_flush = time.time()
+            return DataStore.save_json(self.file_path, data)
+
+    def finish(self):
+        """标记整批已完成"""
+        return self.flush(finished=True)
@@ -52,6 +52,74 @@ CATEGORY_KEYWORDS = {
 
 import re
 
+from .text_match import AhoCorasick
+
+
+def _build_classifier():
+    """
+    根据 CATEGORY_KEYWORDS 预编译分类引擎（模块导入时执行一次）
+    
+    - 纯英文关键词合并为一个带单词边界的正则，避免 "net" 匹配 "planet"
+    - 中文等非英文关键词放入 Aho-Corasick 自动机做子串匹配
+    
+    返回:
+    - (分类顺序, {关键词: [分类下标]}, 英文正则, [(关键词, 单独正则)], 中文自动机)
+    """
+    categories = list(CATEGORY_KEYWORDS.keys())
+    keyword_categories = {}
+    english_words = []
+    english_fallback = []
+    other_keywords = []
+    
+    for index, keywords in enumerate(CATEGORY_KEYWORDS.values()):
+        for keyword in keywords:
+            if keyword not in keyword_categories:
+                keyword_categories[keyword] = []
+                if all(ord(c) < 128 for c in keyword):
+                    # 只含单词字符的关键词命中时必然是一个完整单词，可以合并进一个正则；
+                    # 含其他字符的关键词保留单独的全词匹配正则
+                    if re.fullmatch(r'\w+', keyword):
+                        english_words.append(keyword)
+                    else:
+                        english_fallback.append(
+                            (keyword, re.compile(r'\b' + re.escape(keyword) + r'\b'))
+                        )
+                else:
+                    other_keywords.append(keyword)
+            # 同一关键词出现在多个分类（或重复出现）时每次都计分
+            keyword_categories[keyword].append(index)
+    
+    english_pattern = None
+    if english_words:
+        alternation = '|'.join(re.escape(word) for word in sorted(english_words, key=len, reverse=True))
+        english_pattern = re.compile(r'\b(?:' + alternation + r')\b')
+    
+    return categories, keyword_categories, english_pattern, english_fallback, AhoCorasick(other_keywords)
+
+
+# 预编译的分类引擎（修改 CATEGORY_KEYWORDS 后需重新导入模块）
+(
+    _CATEGORIES,
+    _KEYWORD_CATEGORIES,
+    _ENGLISH_PATTERN,
+    _ENGLISH_FALLBACK,
+    _CJK_MATCHER
+) = _build_classifier()
+
+
+def _matched_keywords(text):
+    """返回文本中命中的所有关键词（每个关键词只计一次）"""
+    if not text:
+        return set()
+    
+    matched = set(_ENGLISH_PATTERN.findall(text)) if _ENGLISH_PATTERN else set()
+    for keyword, pattern in _ENGLISH_FALLBACK:
+        if pattern.search(text):
+            matched.add(keyword)
+    matched.update(_CJK_MATCHER.find_all(text))
+    return matched
+
+
 def auto_classify_app(name, description=''):
     """
     智能分类函数 - 根据应用名称和描述自动确定分类
@@ -66,40 +134,17 @@ def auto_classify_app(name, description=''):
     if not name:
         return 'uncategorized'
     
-    # 预处理文本
-    name_lower = name.lower()
-    desc_lower = (description or '').lower()
+    # 计算每个分类的匹配分数：标题命中权重 x3，描述命中权重 x1
+    scores = [0] * len(_CATEGORIES)
+    for text, weight in ((name.lower(), 3), ((description or '').lower(), 1)):
+        for keyword in _matched_keywords(text):
+            for index in _KEYWORD_CATEGORIES[keyword]:
+                scores[index] += weight
     
-    # 计算每个分类的匹配分数
+    # 分数相同时取 CATEGORY_KEYWORDS 中靠前的分类
     best_category = 'uncategorized'
     highest_score = 0
-    
-    for category, keywords in CATEGORY_KEYWORDS.items():
-        score = 0
-        for keyword in keywords:
-            # 判断关键词是否为纯英文（用于区分匹配模式）
-            is_english = all(ord(c) < 128 for c in keyword)
-            
-            # 定义匹配加分函数
-            def check_match(text, weight):
-                if not text: return 0
-                count = 0
-                if is_english:
-                    # 英文使用正则全词匹配，避免 "net" 匹配 "planet"
-                    # \b 是单词边界
-                    if re.search(r'\b' + re.escape(keyword) + r'\b', text):
-                        count += weight
-                else:
-                    # 中文使用子串匹配
-                    if keyword in text:
-                        count += weight
-                return count
-
-            # 标题权重 x3
-            score += check_match(name_lower, 3)
-            # 描述权重 x1
-            score += check_match(desc_lower, 1)
-        
+    for category, score in zip(_CATEGORIES, scores):
         if score > highest_score:
             highest_score = score
             best_category = category
@@ -38,6 +38,13 @@ def get_fnpack_details_path():
     """获取fnpack_details.json文件路径"""
     return get_data_path('fnpack_details.json')
 
+def get_cache_dir(name=''):
+    """获取本地缓存目录（.cache，不纳入版本控制），可选择性拼接子目录名"""
+    cache_dir = os.environ.get('FSTORE_CACHE_DIR') or os.path.join(get_project_root(), '.cache')
+    if name:
+        return os.path.join(cache_dir, name)
+    return cache_dir
+
 def ensure_data_dir():
     """确保data目录存在"""
     data_dir = get_data_path()
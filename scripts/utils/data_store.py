@@ -9,7 +9,11 @@
 import json
 import os
 import hashlib
+import tempfile
+import threading
+from contextlib import contextmanager
 from datetime import datetime
+from json.encoder import encode_basestring
 from .config import (
     get_apps_json_path,
     get_fnpacks_json_path,
@@ -53,6 +57,9 @@ class DataStore:
         """
         保存数据到 JSON 文件
         
+        先写入同目录下的临时文件并 fsync，再原子替换目标文件，
+        进程中途被终止时目标文件要么是旧内容，要么是完整的新内容。
+        
         参数:
         - file_path: 文件路径
         - data: 要保存的数据
@@ -61,16 +68,177 @@ class DataStore:
         返回:
         - bool: 是否成功
         """
+        def write(f):
+            f.write(json.dumps(data, ensure_ascii=False, indent=indent).encode('utf-8'))
+            return True
+        
+        return DataStore._atomic_write(file_path, write)
+    
+    @staticmethod
+    def save_json_stream(file_path, data, stream_key, on_item=None, commit=None, indent=2, on_chunk=None):
+        """
+        逐条写入 data[stream_key] 列表中的元素，不在内存中拼出整个文档
+        
+        输出与 save_json 完全相同。每个元素序列化后的字节同时交给 on_item，
+        调用方因此不必为计算哈希再序列化一遍。
+        
+        参数:
+        - file_path: 文件路径
+        - data: 要保存的数据（dict）
+        - stream_key: 需要逐条写入的列表字段名
+        - on_item: 每个元素写入时的回调 on_item(元素, 字节)（可选）
+        - commit: 写完后、替换目标文件前的回调 commit()（可选），
+                  返回 False 时放弃写入，目标文件保持不变
+        - indent: 缩进空格数
+        - on_chunk: 每段字节写入时的回调 on_chunk(字节)（可选），依次拼接即为整个文件内容
+        
+        返回:
+        - bool: 是否成功（commit 放弃写入也视为成功）
+        """
+        def write(f):
+            for chunk, item in DataStore._iter_json_chunks(data, stream_key, indent):
+                f.write(chunk)
+                if on_chunk is not None:
+                    on_chunk(chunk)
+                if on_item is not None and item is not DataStore._NO_ITEM:
+                    on_item(item, chunk)
+            return commit is None or commit() is not False
+        
+        return DataStore._atomic_write(file_path, write)
+    
+    # _iter_json_chunks 中不属于列表元素的片段
+    _NO_ITEM = object()
+    
+    @staticmethod
+    def _iter_json_chunks(data, stream_key, indent):
+        """
+        按 json.dump(indent=indent, ensure_ascii=False) 的格式逐段生成 UTF-8 字节
+        
+        返回:
+        - 生成器，元素为 (字节, 对应的 stream_key 列表元素)，
+          分隔符等其他片段对应 DataStore._NO_ITEM
+        """
+        no_item = DataStore._NO_ITEM
+        if not data:
+            yield b'{}', no_item
+            return
+        
+        pad = ' ' * indent
+        yield b'{', no_item
+        for i, (key, value) in enumerate(data.items()):
+            prefix = ',' if i else ''
+            yield f'{prefix}\n{pad}{json.dumps(key, ensure_ascii=False)}: '.encode('utf-8'), no_item
+            if key != stream_key or not isinstance(value, list):
+                yield DataStore._dumps_indented(value, indent, 1).encode('utf-8'), no_item
+            elif not value:
+                yield b'[]', no_item
+            else:
+                separator = f'\n{pad * 2}'.encode('utf-8')
+                yield b'[' + separator, no_item
+                for j, item in enumerate(value):
+                    if j:
+                        yield b',' + separator, no_item
+                    yield DataStore._dumps_indented(item, indent, 2).encode('utf-8'), item
+                yield f'\n{pad}]'.encode('utf-8'), no_item
+        yield b'\n}', no_item
+    
+    @staticmethod
+    def _dumps_indented(value, indent, level):
+        """
+        序列化单个值，格式与 json.dumps(indent=indent, ensure_ascii=False) 嵌套在第 level 层时相同
+        
+        带缩进的 json.dumps 只能使用纯 Python 编码器，这里对字符串等标量直接调用
+        json 的 C 实现，只用 Python 处理缩进结构
+        """
+        if isinstance(value, str):
+            return encode_basestring(value)
+        if value is None:
+            return 'null'
+        if value is True:
+            return 'true'
+        if value is False:
+            return 'false'
+        if type(value) is int:
+            return int.__repr__(value)
+        
+        inner = '\n' + ' ' * (indent * (level + 1))
+        close = '\n' + ' ' * (indent * level)
+        if type(value) is dict and all(type(key) is str for key in value):
+            if not value:
+                return '{}'
+            return '{' + inner + (',' + inner).join(
+                encode_basestring(key) + ': ' + DataStore._dumps_indented(item, indent, level + 1)
+                for key, item in value.items()
+            ) + close + '}'
+        if type(value) is list:
+            if not value:
+                return '[]'
+            return '[' + inner + (',' + inner).join(
+                DataStore._dumps_indented(item, indent, level + 1) for item in value
+            ) + close + ']'
+        
+        # 浮点数、非字符串键等少见情况交给 json 处理（字符串中的换行都已转义，原文换行只来自缩进）
+        text = json.dumps(value, ensure_ascii=False, indent=indent)
+        return text.replace('\n', '\n' + ' ' * (indent * level))
+    
+    @staticmethod
+    def _atomic_write(file_path, write):
+        """
+        通过同目录临时文件原子写入目标文件
+        
+        参数:
+        - file_path: 文件路径
+        - write: 写入函数 write(二进制文件对象)，返回 False 时放弃写入
+        
+        返回:
+        - bool: 是否成功
+        """
+        tmp_path = None
         try:
             # 确保目录存在
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            dir_path = os.path.dirname(file_path) or '.'
+            os.makedirs(dir_path, exist_ok=True)
+            
+            fd, tmp_path = tempfile.mkstemp(
+                dir=dir_path, prefix=f'.{os.path.basename(file_path)}.', suffix='.tmp'
+            )
+            with os.fdopen(fd, 'wb') as f:
+                if not write(f):
+                    return True
+                f.flush()
+                os.fsync(f.fileno())
             
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=indent)
+            # mkstemp 创建的文件权限为 0600，保持与原文件一致
+            try:
+                mode = os.stat(file_path).st_mode & 0o777
+            except FileNotFoundError:
+                mode = 0o644
+            os.chmod(tmp_path, mode)
+            
+            os.replace(tmp_path, file_path)
+            tmp_path = None
+            DataStore._fsync_dir(dir_path)
             return True
         except Exception as e:
             print(f"保存文件错误 ({file_path}): {str(e)}")
             return False
+        finally:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    @staticmethod
+    def _fsync_dir(dir_path):
+        """同步目录项，确保 rename 结果落盘（不支持的平台上忽略）"""
+        try:
+            fd = os.open(dir_path, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
 
 
 class AppsStore:
@@ -287,51 +455,351 @@ class FnpacksStore:
         return False
 
 
-class AppDetailsStore:
-    """app_details.json 数据操作类"""
+class DetailsStore:
+    """
+    详情数据文件（app_details.json / fnpack_details.json）的公共操作类
+    
+    默认每次操作都读写文件。批量任务应在 batch() 中执行：期间只加载一次文件，
+    在内存中按 id 建立索引，多线程共享同一份快照，退出时统一写回一次。
+    批量模式可启用预写日志，任务中途崩溃时已获取的结果可在下次续跑（--resume）时恢复。
+    """
+    
+    # 子类指定数据文件名及其在 version.json 中的键名
+    file_name = ''
+    version_key = ''
     
     def __init__(self):
         ensure_data_dir()
-        self.file_path = get_data_path('app_details.json')
+        self.file_path = get_data_path(self.file_name)
         self.version_file_path = get_data_path('version.json')
+        self._lock = threading.RLock()
+        self._snapshot = None
+        self._index = None
+        self._batch_depth = 0
+        self._dirty = False
+        self._changed_ids = None
+        self._journal = False
+    
+    @staticmethod
+    def _build_index(apps):
+        """按 id 建立应用在列表中的位置索引"""
+        return {app.get('id'): i for i, app in enumerate(apps) if app.get('id')}
+    
+    @staticmethod
+    def _merge_apps(apps, apps_list, index, changed_ids=None):
+        """
+        将 apps_list 合并到 apps 中（存在则替换，否则追加），同时维护索引
+        
+        参数:
+        - changed_ids: 记录被合并应用 id 的集合（可选）
+        
+        返回:
+        - int: 合并的应用数量
+        """
+        count = 0
+        for app_detail in apps_list:
+            app_id = app_detail.get('id')
+            if not app_id:
+                continue
+            if changed_ids is not None:
+                changed_ids.add(app_id)
+            
+            if app_id in index:
+                apps[index[app_id]] = app_detail
+            else:
+                apps.append(app_detail)
+                index[app_id] = len(apps) - 1
+            count += 1
+        return count
+    
+    @contextmanager
+    def batch(self, journal=False, replay=False):
+        """
+        批量模式：一次加载、内存索引、结束时一次写回
+        
+        可嵌套使用，只有最外层退出时才写回文件；期间的读写操作线程安全。
+        
+        参数:
+        - journal: 是否启用预写日志，写回成功后清空日志（期间的结果通过 append_journal 记录）
+        - replay: 启用日志时是否先重放上次未完成的日志（只在续跑上次的运行窗口时为 True）；
+                  为 False 时丢弃残留的日志，避免旧日志覆盖之后写入的数据
+        """
+        with self._lock:
+            if self._batch_depth == 0:
+                data = self.load()
+                data.setdefault('apps', [])
+                self._snapshot = data
+                self._index = self._build_index(data['apps'])
+                self._dirty = False
+                self._changed_ids = set()
+                self._journal = journal
+                if journal and not replay:
+                    self.clear_journal()
+                elif journal:
+                    pending = self.read_journal()
+                    if pending:
+                        self._merge_apps(data['apps'], pending, self._index, self._changed_ids)
+                        self._dirty = True
+                        print(f"从日志恢复 {len(pending)} 条未保存的应用详情")
+            self._batch_depth += 1
+        
+        completed = False
+        try:
+            yield self
+            completed = True
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    if self._journal and not completed:
+                        # 异常退出时把已记入日志的结果一并保存
+                        pending = self.read_journal()
+                        if pending:
+                            self._merge_apps(self._snapshot['apps'], pending, self._index, self._changed_ids)
+                            self._dirty = True
+                    data, dirty, changed_ids = self._snapshot, self._dirty, self._changed_ids
+                    self._snapshot = None
+                    self._index = None
+                    self._changed_ids = None
+                    saved = self.save(data, changed_ids) if dirty else True
+                    if self._journal and saved and completed:
+                        self.clear_journal()
+                    self._journal = False
+    
+    @property
+    def journal_path(self):
+        """预写日志文件路径（每行一条待写入的应用详情）"""
+        return self.file_path + '.journal'
+    
+    def append_journal(self, apps_list):
+        """
+        追加应用详情到预写日志并立即落盘
+        
+        批量任务在每个结果产生时调用，进程崩溃后下次 batch(journal=True, replay=True) 会重放这些记录。
+        未启用日志的批量模式或非批量模式下不做任何事。
+        """
+        with self._lock:
+            if self._snapshot is None or not self._journal:
+                return
+            lines = ''.join(
+                json.dumps(app_detail, ensure_ascii=False) + '\n'
+                for app_detail in apps_list if app_detail.get('id')
+            )
+            if not lines:
+                return
+            try:
+                with open(self.journal_path, 'a', encoding='utf-8') as f:
+                    f.write(lines)
+                    f.flush()
+                    os.fsync(f.fileno())
+            except OSError as e:
+                print(f"写入日志失败 ({self.journal_path}): {str(e)}")
+    
+    def read_journal(self):
+        """
+        读取预写日志中的应用详情（同一应用保留最后一条，忽略写了一半的末行）
+        
+        返回:
+        - list: 应用详情列表
+        """
+        records = {}
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        app_detail = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if isinstance(app_detail, dict) and app_detail.get('id'):
+                        records[app_detail['id']] = app_detail
+        except FileNotFoundError:
+            return []
+        except OSError as e:
+            print(f"读取日志失败 ({self.journal_path}): {str(e)}")
+            return []
+        return list(records.values())
+    
+    def clear_journal(self):
+        """删除预写日志"""
+        try:
+            os.remove(self.journal_path)
+        except FileNotFoundError:
+            pass
     
     def load(self):
-        """加载应用详情"""
+        """
+        加载详情数据（批量模式下返回内存快照的副本）
+        
+        批量模式下每个应用也是副本：调用方修改返回的数据不会绕过 upsert 直接改动快照
+        （否则变化不会计入 changed_ids，保存时会沿用过期的摘要）
+        """
+        with self._lock:
+            if self._snapshot is not None:
+                data = dict(self._snapshot)
+                data['apps'] = [dict(app) for app in self._snapshot['apps']]
+                return data
+        
         return DataStore.load_json(self.file_path, {
             'apps': [],
             'lastUpdated': ''
         })
     
+    @staticmethod
+    def _app_digest(app_bytes):
+        """计算单个应用的摘要（对其在文件中序列化后的字节取 MD5）"""
+        return hashlib.md5(app_bytes).hexdigest()[:8]
+    
+    @staticmethod
+    def _combine_digests(digests):
+        """
+        由各应用的摘要组合出整体哈希（对按顺序排列的 "id:摘要" 行取 MD5，
+        应用顺序或任意一个摘要变化都会改变哈希，只需处理每个应用 8 个字符的摘要）
+        
+        参数:
+        - digests: [(应用 id, 摘要)]
+        """
+        content = '\n'.join(f'{app_id}:{digest}' for app_id, digest in digests)
+        return hashlib.md5(content.encode('utf-8')).hexdigest()[:8]
+    
+    def _file_digest(self):
+        """计算数据文件当前内容的 MD5（文件不存在时返回 None）"""
+        md5 = hashlib.md5()
+        try:
+            with open(self.file_path, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    md5.update(block)
+        except OSError:
+            return None
+        return md5.hexdigest()
+    
+    @staticmethod
+    def _digests_reusable(apps, changed_ids, old_digests):
+        """
+        version.json 中记录的摘要能否沿用：未变化的应用必须与记录的应用一一对应
+        （有应用被移除或记录缺失时需要全部重新计算）
+        """
+        if changed_ids is None or old_digests is None:
+            return False
+        unchanged = {app.get('id') for app in apps} - changed_ids
+        return unchanged == set(old_digests) - changed_ids
+    
+    def _get_app_digests(self, apps, changed_ids=None, old_digests=None):
+        """
+        计算所有应用的摘要
+        
+        参数:
+        - apps: 应用详情列表
+        - changed_ids: 有变化的应用 id 集合，其余应用沿用 old_digests 中的摘要；
+                       为 None 时全部重新计算
+        - old_digests: version.json 中记录的 {应用 id: 摘要}，记录中没有的应用重新计算
+        
+        返回:
+        - list: [(应用 id, 摘要)]，顺序与 apps 一致
+        """
+        old_digests = old_digests or {}
+        digests = []
+        for app in apps:
+            app_id = app.get('id')
+            digest = None
+            if changed_ids is not None and app_id and app_id not in changed_ids:
+                digest = old_digests.get(app_id)
+            if digest is None:
+                digest = self._app_digest(DataStore._dumps_indented(app, 2, 2).encode('utf-8'))
+            digests.append((app_id, digest))
+        return digests
+    
     def _get_apps_hash(self, data):
         """计算应用数据的哈希（不包含 lastUpdated）"""
-        apps_only = {'apps': data.get('apps', [])}
-        content = json.dumps(apps_only, sort_keys=True, ensure_ascii=False)
-        return hashlib.md5(content.encode('utf-8')).hexdigest()[:8]
+        return self._combine_digests(self._get_app_digests(data.get('apps', [])))
     
-    def save(self, data):
-        """保存应用详情（只有数据变化时才更新）"""
-        # 计算新数据的哈希
-        new_hash = self._get_apps_hash(data)
+    def save(self, data, changed_ids=None):
+        """
+        保存详情数据（只有数据变化时才更新；批量模式下只更新内存快照）
         
-        # 获取当前版本哈希
-        version_data = DataStore.load_json(self.version_file_path, {})
-        old_hash = version_data.get('app_details', {}).get('hash', '')
-        
-        # 只有哈希变化时才保存
-        if new_hash != old_hash:
-            data['lastUpdated'] = datetime.utcnow().isoformat() + 'Z'
-            result = DataStore.save_json(self.file_path, data)
-            if result:
-                self._update_version_file('app_details', new_hash)
-            return result
-        return True  # 数据未变化，视为成功
-    
-    def _update_version_file(self, source, content_hash):
-        """更新版本文件"""
+        参数:
+        - data: 详情数据
+        - changed_ids: 相对上次保存有变化的应用 id 集合（可选）。提供时其余应用沿用
+                       version.json 中记录的摘要，数据未变化时不需要序列化整个文件
+        
+        返回:
+        - bool: 是否成功
+        """
+        with self._lock:
+            if self._snapshot is not None:
+                data.setdefault('apps', [])
+                self._snapshot = data
+                self._index = self._build_index(data['apps'])
+                self._dirty = True
+                # 整体替换快照且未说明变化范围时，退出批量模式后全部重新计算摘要
+                if changed_ids is None or self._changed_ids is None:
+                    self._changed_ids = None
+                else:
+                    self._changed_ids |= changed_ids
+                return True
+        
+        # 获取当前版本哈希和各应用摘要
         version_data = DataStore.load_json(self.version_file_path, {})
-        version_data[source] = {
+        old_version = version_data.get(self.version_key, {})
+        old_hash = old_version.get('hash', '')
+        old_digests = old_version.get('digests')
+        
+        # 数据文件与 version.json 记录的不一致（被单独修改或还原）时，记录的哈希和摘要都不可信，
+        # 全部重新计算并重写数据文件
+        if not old_version.get('file_md5') or old_version.get('file_md5') != self._file_digest():
+            old_hash, old_digests = '', None
+        
+        apps = data.get('apps', [])
+        digests = None
+        if self._digests_reusable(apps, changed_ids, old_digests):
+            digests = self._get_app_digests(apps, changed_ids, old_digests)
+            if self._combine_digests(digests) == old_hash:
+                return True  # 数据未变化，视为成功
+        
+        # 未知变化范围时，写入临时文件的同时计算各应用摘要，只有哈希变化时才替换数据文件
+        updated_at = datetime.utcnow().isoformat() + 'Z'
+        output = dict(data)
+        output.setdefault('apps', [])
+        output['lastUpdated'] = updated_at
+        written = []
+        file_md5 = hashlib.md5()
+        
+        def on_item(app, app_bytes):
+            written.append((app.get('id'), self._app_digest(app_bytes)))
+        
+        def commit():
+            nonlocal digests
+            if digests is None:
+                digests = written
+            return self._combine_digests(digests) != old_hash
+        
+        result = DataStore.save_json_stream(
+            self.file_path, output, 'apps',
+            on_item=on_item if digests is None else None, commit=commit, on_chunk=file_md5.update
+        )
+        new_hash = self._combine_digests(digests) if digests is not None else old_hash
+        if result and new_hash != old_hash:
+            data['lastUpdated'] = updated_at
+            self._update_version_file(version_data, new_hash, digests, file_md5.hexdigest())
+        return result  # 数据未变化时不写文件，视为成功
+    
+    def _update_version_file(self, version_data, content_hash, digests, file_md5):
+        """
+        更新版本文件
+        
+        除整体哈希外还记录每个应用的摘要，下次保存时只需重新计算有变化的应用，
+        前端也可据此判断具体哪些应用有更新；file_md5 用于确认数据文件仍是记录时写入的内容
+        
+        参数:
+        - version_data: 已加载的 version.json 内容
+        - content_hash: 整体哈希
+        - digests: [(应用 id, 摘要)]
+        - file_md5: 写入的数据文件内容的 MD5
+        """
+        version_data[self.version_key] = {
             'hash': content_hash,
-            'updated': datetime.utcnow().isoformat() + 'Z'
+            'updated': datetime.utcnow().isoformat() + 'Z',
+            'file_md5': file_md5,
+            'digests': {app_id: digest for app_id, digest in digests if app_id}
         }
         DataStore.save_json(self.version_file_path, version_data)
     
@@ -340,7 +808,12 @@ class AppDetailsStore:
         return self.load().get('apps', [])
     
     def find_app(self, app_id):
-        """根据ID查找应用详情"""
+        """根据ID查找应用详情（批量模式下为 O(1) 索引查找，返回快照中应用的副本）"""
+        with self._lock:
+            if self._snapshot is not None:
+                position = self._index.get(app_id)
+                return dict(self._snapshot['apps'][position]) if position is not None else None
+        
         for app in self.get_apps():
             if app.get('id') == app_id:
                 return app
@@ -360,36 +833,30 @@ class AppDetailsStore:
             print("应用详情必须包含 id")
             return False
         
-        data = self.load()
-        app_id = app_detail['id']
-        
-        # 查找并更新或插入
-        found = False
-        for i, app in enumerate(data['apps']):
-            if app.get('id') == app_id:
-                data['apps'][i] = app_detail
-                found = True
-                break
-        
-        if not found:
-            data['apps'].append(app_detail)
-        
-        return self.save(data)
+        with self._lock:
+            if self._snapshot is not None:
+                self._merge_apps(self._snapshot['apps'], [app_detail], self._index, self._changed_ids)
+                self._dirty = True
+                return True
+            
+            data = self.load()
+            self._merge_apps(data['apps'], [app_detail], self._build_index(data['apps']))
+            return self.save(data, {app_detail['id']})
     
     def remove_app(self, app_id):
         """移除应用详情"""
-        data = self.load()
-        original_length = len(data['apps'])
-        data['apps'] = [app for app in data['apps'] if app.get('id') != app_id]
-        
-        if len(data['apps']) < original_length:
-            return self.save(data)
-        return False
-    
+        with self._lock:
+            data = self.load()
+            original_length = len(data['apps'])
+            data['apps'] = [app for app in data['apps'] if app.get('id') != app_id]
+            
+            if len(data['apps']) < original_length:
+                return self.save(data, set())
+            return False
     
     def sync_with_apps_list(self, active_app_ids):
         """
-        与 apps.json 同步，移除不存在的应用
+        与应用列表同步，移除不存在的应用
         
         参数:
         - active_app_ids: 当前活跃的应用ID集合
@@ -397,14 +864,15 @@ class AppDetailsStore:
         返回:
         - int: 移除的应用数量
         """
-        data = self.load()
-        original_length = len(data['apps'])
-        data['apps'] = [app for app in data['apps'] if app.get('id') in active_app_ids]
-        removed_count = original_length - len(data['apps'])
-        
-        if removed_count > 0:
-            self.save(data)
-            print(f"清理了 {removed_count} 个已删除应用的详细信息")
+        with self._lock:
+            data = self.load()
+            original_length = len(data['apps'])
+            data['apps'] = [app for app in data['apps'] if app.get('id') in active_app_ids]
+            removed_count = original_length - len(data['apps'])
+            
+            if removed_count > 0:
+                self.save(data, set())
+                print(f"清理了 {removed_count} 个已删除应用的详细信息")
         
         return removed_count
 
@@ -418,124 +886,28 @@ class AppDetailsStore:
         返回:
         - int: 更新的应用数量
         """
-        data = self.load()
-        existing_ids = {app.get('id'): i for i, app in enumerate(data['apps'])}
-        
-        count = 0
-        for app_detail in apps_list:
-            app_id = app_detail.get('id')
-            if not app_id:
-                continue
+        with self._lock:
+            if self._snapshot is not None:
+                count = self._merge_apps(self._snapshot['apps'], apps_list, self._index, self._changed_ids)
+                self._dirty = self._dirty or count > 0
+                return count
             
-            if app_id in existing_ids:
-                data['apps'][existing_ids[app_id]] = app_detail
-            else:
-                data['apps'].append(app_detail)
-                existing_ids[app_id] = len(data['apps']) - 1
-            count += 1
-        
-        self.save(data)
-        return count
+            data = self.load()
+            changed_ids = set()
+            count = self._merge_apps(data['apps'], apps_list, self._build_index(data['apps']), changed_ids)
+            self.save(data, changed_ids)
+            return count
 
 
-class FnpackDetailsStore:
-    """fnpack_details.json 数据操作类"""
-    
-    def __init__(self):
-        ensure_data_dir()
-        self.file_path = get_data_path('fnpack_details.json')
-        self.version_file_path = get_data_path('version.json')
-    
-    def load(self):
-        """加载 fnpack 应用详情"""
-        return DataStore.load_json(self.file_path, {
-            'apps': [],
-            'lastUpdated': ''
-        })
-    
-    def _get_apps_hash(self, data):
-        """计算应用数据的哈希（不包含 lastUpdated）"""
-        apps_only = {'apps': data.get('apps', [])}
-        content = json.dumps(apps_only, sort_keys=True, ensure_ascii=False)
-        return hashlib.md5(content.encode('utf-8')).hexdigest()[:8]
-    
-    def save(self, data):
-        """保存 fnpack 应用详情（只有数据变化时才更新）"""
-        # 计算新数据的哈希
-        new_hash = self._get_apps_hash(data)
-        
-        # 获取当前版本哈希
-        version_data = DataStore.load_json(self.version_file_path, {})
-        old_hash = version_data.get('fnpack_details', {}).get('hash', '')
-        
-        # 只有哈希变化时才保存
-        if new_hash != old_hash:
-            data['lastUpdated'] = datetime.utcnow().isoformat() + 'Z'
-            result = DataStore.save_json(self.file_path, data)
-            if result:
-                self._update_version_file('fnpack_details', new_hash)
-            return result
-        return True  # 数据未变化，视为成功
-    
-    def _update_version_file(self, source, content_hash):
-        """更新版本文件"""
-        version_data = DataStore.load_json(self.version_file_path, {})
-        version_data[source] = {
-            'hash': content_hash,
-            'updated': datetime.utcnow().isoformat() + 'Z'
-        }
-        DataStore.save_json(self.version_file_path, version_data)
-    
-    def get_apps(self):
-        """获取所有应用详情"""
-        return self.load().get('apps', [])
+class AppDetailsStore(DetailsStore):
+    """app_details.json 数据操作类"""
     
-    def upsert_app(self, app_detail):
-        """更新或插入应用详情"""
-        if not app_detail.get('id'):
-            print("应用详情必须包含 id")
-            return False
-        
-        data = self.load()
-        app_id = app_detail['id']
-        
-        found = False
-        for i, app in enumerate(data['apps']):
-            if app.get('id') == app_id:
-                data['apps'][i] = app_detail
-                found = True
-                break
-        
-        if not found:
-            data['apps'].append(app_detail)
-        
-        return self.save(data)
+    file_name = 'app_details.json'
+    version_key = 'app_details'
+
+
+class FnpackDetailsStore(DetailsStore):
+    """fnpack_details.json 数据操作类"""
     
-    def upsert_apps_batch(self, apps_list):
-        """
-        批量更新或插入应用详情
-        
-        参数:
-        - apps_list: 应用详情列表
-        
-        返回:
-        - int: 更新的应用数量
-        """
-        data = self.load()
-        existing_ids = {app.get('id'): i for i, app in enumerate(data['apps'])}
-        
-        count = 0
-        for app_detail in apps_list:
-            app_id = app_detail.get('id')
-            if not app_id:
-                continue
-            
-            if app_id in existing_ids:
-                data['apps'][existing_ids[app_id]] = app_detail
-            else:
-                data['apps'].append(app_detail)
-                existing_ids[app_id] = len(data['apps']) - 1
-            count += 1
-        
-        self.save(data)
-        return count
+    file_name = 'fnpack_details.json'
+    version_key = 'fnpack_details'
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Git 镜像模块
+在本地缓存目录中为每个仓库维护一个不含文件内容的裸仓库镜像（blobless clone），
+每次运行只需一次 git fetch 即可同步，之后的文件树、提交时间查询都在本地完成，不消耗 REST API 配额
+
+镜像地址默认为 https://github.com/{owner}/{repo}.git，
+可通过环境变量 FSTORE_GIT_BASE_URL 改为其他地址（例如本地裸仓库所在目录，便于测试）
+"""
+
+import os
+import subprocess
+
+from .config import get_cache_dir
+from .repo_tree import RepoTree
+
+
+DEFAULT_GIT_BASE_URL = 'https://github.com'
+
+# 单条 git 命令的超时时间（秒），首次克隆大仓库时耗时较长
+GIT_TIMEOUT = 300
+
+
+def get_git_base_url():
+    """获取镜像源地址（FSTORE_GIT_BASE_URL，默认 https://github.com）"""
+    return (os.environ.get('FSTORE_GIT_BASE_URL') or DEFAULT_GIT_BASE_URL).rstrip('/')
+
+
+class GitMirror:
+    """单个仓库的本地镜像"""
+
+    def __init__(self, owner, repo, cache_dir=None, base_url=None):
+        """
+        参数:
+        - owner: 仓库所有者
+        - repo: 仓库名称
+        - cache_dir: 镜像存放目录，默认 .cache/git-mirrors
+        - base_url: 镜像源地址，默认 get_git_base_url()
+        """
+        self.owner = owner
+        self.repo = repo
+        self.url = f'{base_url or get_git_base_url()}/{owner}/{repo}.git'
+        self.path = os.path.join(cache_dir or get_cache_dir('git-mirrors'), owner, f'{repo}.git')
+
+    def _git(self, *args, text=True):
+        """
+        在镜像中执行 git 命令
+
+        返回:
+        - 命令的标准输出；命令失败时抛出 subprocess.CalledProcessError
+        """
+        env = dict(os.environ, GIT_TERMINAL_PROMPT='0', TZ='UTC')
+        result = subprocess.run(
+            ['git', '--git-dir', self.path, *args],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=env,
+            timeout=GIT_TIMEOUT,
+            check=True
+        )
+        return result.stdout.decode('utf-8') if text else result.stdout
+
+    def sync(self):
+        """
+        创建或更新镜像：不存在时做一次 blobless 克隆，已存在时做一次增量 fetch
+
+        返回:
+        - bool: 是否同步成功
+        """
+        try:
+            if os.path.isdir(self.path):
+                self._git('fetch', '--prune', '--quiet', 'origin')
+            else:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                subprocess.run(
+                    ['git', 'clone', '--bare', '--quiet', '--filter=blob:none', self.url, self.path],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    env=dict(os.environ, GIT_TERMINAL_PROMPT='0'),
+                    timeout=GIT_TIMEOUT,
+                    check=True
+                )
+                # 裸克隆默认不配置 fetch 规则，只同步分支（不包括 refs/pull 等）
+                self._git('config', 'remote.origin.fetch', '+refs/heads/*:refs/heads/*')
+            return True
+        except (OSError, subprocess.SubprocessError) as e:
+            stderr = getattr(e, 'stderr', None)
+            detail = stderr.decode('utf-8', 'replace').strip() if stderr else str(e)
+            print(f"同步 Git 镜像 {self.owner}/{self.repo} 失败: {detail}")
+            return False
+
+    def resolve_ref(self, branch=None):
+        """
+        返回分支对应的引用名，分支不存在时返回镜像的 HEAD
+
+        参数:
+        - branch: 分支名（通常为仓库的 default_branch）
+        """
+        if branch:
+            try:
+                self._git('rev-parse', '--verify', '--quiet', f'refs/heads/{branch}^{{commit}}')
+                return f'refs/heads/{branch}'
+            except subprocess.CalledProcessError:
+                pass
+        return 'HEAD'
+
+    def last_commit_date(self, path, ref='HEAD'):
+        """
+        获取最后一次修改指定路径的提交时间（格式与 REST API 相同，如 2024-01-01T00:00:00Z）
+
+        返回:
+        - str: 提交时间，路径没有提交记录时返回 None
+        """
+        try:
+            output = self._git(
+                'log', '-1', '--format=%cd', '--date=format-local:%Y-%m-%dT%H:%M:%SZ', ref, '--', path
+            )
+        except subprocess.CalledProcessError:
+            return None
+        return output.strip() or None
+
+    def read_file(self, path, ref='HEAD'):
+        """
+        读取文件内容（blobless 镜像中按需从远端补取该文件）
+
+        返回:
+        - str: 文件内容，文件不存在时返回 None
+        """
+        try:
+            return self._git('cat-file', 'blob', f'{ref}:{path}', text=False).decode('utf-8')
+        except subprocess.CalledProcessError:
+            return None
+
+    def tree(self, ref='HEAD'):
+        """
+        列出完整文件树（只读取树对象，不需要文件内容）
+
+        返回:
+        - RepoTree: 列出失败时返回 None
+        """
+        try:
+            tree_sha = self._git('rev-parse', f'{ref}^{{tree}}').strip()
+            output = self._git('ls-tree', '-r', '-t', '-z', ref)
+        except subprocess.CalledProcessError:
+            return None
+
+        entries = []
+        for line in output.split('\0'):
+            if not line:
+                continue
+            meta, _, path = line.partition('\t')
+            mode, entry_type, sha = meta.split()
+            entries.append({'path': path, 'mode': mode, 'type': entry_type, 'sha': sha})
+        return RepoTree(tree_sha, entries)
@@ -6,13 +6,850 @@ GitHub API 封装模块
 统一处理 GitHub API 调用、认证、重试等逻辑
 """
 
+import hashlib
 import json
 import os
 import time
+import threading
+import collections
+import concurrent.futures
+import http.client
+import urllib.parse
 import urllib.request
-import urllib.error
 import base64
 
+from .http_cache import ResponseCache
+
+
+# 默认连接池大小（与批量更新的线程数保持一致）
+DEFAULT_POOL_SIZE = 5
+
+# 限流响应（429/403）在不消耗普通重试次数的前提下最多重试的次数
+MAX_RATE_LIMIT_RETRIES = 3
+
+# 分页接口每页条目数（GitHub 允许的最大值，默认只有 30）
+DEFAULT_PER_PAGE = 100
+
+# 以原始格式获取文件内容时的媒体类型，响应体即文件本身，不再包一层 base64 JSON
+RAW_MEDIA_TYPE = 'application/vnd.github.raw'
+
+# 原始文件内容最多读取的字节数，超出部分不再下载
+DEFAULT_MAX_RAW_BYTES = 2 * 1024 * 1024
+
+# 流式读取响应体时每次读取的字节数
+STREAM_CHUNK_SIZE = 16 * 1024
+
+# 单次运行内记忆的 GET 响应体总字节数上限，超出时淘汰最久未使用的响应
+DEFAULT_MEMO_MAX_BYTES = 32 * 1024 * 1024
+
+# 复用的连接被服务端关闭时抛出的异常，遇到时换新连接重试一次
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    ConnectionResetError,
+    ConnectionAbortedError,
+    BrokenPipeError
+)
+
+
+class PooledResponse:
+    """
+    连接池返回的响应
+    
+    响应体已读取；限制了读取字节数或流式读取提前停止时 truncated 为 True，
+    total_length 为完整响应体的字节数（未知时为 None）
+    """
+    
+    def __init__(self, url, status, reason, headers, data, truncated=False):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.data = data
+        self.truncated = truncated
+        self.from_cache = False
+        self.rate_limited = False
+        content_length = headers.get('Content-Length') if headers else None
+        if content_length and content_length.isdigit():
+            self.total_length = int(content_length)
+        else:
+            self.total_length = None if truncated else len(data)
+    
+    def getcode(self):
+        return self.status
+
+
+class ConnectionPool:
+    """
+    线程安全的 HTTP keep-alive 连接池
+    
+    按 (scheme, host, port) 缓存空闲连接，多个线程共享同一组 TCP/TLS 连接，
+    避免每个请求都重新握手。空闲连接数上限为 max_size，一般设置为批量更新的线程数。
+    """
+    
+    def __init__(self, max_size=DEFAULT_POOL_SIZE):
+        self.max_size = max_size
+        self._idle = {}
+        self._lock = threading.Lock()
+    
+    def resize(self, max_size):
+        """调整每个主机的空闲连接上限，多余的连接会被关闭"""
+        with self._lock:
+            self.max_size = max(1, max_size)
+            for conns in self._idle.values():
+                while len(conns) > self.max_size:
+                    conns.pop(0).close()
+    
+    def close(self):
+        """关闭所有空闲连接"""
+        with self._lock:
+            for conns in self._idle.values():
+                for conn in conns:
+                    conn.close()
+            self._idle.clear()
+    
+    def _new_connection(self, scheme, host, port, timeout):
+        """创建新连接（支持环境变量中配置的 HTTPS 代理）"""
+        conn_class = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+        proxy = urllib.request.getproxies().get(scheme)
+        if proxy and scheme == 'https' and not urllib.request.proxy_bypass(host):
+            proxy_parts = urllib.parse.urlsplit(proxy)
+            proxy_port = proxy_parts.port or (443 if proxy_parts.scheme == 'https' else 80)
+            conn = conn_class(proxy_parts.hostname, proxy_port, timeout=timeout)
+            conn.set_tunnel(host, port)
+            return conn
+        return conn_class(host, port, timeout=timeout)
+    
+    def _acquire(self, key, timeout):
+        """取出一个空闲连接，没有则新建；返回 (连接, 是否复用)"""
+        with self._lock:
+            conns = self._idle.get(key)
+            if conns:
+                conn = conns.pop()
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+        return self._new_connection(*key, timeout), False
+    
+    def _release(self, key, conn):
+        """归还连接，超过上限时直接关闭"""
+        with self._lock:
+            conns = self._idle.setdefault(key, [])
+            if len(conns) < self.max_size:
+                conns.append(conn)
+                return
+        conn.close()
+    
+    @staticmethod
+    def _read(response, max_body, on_chunk=None):
+        """
+        读取响应体，最多 max_body 字节（None 表示不限制）
+        
+        提供 on_chunk 时，成功响应（2xx）的响应体按块读取并逐块交给 on_chunk，
+        on_chunk 返回 False 时停止读取
+        
+        返回:
+        - tuple: (响应体, 是否被截断)
+        """
+        if on_chunk is not None and 200 <= response.status < 300:
+            chunks = []
+            size = 0
+            while True:
+                want = STREAM_CHUNK_SIZE if max_body is None else min(STREAM_CHUNK_SIZE, max_body + 1 - size)
+                chunk = response.read(want)
+                if not chunk:
+                    return b''.join(chunks), False
+                truncated = max_body is not None and size + len(chunk) > max_body
+                if truncated:
+                    chunk = chunk[:max_body - size]
+                chunks.append(chunk)
+                size += len(chunk)
+                if truncated:
+                    return b''.join(chunks), True
+                if on_chunk(chunk) is False:
+                    # 响应体恰好读完时连接已被标记为关闭
+                    return b''.join(chunks), not response.isclosed()
+        
+        if max_body is None:
+            return response.read(), False
+        data = response.read(max_body + 1)
+        if len(data) > max_body:
+            return data[:max_body], True
+        # 响应体已读完，确保连接可以复用
+        response.read()
+        return data, False
+    
+    def _send(self, method, url, headers, body, timeout, max_body=None, on_chunk=None):
+        """在池化连接上发送单个请求（不处理重定向）"""
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme or 'https'
+        port = parts.port or (443 if scheme == 'https' else 80)
+        key = (scheme, parts.hostname, port)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        
+        conn, reused = self._acquire(key, timeout)
+        try:
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+            except _STALE_CONNECTION_ERRORS:
+                conn.close()
+                if not reused:
+                    raise
+                # 复用的连接可能已被服务端关闭，换新连接重试一次
+                conn = self._new_connection(*key, timeout)
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+            # 读取响应体时出错不在这里重试：部分内容可能已交给 on_chunk，由调用方从头重试
+            data, truncated = self._read(response, max_body, on_chunk)
+        except Exception:
+            conn.close()
+            raise
+        
+        # 截断时响应体未读完，连接不能复用
+        if response.will_close or truncated:
+            conn.close()
+        else:
+            self._release(key, conn)
+        
+        return PooledResponse(url, response.status, response.reason, response.headers, data, truncated)
+    
+    def request(self, method, url, headers=None, body=None, timeout=10, max_redirects=5, max_body=None,
+                on_chunk=None):
+        """
+        发起 HTTP 请求，自动跟随重定向
+        
+        参数:
+        - method: 请求方法
+        - url: 完整 URL
+        - headers: 请求头字典
+        - body: 请求体（bytes）
+        - timeout: 超时时间
+        - max_redirects: 最大重定向次数
+        - max_body: 响应体最多读取的字节数（可选），超出时截断并关闭连接
+        - on_chunk: 流式读取回调 on_chunk(字节)（可选），返回 False 时停止读取，见 _read
+        
+        返回:
+        - PooledResponse
+        """
+        headers = dict(headers or {})
+        for _ in range(max_redirects + 1):
+            response = self._send(method, url, headers, body, timeout, max_body, on_chunk)
+            location = response.headers.get('Location')
+            if response.status not in (301, 302, 303, 307, 308) or not location:
+                return response
+            
+            new_url = urllib.parse.urljoin(url, location)
+            # 跨主机重定向时不转发认证信息
+            if urllib.parse.urlsplit(new_url).hostname != urllib.parse.urlsplit(url).hostname:
+                headers.pop('Authorization', None)
+            if response.status == 303 or (response.status in (301, 302) and method != 'GET'):
+                method, body = 'GET', None
+                headers.pop('Content-Type', None)
+            url = new_url
+        return response
+
+
+# 全局共享连接池，GitHubAPI 和 fetch_github_api 共用
+_connection_pool = ConnectionPool()
+
+
+def get_connection_pool():
+    """获取全局共享连接池"""
+    return _connection_pool
+
+
+def configure_connection_pool(max_size):
+    """
+    按批量任务的线程数调整全局连接池大小
+    
+    参数:
+    - max_size: 每个主机保留的最大空闲连接数
+    """
+    _connection_pool.resize(max_size)
+    return _connection_pool
+
+
+# 全局响应缓存（ETag/Last-Modified 条件请求），设置 FSTORE_HTTP_CACHE=0 可关闭
+_response_cache = ResponseCache(enabled=os.environ.get('FSTORE_HTTP_CACHE', '1') != '0')
+
+
+def get_response_cache():
+    """获取全局响应缓存"""
+    return _response_cache
+
+
+def configure_response_cache(cache_dir=None, enabled=True):
+    """
+    替换全局响应缓存
+    
+    参数:
+    - cache_dir: 缓存目录，默认为 .cache/github_api
+    - enabled: 是否启用
+    """
+    global _response_cache
+    _response_cache = ResponseCache(cache_dir, enabled)
+    return _response_cache
+
+
+class RateLimitScheduler:
+    """
+    按 token 跟踪 GitHub API 剩余配额的全局请求调度器
+    
+    所有线程发请求前调用 acquire()，收到响应后调用 update() 同步
+    X-RateLimit-* / Retry-After 响应头：
+    - 剩余配额充足时不做限制
+    - 剩余配额低于 low_watermark（占总配额的比例）时，把剩余配额均匀分摊到重置前的时间里
+    - 剩余配额不高于 reserve 或收到 Retry-After 时，所有线程统一暂停到重置时间
+    """
+    
+    def __init__(self, reserve=0, low_watermark=0.1, max_wait=3600):
+        """
+        参数:
+        - reserve: 保留不用的配额数
+        - low_watermark: 开始平滑限速的剩余配额比例
+        - max_wait: 单次最长等待秒数，超过则不再等待直接发出请求
+        """
+        self.reserve = reserve
+        self.low_watermark = low_watermark
+        self.max_wait = max_wait
+        self._buckets = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _bucket_key(token, resource='core'):
+        """按 token 的哈希和资源类型区分配额桶（不保存 token 明文）"""
+        token_id = hashlib.sha1(token.encode('utf-8')).hexdigest()[:12] if token else 'anonymous'
+        return token_id, resource
+    
+    @staticmethod
+    def resource_for_url(url):
+        """根据 URL 推断所属的配额类型"""
+        path = urllib.parse.urlsplit(url).path
+        if path.startswith('/graphql'):
+            return 'graphql'
+        if path.startswith('/search'):
+            return 'search'
+        return 'core'
+    
+    def _bucket(self, key):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = {
+                'limit': None,
+                'remaining': None,
+                'reset': 0,
+                'paused_until': 0,
+                'next_slot': 0
+            }
+            self._buckets[key] = bucket
+        return bucket
+    
+    def _compute_wait(self, bucket, now):
+        """计算当前需要等待的秒数，无需等待时占用一个配额并返回 0"""
+        if bucket['paused_until'] > now:
+            return bucket['paused_until'] - now
+        
+        remaining = bucket['remaining']
+        if remaining is None or bucket['reset'] <= now:
+            # 配额未知或已经重置
+            return 0
+        
+        if remaining <= self.reserve:
+            # 配额耗尽，全局暂停到重置时间
+            bucket['paused_until'] = bucket['reset'] + 1
+            return bucket['paused_until'] - now
+        
+        limit = bucket['limit'] or remaining
+        if remaining < limit * self.low_watermark:
+            # 配额紧张，按剩余时间均匀分配请求
+            interval = (bucket['reset'] - now) / (remaining - self.reserve)
+            if bucket['next_slot'] > now:
+                return bucket['next_slot'] - now
+            bucket['next_slot'] = now + interval
+        
+        bucket['remaining'] = remaining - 1
+        return 0
+    
+    def acquire(self, token=None, resource='core'):
+        """
+        请求发出前调用，必要时阻塞等待
+        
+        返回:
+        - float: 实际等待的秒数
+        """
+        key = self._bucket_key(token, resource)
+        waited = 0
+        while True:
+            with self._lock:
+                wait = self._compute_wait(self._bucket(key), time.time())
+            if wait <= 0:
+                return waited
+            if waited + wait > self.max_wait:
+                print(f"GitHub API 配额等待时间 ({int(wait)} 秒) 超过上限，直接发出请求")
+                return waited
+            if wait >= 5:
+                print(f"GitHub API 配额不足，暂停 {int(wait)} 秒...")
+            time.sleep(wait)
+            waited += wait
+    
+    def update(self, token, headers, status=200, resource=None):
+        """
+        根据响应头更新配额信息
+        
+        参数:
+        - token: 请求使用的 token
+        - headers: 响应头
+        - status: 响应状态码
+        - resource: 配额类型，默认取 X-RateLimit-Resource 响应头
+        
+        返回:
+        - bool: 是否为限流响应（429 或配额耗尽的 403）
+        """
+        resource = headers.get('X-RateLimit-Resource') or resource or 'core'
+        now = time.time()
+        with self._lock:
+            bucket = self._bucket(self._bucket_key(token, resource))
+            try:
+                if headers.get('X-RateLimit-Limit') is not None:
+                    bucket['limit'] = int(headers['X-RateLimit-Limit'])
+                if headers.get('X-RateLimit-Remaining') is not None:
+                    bucket['remaining'] = int(headers['X-RateLimit-Remaining'])
+                if headers.get('X-RateLimit-Reset') is not None:
+                    bucket['reset'] = int(headers['X-RateLimit-Reset'])
+            except ValueError:
+                pass
+            
+            retry_after = headers.get('Retry-After')
+            rate_limited = status == 429 or (
+                status == 403 and (retry_after is not None or bucket['remaining'] == 0)
+            )
+            if not rate_limited:
+                return False
+            
+            if retry_after is not None:
+                try:
+                    pause_until = now + int(retry_after)
+                except ValueError:
+                    pause_until = now + 60
+            elif bucket['remaining'] == 0 and bucket['reset'] > now:
+                pause_until = bucket['reset'] + 1
+            else:
+                pause_until = now + 60
+            bucket['paused_until'] = max(bucket['paused_until'], pause_until)
+            return True
+    
+    def get_budget(self, token=None, resource='core'):
+        """
+        获取当前配额状态
+        
+        返回:
+        - dict: {'limit', 'remaining', 'reset', 'paused_until'}，未知的值为 None
+        """
+        with self._lock:
+            bucket = self._buckets.get(self._bucket_key(token, resource))
+            if bucket is None:
+                return {'limit': None, 'remaining': None, 'reset': None, 'paused_until': None}
+            if bucket['reset'] and bucket['reset'] <= time.time():
+                # 已过重置时间，剩余配额恢复为总配额
+                return {'limit': bucket['limit'], 'remaining': bucket['limit'], 'reset': None, 'paused_until': None}
+            return {
+                'limit': bucket['limit'],
+                'remaining': bucket['remaining'],
+                'reset': bucket['reset'] or None,
+                'paused_until': bucket['paused_until'] or None
+            }
+
+
+# 全局配额调度器，所有线程共享
+_rate_limiter = RateLimitScheduler()
+
+
+def get_rate_limiter():
+    """获取全局配额调度器"""
+    return _rate_limiter
+
+
+def get_rate_limit_budget(token=None, refresh=False):
+    """
+    获取指定 token 当前的 REST 配额
+    
+    参数:
+    - token: GitHub API token
+    - refresh: 是否先请求 /rate_limit 刷新（该接口不消耗配额）
+    
+    返回:
+    - dict: {'limit', 'remaining', 'reset', 'paused_until'}
+    """
+    if refresh:
+        fetch_github_api('https://api.github.com/rate_limit', token, max_retries=1, silent=True)
+    return _rate_limiter.get_budget(token)
+
+
+class LatencyTracker:
+    """
+    统计 API 请求延迟（不含配额排队时间），供批量任务的调度器调整并发数
+    
+    - average: 延迟的短期指数滑动平均，反映当前负载
+    - baseline: 延迟的长期指数滑动平均，视为正常负载下的延迟（不同接口的延迟差异也会被平均进去）
+    """
+    
+    def __init__(self, alpha=0.2, baseline_alpha=0.02):
+        """
+        参数:
+        - alpha: 短期滑动平均中新样本的权重
+        - baseline_alpha: 长期滑动平均中新样本的权重
+        """
+        self.alpha = alpha
+        self.baseline_alpha = baseline_alpha
+        self.average = None
+        self.baseline = None
+        self.count = 0
+        self._lock = threading.Lock()
+    
+    def record(self, seconds):
+        """记录一次请求的耗时"""
+        with self._lock:
+            if self.average is None:
+                self.average = self.baseline = seconds
+            else:
+                self.average += self.alpha * (seconds - self.average)
+                self.baseline += self.baseline_alpha * (seconds - self.baseline)
+            self.count += 1
+
+
+# 全局请求延迟统计，所有线程共享
+_latency_tracker = LatencyTracker()
+
+
+def get_latency_tracker():
+    """获取全局请求延迟统计"""
+    return _latency_tracker
+
+
+class RequestCoalescer:
+    """
+    相同 GET 请求的合并（single-flight）与单次运行内记忆
+    
+    URL、Accept、token 和读取上限都相同的 GET 请求视为同一请求：
+    - 已有相同请求在进行中时，等待它完成并共用其响应，不再发出请求
+    - 成功（以及 404）的响应在本次运行内记住，之后的相同请求直接返回
+    
+    响应对象在调用方之间共享，调用方只读取、不修改。
+    非 GET 请求（评论、打标签等）会清除同一仓库下记住的响应，避免读到写入前的旧数据。
+    """
+    
+    def __init__(self, enabled=True, max_bytes=DEFAULT_MEMO_MAX_BYTES):
+        """
+        参数:
+        - enabled: 是否启用
+        - max_bytes: 记住的响应体总字节数上限
+        """
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.shared = 0
+        self.misses = 0
+        self._memo = collections.OrderedDict()
+        self._memo_bytes = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def key(url, headers, max_body=None):
+        """生成请求的合并键"""
+        return (url, headers.get('Accept', ''), _token_from_headers(headers), max_body)
+    
+    @staticmethod
+    def _memoizable(url, response):
+        # /rate_limit 用于刷新配额信息，每次都要真正请求
+        if urllib.parse.urlsplit(url).path == '/rate_limit':
+            return False
+        return response.status < 400 or response.status == 404
+    
+    def call(self, key, send):
+        """
+        发起或合并一个 GET 请求
+        
+        参数:
+        - key: key() 生成的合并键
+        - send: 实际发送请求的函数，返回 PooledResponse
+        
+        返回:
+        - PooledResponse: 响应（可能与其他调用方共享）；send 抛出的异常会传给所有等待的调用方
+        """
+        if not self.enabled:
+            return send()
+        
+        with self._lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                self.hits += 1
+                return self._memo[key]
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = concurrent.futures.Future()
+                self.misses += 1
+            else:
+                self.shared += 1
+        
+        if not leader:
+            return future.result()
+        
+        try:
+            response = send()
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+        
+        with self._lock:
+            del self._inflight[key]
+            if self._memoizable(key[0], response):
+                self._remember(key, response)
+        future.set_result(response)
+        return response
+    
+    def _remember(self, key, response):
+        size = len(response.data)
+        if size > self.max_bytes:
+            return
+        self._memo[key] = response
+        self._memo_bytes += size
+        while self._memo_bytes > self.max_bytes:
+            _, evicted = self._memo.popitem(last=False)
+            self._memo_bytes -= len(evicted.data)
+    
+    @staticmethod
+    def _repo_prefix(url):
+        """取出 URL 中的 /repos/{owner}/{repo} 前缀（不是仓库接口时返回 None）"""
+        parts = urllib.parse.urlsplit(url)
+        segments = parts.path.split('/')
+        if len(segments) < 4 or segments[1] != 'repos':
+            return None
+        return f"{parts.scheme}://{parts.netloc}/repos/{segments[2].lower()}/{segments[3].lower()}"
+    
+    def invalidate(self, url):
+        """清除与 url 同一仓库下记住的响应（发送非 GET 请求后调用）"""
+        prefix = self._repo_prefix(url)
+        if prefix is None:
+            return
+        with self._lock:
+            for key in [k for k in self._memo if self._repo_prefix(k[0]) == prefix]:
+                self._memo_bytes -= len(self._memo.pop(key).data)
+    
+    def summary(self):
+        """返回统计文字"""
+        return f"请求合并: 记忆命中 {self.hits} 次，合并进行中请求 {self.shared} 次，实际请求 {self.misses} 次"
+
+
+# 全局请求合并器，所有线程共享；设置 FSTORE_REQUEST_MEMO=0 可关闭
+_request_coalescer = RequestCoalescer(enabled=os.environ.get('FSTORE_REQUEST_MEMO', '1') != '0')
+
+
+def get_request_coalescer():
+    """获取全局请求合并器"""
+    return _request_coalescer
+
+
+def configure_request_coalescer(enabled=True, max_bytes=DEFAULT_MEMO_MAX_BYTES):
+    """
+    替换全局请求合并器（清空已记住的响应和统计）
+    
+    参数:
+    - enabled: 是否启用
+    - max_bytes: 记住的响应体总字节数上限
+    """
+    global _request_coalescer
+    _request_coalescer = RequestCoalescer(enabled, max_bytes)
+    return _request_coalescer
+
+
+def _token_from_headers(headers):
+    """从请求头中取出 token（用于区分配额桶）"""
+    auth = headers.get('Authorization', '')
+    return auth.split(' ', 1)[-1] if auth else None
+
+
+def _feed_cached_body(body, max_body, on_chunk):
+    """
+    按流式读取的方式把缓存的响应体逐块交给 on_chunk
+    
+    返回:
+    - tuple: (已交付的响应体, 是否被截断)
+    """
+    limit = len(body) if max_body is None else min(len(body), max_body)
+    position = 0
+    while position < limit:
+        chunk = body[position:min(position + STREAM_CHUNK_SIZE, limit)]
+        position += len(chunk)
+        if on_chunk(chunk) is False:
+            break
+    return body[:position], position < len(body)
+
+
+def _send(method, url, headers, body=None, timeout=10, max_body=None, on_chunk=None):
+    """
+    通过连接池发送请求
+    
+    GET 请求会附带缓存中的 ETag/Last-Modified 条件头，
+    服务端返回 304 时直接使用缓存内容并按 200 返回。
+    被截断的响应不写入缓存。
+    """
+    cache = _response_cache
+    if method != 'GET' or not cache.enabled:
+        return _connection_pool.request(
+            method, url, headers=headers, body=body, timeout=timeout, max_body=max_body, on_chunk=on_chunk
+        )
+    
+    variant = headers.get('Accept', '')
+    entry = cache.get(url, variant)
+    if entry:
+        headers = {**headers, **ResponseCache.conditional_headers(entry)}
+    
+    response = _connection_pool.request(
+        'GET', url, headers=headers, timeout=timeout, max_body=max_body, on_chunk=on_chunk
+    )
+    if response.status == 304 and entry:
+        cache.record(True)
+        cache.touch(url, variant)
+        response.status = 200
+        response.reason = 'OK'
+        response.total_length = len(entry['body'])
+        if on_chunk is not None:
+            response.data, response.truncated = _feed_cached_body(entry['body'], max_body, on_chunk)
+        elif max_body is not None and len(entry['body']) > max_body:
+            response.data = entry['body'][:max_body]
+            response.truncated = True
+        else:
+            response.data = entry['body']
+        if entry.get('link') and not response.headers.get('Link'):
+            response.headers['Link'] = entry['link']
+        response.from_cache = True
+        return response
+    
+    if response.status == 200 and not response.truncated:
+        cache.store(url, response.headers, response.data, variant)
+    cache.record(False)
+    return response
+
+
+def _request(method, url, headers, body=None, timeout=10, max_body=None, on_chunk=None):
+    """
+    发送请求的统一入口
+    
+    相同的 GET 请求经全局请求合并器合并（流式读取的请求除外），合并的请求不占用配额；
+    请求前经过全局配额调度器排队，响应后同步配额信息；
+    限流响应会在 response.rate_limited 上标记，由调用方决定是否重试。
+    """
+    coalescer = _request_coalescer
+    if method == 'GET' and on_chunk is None:
+        return coalescer.call(
+            RequestCoalescer.key(url, headers, max_body),
+            lambda: _send_scheduled(method, url, headers, body, timeout, max_body, on_chunk)
+        )
+    response = _send_scheduled(method, url, headers, body, timeout, max_body, on_chunk)
+    if method != 'GET':
+        coalescer.invalidate(url)
+    return response
+
+
+def _send_scheduled(method, url, headers, body, timeout, max_body, on_chunk):
+    """经过配额调度器发送请求，并记录延迟"""
+    token = _token_from_headers(headers)
+    resource = RateLimitScheduler.resource_for_url(url)
+    _rate_limiter.acquire(token, resource)
+    started_at = time.monotonic()
+    response = _send(method, url, headers, body=body, timeout=timeout, max_body=max_body, on_chunk=on_chunk)
+    _latency_tracker.record(time.monotonic() - started_at)
+    response.rate_limited = _rate_limiter.update(token, response.headers, response.status, resource)
+    return response
+
+
+def parse_next_link(headers):
+    """
+    从响应头的 Link 字段中取出下一页地址（rel="next"）
+    
+    返回:
+    - str: 下一页的完整 URL，没有下一页时返回 None
+    """
+    link = headers.get('Link') if headers else None
+    if not link:
+        return None
+    for part in link.split(','):
+        url, _, params = part.partition(';')
+        if 'rel="next"' in params.replace(' ', ''):
+            return url.strip().strip('<>')
+    return None
+
+
+def _with_per_page(url, per_page):
+    """为请求地址设置 per_page 参数（已指定时保持不变）"""
+    parts = urllib.parse.urlsplit(url)
+    query = urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+    if per_page and not any(key == 'per_page' for key, _ in query):
+        query.append(('per_page', str(per_page)))
+    return urllib.parse.urlunsplit(parts._replace(query=urllib.parse.urlencode(query)))
+
+
+def _http_error_message(response):
+    """生成与 urllib.error.HTTPError 一致的错误描述"""
+    return f'HTTP Error {response.status}: {response.reason}'
+
+
+class ReleaseResolver:
+    """
+    最新 Release 查询
+    
+    只请求 releases?per_page=1（结果与完整列表的第一项相同，包含预发布版本），
+    不下载整个 Release 历史；同一实例内每个仓库只请求一次，可在多线程间共享。
+    """
+    
+    def __init__(self, fetch):
+        """
+        参数:
+        - fetch: 发起请求的函数 fetch(endpoint)，endpoint 为相对 API 根地址的路径，
+                 返回解析后的 JSON，失败时返回 None
+        """
+        self._fetch = fetch
+        self._latest = {}
+        self._lock = threading.Lock()
+    
+    def latest(self, owner, repo):
+        """
+        获取最新 Release
+        
+        返回:
+        - dict: 最新 Release，没有 Release 或请求失败时返回 None
+        """
+        key = (owner.lower(), repo.lower())
+        with self._lock:
+            if key in self._latest:
+                return self._latest[key]
+        
+        data = self._fetch(f'repos/{owner}/{repo}/releases?per_page=1')
+        release = data[0] if isinstance(data, list) and data else None
+        with self._lock:
+            self._latest[key] = release
+        return release
+    
+    def releases(self, owner, repo):
+        """返回只含最新 Release 的列表（没有时为空列表），格式与 releases 接口相同"""
+        release = self.latest(owner, repo)
+        return [release] if release else []
+
+
+def create_release_resolver(github_token=None):
+    """创建基于 fetch_github_api 的 ReleaseResolver"""
+    return ReleaseResolver(
+        lambda endpoint: fetch_github_api(f'https://api.github.com/{endpoint}', github_token)
+    )
+
 
 class GitHubAPI:
     """GitHub API 封装类"""
@@ -26,7 +863,14 @@ class GitHubAPI:
         """
         self.token = token or os.environ.get('GITHUB_TOKEN') or os.environ.get('PERSONAL_TOKEN')
         self.base_url = 'https://api.github.com'
+        self.graphql_url = os.environ.get('GITHUB_GRAPHQL_URL') or f'{self.base_url}/graphql'
         self.user_agent = '2FStore-App/1.0'
+        self._release_resolver = ReleaseResolver(self._get_data)
+    
+    def _get_data(self, endpoint):
+        """GET 请求，成功时返回数据，失败时返回 None"""
+        result = self.get(endpoint)
+        return result['data'] if result['success'] else None
     
     def _make_request(self, url, method='GET', data=None, max_retries=3, timeout=10):
         """
@@ -39,44 +883,55 @@ class GitHubAPI:
         - max_retries: 最大重试次数
         - timeout: 超时时间
         """
-        req = urllib.request.Request(url, method=method)
-        req.add_header('User-Agent', self.user_agent)
-        req.add_header('Accept', 'application/vnd.github.v3+json')
+        headers = {
+            'User-Agent': self.user_agent,
+            'Accept': 'application/vnd.github.v3+json'
+        }
         
         if self.token:
-            req.add_header('Authorization', f'token {self.token}')
+            headers['Authorization'] = f'token {self.token}'
         
+        body = None
         if data:
-            req.add_header('Content-Type', 'application/json')
-            req.data = json.dumps(data).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+            body = json.dumps(data).encode('utf-8')
         
-        for attempt in range(max_retries):
+        attempt = 0
+        rate_limit_retries = 0
+        while attempt < max_retries:
             try:
-                response = urllib.request.urlopen(req, timeout=timeout)
-                return {
-                    'status': response.getcode(),
-                    'data': json.loads(response.read().decode('utf-8')),
-                    'success': True
-                }
-            except urllib.error.HTTPError as e:
-                error_body = e.read().decode('utf-8') if e.fp else ''
-                if attempt < max_retries - 1 and e.code in [502, 503, 504]:
-                    wait_time = 2 ** attempt
-                    print(f"HTTP {e.code} 错误，{wait_time}秒后重试...")
-                    time.sleep(wait_time)
-                else:
+                response = _request(method, url, headers, body=body, timeout=timeout)
+                if response.rate_limited and rate_limit_retries < MAX_RATE_LIMIT_RETRIES:
+                    # 调度器已暂停到配额恢复，重新排队即可，不计入普通重试次数
+                    rate_limit_retries += 1
+                    print(f"HTTP {response.status} 触发限流，等待配额恢复后重试...")
+                    continue
+                if response.status >= 400:
+                    if attempt < max_retries - 1 and response.status in [502, 503, 504]:
+                        wait_time = 2 ** attempt
+                        print(f"HTTP {response.status} 错误，{wait_time}秒后重试...")
+                        time.sleep(wait_time)
+                        attempt += 1
+                        continue
                     return {
-                        'status': e.code,
-                        'error': str(e),
-                        'error_body': error_body,
+                        'status': response.status,
+                        'error': _http_error_message(response),
+                        'error_body': response.data.decode('utf-8', errors='replace'),
                         'success': False
                     }
+                return {
+                    'status': response.status,
+                    'data': json.loads(response.data.decode('utf-8')),
+                    'next_url': parse_next_link(response.headers),
+                    'success': True
+                }
             except Exception as e:
                 if attempt < max_retries - 1:
                     wait_time = 2 ** attempt
                     print(f"请求错误 (尝试 {attempt + 1}/{max_retries}): {str(e)}")
                     print(f"{wait_time}秒后重试...")
                     time.sleep(wait_time)
+                    attempt += 1
                 else:
                     return {
                         'status': 0,
@@ -86,15 +941,74 @@ class GitHubAPI:
         
         return {'status': 0, 'error': '所有重试均失败', 'success': False}
     
+    def _url(self, endpoint):
+        """将相对 API 根地址的路径转换为完整 URL（已是完整 URL 时保持不变）"""
+        if endpoint.startswith(('https://', 'http://')):
+            return endpoint
+        return f"{self.base_url}/{endpoint.lstrip('/')}"
+    
     def get(self, endpoint, **kwargs):
-        """GET 请求"""
-        url = f"{self.base_url}/{endpoint.lstrip('/')}"
-        return self._make_request(url, method='GET', **kwargs)
+        """
+        GET 请求
+        
+        列表接口只返回一页，结果中的 next_url 为下一页地址（没有时为 None），
+        需要多页时使用 iter_pages/paginate
+        """
+        return self._make_request(self._url(endpoint), method='GET', **kwargs)
     
     def post(self, endpoint, data=None, **kwargs):
         """POST 请求"""
-        url = f"{self.base_url}/{endpoint.lstrip('/')}"
-        return self._make_request(url, method='POST', data=data, **kwargs)
+        return self._make_request(self._url(endpoint), method='POST', data=data, **kwargs)
+    
+    def iter_pages(self, endpoint, per_page=DEFAULT_PER_PAGE, **kwargs):
+        """
+        逐页请求列表接口，按响应头 Link: rel="next" 获取下一页
+        
+        生成器按需请求：调用方停止迭代后不再请求后续页面。
+        
+        参数:
+        - endpoint: 相对 API 根地址的路径或完整 URL
+        - per_page: 每页条目数（endpoint 中已指定时以 endpoint 为准）
+        
+        返回:
+        - 生成器，每页一个与 get 相同的结果字典；请求失败时生成失败结果后结束
+        """
+        url = _with_per_page(self._url(endpoint), per_page)
+        while url:
+            result = self._make_request(url, method='GET', **kwargs)
+            yield result
+            if not result['success']:
+                return
+            url = result.get('next_url')
+    
+    def paginate(self, endpoint, per_page=DEFAULT_PER_PAGE, **kwargs):
+        """
+        逐条生成列表接口所有页面中的条目
+        
+        只在取完当前页的条目后才请求下一页，例如查找第一个带 .fpk 附件的 Release：
+            next((r for r in api.paginate('repos/o/r/releases') if ...), None)
+        找到后即停止，不会下载其余页面。
+        
+        返回:
+        - 生成器，逐条生成条目；某一页请求失败时抛出 RuntimeError
+        """
+        for result in self.iter_pages(endpoint, per_page, **kwargs):
+            if not result['success']:
+                raise RuntimeError(f"请求 {endpoint} 失败: {result.get('error')}")
+            data = result['data']
+            yield from data if isinstance(data, list) else [data]
+    
+    def graphql(self, query, variables=None, **kwargs):
+        """
+        GraphQL 查询（需要 token）
+        
+        返回:
+        - 与 get/post 相同的结果字典，data 为 GraphQL 响应（包含 data 和可能的 errors）
+        """
+        payload = {'query': query}
+        if variables:
+            payload['variables'] = variables
+        return self._make_request(self.graphql_url, method='POST', data=payload, **kwargs)
     
     def get_repo(self, owner, repo):
         """获取仓库信息"""
@@ -110,28 +1024,31 @@ class GitHubAPI:
         if ref:
             endpoint += f'?ref={ref}'
         
-        result = self.get(endpoint)
-        if result['success'] and 'content' in result['data']:
-            return base64.b64decode(result['data']['content']).decode('utf-8')
-        return None
+        return fetch_github_raw(self._url(endpoint), self.token)
     
     def get_releases(self, owner, repo):
-        """获取仓库的 Release 列表"""
-        return self.get(f'repos/{owner}/{repo}/releases')
+        """
+        获取仓库的全部 Release（自动翻页）
+        
+        只需要前几个 Release 时使用 paginate 按需迭代
+        
+        返回:
+        - 与 get 相同的结果字典，data 为所有页面合并后的列表
+        """
+        releases = []
+        for result in self.iter_pages(f'repos/{owner}/{repo}/releases'):
+            if not result['success']:
+                return result
+            releases.extend(result['data'])
+        return {'status': 200, 'data': releases, 'next_url': None, 'success': True}
     
     def get_latest_release(self, owner, repo):
-        """获取最新 Release"""
-        result = self.get_releases(owner, repo)
-        if result['success'] and result['data']:
-            return result['data'][0]
-        return None
+        """获取最新 Release（只请求一条，同一实例内按仓库缓存）"""
+        return self._release_resolver.latest(owner, repo)
     
     def get_readme(self, owner, repo):
-        """获取 README 内容"""
-        result = self.get(f'repos/{owner}/{repo}/readme')
-        if result['success'] and 'content' in result['data']:
-            return base64.b64decode(result['data']['content']).decode('utf-8')
-        return None
+        """获取 README 内容（超过 DEFAULT_MAX_RAW_BYTES 时只返回开头部分）"""
+        return fetch_github_raw(self._url(f'repos/{owner}/{repo}/readme'), self.token, partial=True)
     
     def add_issue_comment(self, owner, repo, issue_number, body):
         """
@@ -174,32 +1091,143 @@ def fetch_github_api(url, github_token=None, max_retries=3, silent=False):
     - 成功时返回 JSON 数据
     - 失败时返回 None
     """
-    req = urllib.request.Request(url)
-    req.add_header('User-Agent', '2FStore-App/1.0')
+    headers = {'User-Agent': '2FStore-App/1.0'}
     
     if github_token:
-        req.add_header('Authorization', f'token {github_token}')
+        headers['Authorization'] = f'token {github_token}'
     
-    for attempt in range(max_retries):
+    attempt = 0
+    rate_limit_retries = 0
+    while attempt < max_retries:
         try:
-            response = urllib.request.urlopen(req, timeout=10)
-            data = response.read()
-            return json.loads(data)
-        except urllib.error.HTTPError as e:
+            response = _request('GET', url, headers, timeout=10)
+            if response.status < 400:
+                return json.loads(response.data)
+            
+            error = _http_error_message(response)
+            # 限流时调度器已全局暂停到配额恢复，重新排队即可
+            if response.rate_limited and rate_limit_retries < MAX_RATE_LIMIT_RETRIES:
+                rate_limit_retries += 1
+                if not silent:
+                    print(f"触发限流 ({error})，等待配额恢复后重试...")
+                continue
             # 404 错误不重试（资源不存在是确定的）
-            if e.code == 404:
+            if response.status == 404:
                 return None
             # 其他 HTTP 错误
-            if attempt < max_retries - 1 and e.code in [502, 503, 504, 429]:
+            if attempt < max_retries - 1 and response.status in [502, 503, 504, 429]:
+                wait_time = 2 ** attempt
+                if not silent:
+                    print(f"错误 (尝试 {attempt + 1}/{max_retries}): {error}")
+                    print(f"{wait_time}秒后重试...")
+                time.sleep(wait_time)
+                attempt += 1
+            else:
+                if not silent:
+                    print(f"Error fetching {url} (所有尝试均失败): {error}")
+                return None
+        except Exception as e:
+            if attempt < max_retries - 1:
                 wait_time = 2 ** attempt
                 if not silent:
                     print(f"错误 (尝试 {attempt + 1}/{max_retries}): {str(e)}")
                     print(f"{wait_time}秒后重试...")
                 time.sleep(wait_time)
+                attempt += 1
             else:
                 if not silent:
                     print(f"Error fetching {url} (所有尝试均失败): {str(e)}")
                 return None
+    
+    return None
+
+
+def _decode_raw_body(response):
+    """
+    解码原始文件内容响应
+    
+    服务端未按原始格式返回（仍是 contents 接口的 JSON 格式）时从 content 字段解码
+    """
+    content_type = response.headers.get('Content-Type', '') if response.headers else ''
+    if 'json' in content_type and not response.truncated:
+        try:
+            envelope = json.loads(response.data)
+        except ValueError:
+            envelope = None
+        if isinstance(envelope, dict) and envelope.get('encoding') == 'base64' and 'content' in envelope:
+            return base64.b64decode(envelope['content'])
+    return response.data
+
+
+def fetch_github_raw(url, github_token=None, max_bytes=DEFAULT_MAX_RAW_BYTES, partial=False,
+                     max_retries=3, silent=False, scanner=None):
+    """
+    以原始格式获取文件内容（contents/readme 接口，Accept: application/vnd.github.raw）
+    
+    响应体就是文件本身，比 base64 编码的 JSON 小约 1/4，也不需要再解码一次。
+    最多读取 max_bytes 字节，超出部分不下载。
+    
+    参数:
+    - url: 完整的 contents 或 readme 接口 URL
+    - github_token: GitHub API token
+    - max_bytes: 最多读取的字节数
+    - partial: 超过 max_bytes 时是否返回开头部分（否则返回 None）
+    - max_retries: 最大重试次数
+    - silent: 是否静默模式（不打印错误日志）
+    - scanner: 流式处理对象（可选），需提供 reset()、feed(字节) 和 finish(已读字节数, 总字节数)：
+               响应体边下载边交给 feed，feed 返回 False 时停止下载，此时按 partial 返回已读部分
+    
+    返回:
+    - str: 文件内容（UTF-8 解码）；文件不存在、过大或请求失败时返回 None
+    """
+    headers = {'User-Agent': '2FStore-App/1.0', 'Accept': RAW_MEDIA_TYPE}
+    if github_token:
+        headers['Authorization'] = f'token {github_token}'
+    
+    attempt = 0
+    rate_limit_retries = 0
+    while attempt < max_retries:
+        try:
+            on_chunk = None
+            if scanner is not None:
+                # 每次重试都从头读取
+                scanner.reset()
+                on_chunk = scanner.feed
+            response = _request('GET', url, headers, timeout=10, max_body=max_bytes, on_chunk=on_chunk)
+            if response.status < 400:
+                if scanner is not None:
+                    scanner.finish(len(response.data), response.total_length)
+                if response.truncated and not partial:
+                    if not silent:
+                        print(f"文件超过 {max_bytes} 字节，已跳过: {url}")
+                    return None
+                data = _decode_raw_body(response)
+                # 截断处可能落在多字节字符中间，丢弃不完整的末尾字符
+                return data.decode('utf-8', errors='ignore' if response.truncated else 'strict')
+            
+            error = _http_error_message(response)
+            if response.rate_limited and rate_limit_retries < MAX_RATE_LIMIT_RETRIES:
+                rate_limit_retries += 1
+                if not silent:
+                    print(f"触发限流 ({error})，等待配额恢复后重试...")
+                continue
+            if response.status == 404:
+                return None
+            if attempt < max_retries - 1 and response.status in [502, 503, 504, 429]:
+                wait_time = 2 ** attempt
+                if not silent:
+                    print(f"错误 (尝试 {attempt + 1}/{max_retries}): {error}")
+                    print(f"{wait_time}秒后重试...")
+                time.sleep(wait_time)
+                attempt += 1
+            else:
+                if not silent:
+                    print(f"Error fetching {url} (所有尝试均失败): {error}")
+                return None
+        except UnicodeDecodeError as e:
+            if not silent:
+                print(f"文件内容不是有效的 UTF-8 ({url}): {str(e)}")
+            return None
         except Exception as e:
             if attempt < max_retries - 1:
                 wait_time = 2 ** attempt
@@ -207,6 +1235,7 @@ def fetch_github_api(url, github_token=None, max_retries=3, silent=False):
                     print(f"错误 (尝试 {attempt + 1}/{max_retries}): {str(e)}")
                     print(f"{wait_time}秒后重试...")
                 time.sleep(wait_time)
+                attempt += 1
             else:
                 if not silent:
                     print(f"Error fetching {url} (所有尝试均失败): {str(e)}")
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+GitHub GraphQL 批量抓取模块
+一次查询获取多个仓库的 Star/Fork、默认分支、指定文件的最后提交、最新 Release 和文件内容，
+替代批量更新时每个仓库的多次 REST 请求
+"""
+
+import json
+
+from .github_api import GitHubAPI
+
+
+# 每次查询包含的仓库数（受 GraphQL 节点数限制）
+DEFAULT_BATCH_SIZE = 25
+
+# 只查询 Star/Fork 时每个仓库只有两个字段，每次查询可以包含更多仓库
+STATS_BATCH_SIZE = 100
+
+
+def _build_repo_fragment(alias, owner, repo, history_path, files):
+    """构建单个仓库的查询片段"""
+    history = ''
+    if history_path:
+        history = (
+            'target { ... on Commit { '
+            f'history(first: 1, path: {json.dumps(history_path)}) {{ nodes {{ committedDate }} }} '
+            '} }'
+        )
+    
+    blobs = ''.join(
+        f'f{i}: object(expression: {json.dumps("HEAD:" + path)}) {{ ... on Blob {{ text isBinary }} }} '
+        for i, path in enumerate(files)
+    )
+    
+    return (
+        f'{alias}: repository(owner: {json.dumps(owner)}, name: {json.dumps(repo)}) {{ '
+        'description stargazerCount forkCount updatedAt '
+        'owner { login } '
+        f'defaultBranchRef {{ name {history} }} '
+        'releases(first: 1, orderBy: {field: CREATED_AT, direction: DESC}) { nodes { '
+        'tagName publishedAt createdAt releaseAssets(first: 50) { nodes { name downloadUrl } } '
+        '} } '
+        f'{blobs}'
+        '}'
+    )
+
+
+def build_batch_query(repos, history_path=None, files=()):
+    """
+    构建批量查询语句
+    
+    参数:
+    - repos: [(owner, repo), ...]
+    - history_path: 需要查询最后提交时间的文件路径
+    - files: 需要读取内容的文件路径列表
+    
+    返回:
+    - str: GraphQL 查询语句，仓库别名依次为 r0, r1, ...
+    """
+    fragments = [
+        _build_repo_fragment(f'r{i}', owner, repo, history_path, files)
+        for i, (owner, repo) in enumerate(repos)
+    ]
+    return 'query { ' + ' '.join(fragments) + ' }'
+
+
+def _normalize_repo(node, files):
+    """
+    把 GraphQL 结果转换为与 REST 接口一致的结构，方便直接替换 REST 数据
+    
+    返回:
+    - dict: {
+        'repo_info': 仓库信息（REST /repos/{owner}/{repo} 的字段子集）,
+        'path_commit_date': 指定文件最后提交时间,
+        'releases': 最新的 Release 列表（最多 1 个，REST 格式）,
+        'files': {路径: 文本内容或 None}
+      }
+    """
+    branch = node.get('defaultBranchRef') or {}
+    history_nodes = ((branch.get('target') or {}).get('history') or {}).get('nodes') or []
+    
+    releases = []
+    for release in (node.get('releases') or {}).get('nodes') or []:
+        assets = ((release.get('releaseAssets') or {}).get('nodes')) or []
+        releases.append({
+            'tag_name': release.get('tagName'),
+            'published_at': release.get('publishedAt'),
+            'created_at': release.get('createdAt'),
+            'assets': [
+                {'name': a.get('name', ''), 'browser_download_url': a.get('downloadUrl', '')}
+                for a in assets
+            ]
+        })
+    
+    file_contents = {}
+    for i, path in enumerate(files):
+        blob = node.get(f'f{i}')
+        file_contents[path] = blob.get('text') if blob and not blob.get('isBinary') else None
+    
+    return {
+        'repo_info': {
+            'description': node.get('description'),
+            'stargazers_count': node.get('stargazerCount', 0),
+            'forks_count': node.get('forkCount', 0),
+            'updated_at': node.get('updatedAt'),
+            'default_branch': branch.get('name', 'main'),
+            'owner': {'login': (node.get('owner') or {}).get('login', '')}
+        },
+        'path_commit_date': history_nodes[0].get('committedDate') if history_nodes else None,
+        'releases': releases,
+        'files': file_contents
+    }
+
+
+def build_stats_query(repos):
+    """
+    构建只查询 Star/Fork 数的批量查询语句
+    
+    参数:
+    - repos: [(owner, repo), ...]
+    
+    返回:
+    - str: GraphQL 查询语句，仓库别名依次为 r0, r1, ...
+    """
+    fragments = [
+        f'r{i}: repository(owner: {json.dumps(owner)}, name: {json.dumps(repo)}) {{ stargazerCount forkCount }}'
+        for i, (owner, repo) in enumerate(repos)
+    ]
+    return 'query { ' + ' '.join(fragments) + ' }'
+
+
+def fetch_repo_stats_batch(repos, github_token=None, batch_size=STATS_BATCH_SIZE):
+    """
+    通过 GraphQL 批量获取多个仓库的 Star/Fork 数
+    
+    参数:
+    - repos: [(owner, repo), ...]
+    - github_token: GitHub API token（GraphQL 必须认证）
+    - batch_size: 每次查询包含的仓库数
+    
+    返回:
+    - dict: {(owner, repo): {'stars': int, 'forks': int}}，获取失败的仓库不在结果中，调用方应回退到 REST
+    """
+    results = {}
+    repos = [r for r in dict.fromkeys(repos) if r and r[0] and r[1]]
+    if not repos:
+        return results
+    
+    api = GitHubAPI(github_token)
+    if not api.token:
+        print("未提供 GitHub Token，跳过 GraphQL 批量查询")
+        return results
+    
+    for start in range(0, len(repos), batch_size):
+        chunk = repos[start:start + batch_size]
+        result = api.graphql(build_stats_query(chunk))
+        if not result['success']:
+            print(f"GraphQL 批量查询失败: {result.get('error')}")
+            continue
+        
+        payload = result['data'] or {}
+        data = payload.get('data') or {}
+        if payload.get('errors'):
+            print(f"GraphQL 查询返回 {len(payload['errors'])} 个错误，相关仓库将回退到 REST")
+        
+        for i, repo_key in enumerate(chunk):
+            node = data.get(f'r{i}')
+            if node:
+                results[repo_key] = {
+                    'stars': node.get('stargazerCount', 0),
+                    'forks': node.get('forkCount', 0)
+                }
+    
+    return results
+
+
+def fetch_repos_batch(repos, github_token=None, history_path=None, files=(), batch_size=DEFAULT_BATCH_SIZE):
+    """
+    通过 GraphQL 批量获取多个仓库的元数据
+    
+    参数:
+    - repos: [(owner, repo), ...]
+    - github_token: GitHub API token（GraphQL 必须认证）
+    - history_path: 需要查询最后提交时间的文件路径（如 'manifest'、'fnpack.json'）
+    - files: 需要读取内容的文件路径列表（如 ['manifest']、['fnpack.json']）
+    - batch_size: 每次查询包含的仓库数
+    
+    返回:
+    - dict: {(owner, repo): _normalize_repo() 的结果}，获取失败的仓库不在结果中，调用方应回退到 REST
+    """
+    results = {}
+    repos = [r for r in dict.fromkeys(repos) if r and r[0] and r[1]]
+    if not repos:
+        return results
+    
+    api = GitHubAPI(github_token)
+    if not api.token:
+        print("未提供 GitHub Token，跳过 GraphQL 批量抓取")
+        return results
+    
+    files = list(files)
+    for start in range(0, len(repos), batch_size):
+        chunk = repos[start:start + batch_size]
+        query = build_batch_query(chunk, history_path, files)
+        result = api.graphql(query)
+        if not result['success']:
+            print(f"GraphQL 批量查询失败: {result.get('error')}")
+            continue
+        
+        payload = result['data'] or {}
+        data = payload.get('data') or {}
+        if payload.get('errors'):
+            # 部分仓库不存在或无权限时其余仓库的数据仍然有效
+            print(f"GraphQL 查询返回 {len(payload['errors'])} 个错误，相关仓库将回退到 REST")
+        
+        for i, repo_key in enumerate(chunk):
+            node = data.get(f'r{i}')
+            if node:
+                results[repo_key] = _normalize_repo(node, files)
+    
+    print(f"GraphQL 批量抓取完成: {len(results)}/{len(repos)} 个仓库")
+    return results
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+GitHub API 响应缓存模块
+按 URL 缓存响应体及 ETag/Last-Modified，用于发送条件请求（304 不计入速率限制）
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from .config import get_cache_dir
+
+
+# 超过该天数未被使用（未命中 304 也未重新写入）的缓存条目会被清理
+DEFAULT_MAX_AGE_DAYS = 7
+
+
+class ResponseCache:
+    """基于磁盘的 HTTP 条件请求缓存"""
+    
+    def __init__(self, cache_dir=None, enabled=True):
+        """
+        初始化响应缓存
+        
+        参数:
+        - cache_dir: 缓存目录，默认为 .cache/github_api
+        - enabled: 是否启用缓存
+        """
+        self.cache_dir = cache_dir or get_cache_dir('github_api')
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+    
+    def _path(self, url, variant=''):
+        """根据 URL 和变体（如 Accept 头）生成缓存文件路径"""
+        key = hashlib.sha1(f'{variant}\n{url}'.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], key)
+    
+    def get(self, url, variant=''):
+        """
+        读取缓存条目
+        
+        返回:
+        - dict: {'etag', 'last_modified', 'link', 'body'}，不存在或损坏时返回 None
+        """
+        if not self.enabled:
+            return None
+        try:
+            with open(self._path(url, variant), 'rb') as f:
+                meta_line = f.readline()
+                body = f.read()
+            entry = json.loads(meta_line.decode('utf-8'))
+            if entry.get('url') != url:
+                return None
+            entry['body'] = body
+            return entry
+        except (OSError, ValueError):
+            return None
+    
+    @staticmethod
+    def conditional_headers(entry):
+        """根据缓存条目生成条件请求头"""
+        headers = {}
+        if not entry:
+            return headers
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+    
+    def store(self, url, headers, body, variant=''):
+        """
+        写入缓存条目（仅当响应带有 ETag 或 Last-Modified 时）
+        
+        参数:
+        - url: 请求 URL
+        - headers: 响应头
+        - body: 响应体（bytes）
+        - variant: 缓存变体（如 Accept 头）
+        
+        返回:
+        - bool: 是否写入
+        """
+        if not self.enabled:
+            return False
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return False
+        
+        # 分页接口的 Link 头一并保存，304 响应未带 Link 时用于定位下一页
+        meta = json.dumps({
+            'url': url, 'etag': etag, 'last_modified': last_modified, 'link': headers.get('Link')
+        }, ensure_ascii=False)
+        path = self._path(url, variant)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # 先写临时文件再替换，避免并发读到半截内容
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(meta.encode('utf-8') + b'\n')
+                f.write(body)
+            os.replace(tmp_path, path)
+            return True
+        except OSError as e:
+            print(f"写入响应缓存失败 ({url}): {str(e)}")
+            return False
+    
+    def touch(self, url, variant=''):
+        """标记缓存条目在本次运行中被使用（更新修改时间，prune 按修改时间清理）"""
+        if not self.enabled:
+            return
+        try:
+            os.utime(self._path(url, variant))
+        except OSError:
+            pass
+    
+    def prune(self, max_age_days=DEFAULT_MAX_AGE_DAYS):
+        """
+        清理超过 max_age_days 天未被使用的缓存条目（如已删除仓库的 URL），避免缓存目录无限增长
+        
+        返回:
+        - tuple: (删除的文件数, 释放的字节数)
+        """
+        if not self.enabled or not os.path.isdir(self.cache_dir):
+            return 0, 0
+        cutoff = time.time() - max_age_days * 86400
+        removed = freed = 0
+        for root, _, files in os.walk(self.cache_dir, topdown=False):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                    if stat.st_mtime < cutoff:
+                        os.remove(path)
+                        removed += 1
+                        freed += stat.st_size
+                except OSError:
+                    continue
+            if root != self.cache_dir:
+                try:
+                    os.rmdir(root)  # 只删除已空的子目录
+                except OSError:
+                    pass
+        return removed, freed
+    
+    def record(self, hit):
+        """记录命中统计"""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+README 扫描模块
+边下载边提取 README 中的版本号、分类和截图，所需信息都已找到或达到字节上限时停止下载，
+避免为几行信息下载内嵌大图或超长更新日志的 README
+"""
+
+import codecs
+import re
+import threading
+
+from .github_api import fetch_github_raw
+
+
+# README 最多下载的字节数
+README_MAX_BYTES = 256 * 1024
+
+# 最多提取的截图数
+MAX_SCREENSHOTS = 9
+
+# 支持的截图格式
+SCREENSHOT_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp')
+
+VERSION_PATTERN = re.compile(r'version[:\s]+v?([\d.]+)', re.IGNORECASE)
+CATEGORY_PATTERN = re.compile(r'category[:\s]+([\w]+)', re.IGNORECASE)
+SCREENSHOT_PATTERN = re.compile(r'!\[[^\]]*\]\((https?://[^)]+)\)')
+
+
+def supported_screenshots(urls):
+    """筛选支持格式的截图地址，最多 MAX_SCREENSHOTS 张"""
+    return [url for url in urls if url.lower().endswith(SCREENSHOT_EXTENSIONS)][:MAX_SCREENSHOTS]
+
+
+class ReadmeScanner:
+    """
+    README 流式扫描器
+
+    feed() 逐块接收 README 内容，一次扫描同时提取版本号、分类和截图。
+    匹配结果后面还有内容时才视为确定（匹配在已读内容末尾时可能随后续内容变长），
+    下载结束时 finish() 再确定末尾的匹配，结果与对已下载的 README 执行同样的正则一致。
+    提取结果通过 version、category 和 screenshots 读取。
+    """
+
+    def __init__(self, need_version=True, need_category=True):
+        """
+        参数:
+        - need_version: 是否需要从 README 提取版本号（manifest 和 Release 已提供时不需要）
+        - need_category: 是否需要从 README 提取分类（manifest 已提供时不需要）
+        """
+        self.need_version = need_version
+        self.need_category = need_category
+        self.reset()
+
+    def reset(self):
+        """清空已读取的内容（重新下载前调用）"""
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.text = ''
+        self.version_match = None
+        self.category_match = None
+        self.screenshots = []
+        self._screenshot_pos = 0
+        self.bytes_read = 0
+        self.total_bytes = None
+
+    def feed(self, chunk):
+        """
+        接收一块 README 内容
+
+        返回:
+        - bool: 是否需要继续读取
+        """
+        self.bytes_read += len(chunk)
+        self.text += self._decoder.decode(chunk)
+        self._scan()
+        return not self.satisfied()
+
+    def finish(self, bytes_read, total_bytes):
+        """
+        下载结束时记录字节数，并确定位于已读内容末尾的匹配
+
+        参数:
+        - bytes_read: 实际下载的字节数
+        - total_bytes: README 的完整字节数（未知时为 None）
+        """
+        self.bytes_read = bytes_read
+        self.total_bytes = total_bytes
+        self._scan(final=True)
+
+    @property
+    def version(self):
+        """README 中的版本号，未找到（或不需要）时为 None"""
+        return self.version_match.group(1) if self.version_match else None
+
+    @property
+    def category(self):
+        """README 中的分类，未找到（或不需要）时为 None"""
+        return self.category_match.group(1) if self.category_match else None
+
+    @property
+    def bytes_saved(self):
+        """提前停止少下载的字节数（完整大小未知时为 0）"""
+        if self.total_bytes is None:
+            return 0
+        return max(self.total_bytes - self.bytes_read, 0)
+
+    def satisfied(self):
+        """所需的信息是否都已确定"""
+        return (
+            (not self.need_version or self.version_match is not None)
+            and (not self.need_category or self.category_match is not None)
+            and len(self.screenshots) >= MAX_SCREENSHOTS
+        )
+
+    def _settled(self, match, final):
+        return match is not None and (final or match.end() < len(self.text))
+
+    def _scan(self, final=False):
+        text = self.text
+        if self.need_version and self.version_match is None:
+            match = VERSION_PATTERN.search(text)
+            if self._settled(match, final):
+                self.version_match = match
+        if self.need_category and self.category_match is None:
+            match = CATEGORY_PATTERN.search(text)
+            if self._settled(match, final):
+                self.category_match = match
+        # 截图匹配以 ')' 结尾，找到即确定，下次从上一个匹配之后继续
+        while len(self.screenshots) < MAX_SCREENSHOTS:
+            match = SCREENSHOT_PATTERN.search(text, self._screenshot_pos)
+            if match is None:
+                break
+            self._screenshot_pos = match.end()
+            self.screenshots.extend(supported_screenshots([match.group(1)]))
+
+
+class ReadmeScanStats:
+    """README 扫描统计（线程安全），用于批量更新结束时的汇总"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.records = []
+
+    def record(self, name, scanner):
+        """记录一个应用的 README 下载情况"""
+        with self._lock:
+            self.records.append((name, scanner.bytes_read, scanner.total_bytes, scanner.bytes_saved))
+
+    def summary(self):
+        """
+        返回汇总文字（每个提前停止的应用一行）
+
+        返回:
+        - list: 文字行，没有记录时为空列表
+        """
+        with self._lock:
+            records = list(self.records)
+        if not records:
+            return []
+        total_read = sum(r[1] for r in records)
+        total_saved = sum(r[3] for r in records)
+        lines = [
+            f"README 扫描: {len(records)} 个应用，下载 {total_read / 1024:.1f} KiB，"
+            f"提前停止少下载 {total_saved / 1024:.1f} KiB"
+        ]
+        for name, bytes_read, total_bytes, bytes_saved in sorted(records, key=lambda r: -r[3]):
+            if bytes_saved:
+                lines.append(f"  {name}: 读取 {bytes_read} / {total_bytes} 字节，少下载 {bytes_saved} 字节")
+        return lines
+
+
+_readme_stats = ReadmeScanStats()
+
+
+def get_readme_stats():
+    """获取全局 README 扫描统计"""
+    return _readme_stats
+
+
+def fetch_readme(owner, repo, github_token=None, need_version=True, need_category=True):
+    """
+    流式获取 README，所需信息都已找到或达到 README_MAX_BYTES 时停止下载
+
+    参数:
+    - owner, repo: 仓库所有者和名称
+    - github_token: GitHub API token
+    - need_version / need_category: 见 ReadmeScanner
+
+    返回:
+    - ReadmeScanner: 已完成扫描的扫描器（提取结果见 version、category、screenshots），
+                     README 不存在或请求失败时返回 None
+    """
+    scanner = ReadmeScanner(need_version, need_category)
+    content = fetch_github_raw(
+        f'https://api.github.com/repos/{owner}/{repo}/readme',
+        github_token,
+        max_bytes=README_MAX_BYTES,
+        partial=True,
+        scanner=scanner
+    )
+    if content is None:
+        return None
+    _readme_stats.record(f'{owner}/{repo}', scanner)
+    if not scanner.text.startswith(content[:1024]):
+        # 服务端未按原始格式返回（扫描到的是 JSON 包装），按解码后的内容重新扫描
+        data = content.encode('utf-8')
+        scanner.reset()
+        scanner.feed(data)
+        scanner.finish(len(data), len(data))
+    return scanner
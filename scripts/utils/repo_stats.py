@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+仓库 Star/Fork 刷新模块
+只更新详情文件中的 Star/Fork 数，不重新抓取应用元数据，供定时的轻量刷新使用
+"""
+
+from .github_api import fetch_github_api
+from .github_graphql import fetch_repo_stats_batch
+from .validators import parse_github_url
+
+
+def fetch_repo_stats(repos, github_token=None):
+    """
+    获取多个仓库的 Star/Fork 数
+
+    优先通过 GraphQL 批量查询（每次查询最多 100 个仓库），
+    查询失败或未提供 token 的仓库回退到 REST 仓库信息接口（条件请求缓存命中时不消耗配额）
+
+    参数:
+    - repos: [(owner, repo), ...]
+    - github_token: GitHub API token
+
+    返回:
+    - dict: {(owner, repo): {'stars': int, 'forks': int}}，获取失败的仓库不在结果中
+    """
+    repos = [r for r in dict.fromkeys(repos) if r and r[0] and r[1]]
+    stats = fetch_repo_stats_batch(repos, github_token)
+
+    missing = [r for r in repos if r not in stats]
+    if missing:
+        print(f"通过 REST 获取 {len(missing)} 个仓库的 Star/Fork 数")
+    for owner, repo in missing:
+        repo_info = fetch_github_api(f'https://api.github.com/repos/{owner}/{repo}', github_token)
+        if repo_info:
+            stats[(owner, repo)] = {
+                'stars': repo_info.get('stargazers_count', 0),
+                'forks': repo_info.get('forks_count', 0)
+            }
+    return stats
+
+
+def refresh_store_stats(store, github_token=None):
+    """
+    刷新详情存储中所有应用的 Star/Fork 数（只修改这两个字段，lastUpdate 等保持不变，
+    不影响完整更新时的增量检查）
+
+    参数:
+    - store: AppDetailsStore 或 FnpackDetailsStore
+    - github_token: GitHub API token
+
+    返回:
+    - tuple: (数值有变化的应用数, 查询的仓库数)
+    """
+    with store.batch():
+        apps = store.get_apps()
+        repo_keys = {}
+        for app in apps:
+            owner, repo = parse_github_url(app.get('repository', ''))
+            if owner and repo:
+                repo_keys[app.get('id')] = (owner, repo)
+
+        stats = fetch_repo_stats(list(repo_keys.values()), github_token)
+
+        changed_apps = []
+        for app in apps:
+            repo_stats = stats.get(repo_keys.get(app.get('id')))
+            if not repo_stats:
+                continue
+            if app.get('stars') != repo_stats['stars'] or app.get('forks') != repo_stats['forks']:
+                changed_apps.append({**app, **repo_stats})
+
+        if changed_apps:
+            store.upsert_apps_batch(changed_apps)
+
+    return len(changed_apps), len(set(repo_keys.values()))
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+仓库文件树模块
+一次请求获取仓库默认分支的完整文件树（git/trees?recursive=1），
+之后图标、安装包、预览图目录等文件是否存在的判断都在内存中完成
+"""
+
+from urllib.parse import quote
+
+from .github_api import fetch_github_api
+
+
+# git 树条目类型到 contents 接口类型的映射
+_ENTRY_TYPES = {
+    'tree': 'dir',
+    'commit': 'submodule'
+}
+
+# 符号链接在 git 树中的文件模式
+_SYMLINK_MODE = '120000'
+
+
+class RepoTree:
+    """仓库文件树，按路径索引所有条目"""
+
+    def __init__(self, sha, entries):
+        """
+        参数:
+        - sha: 根树的 SHA
+        - entries: git/trees 接口返回的 tree 列表
+        """
+        self.sha = sha
+        self._entries = {}
+        self._children = {}
+
+        for entry in entries:
+            path = entry.get('path')
+            if not path:
+                continue
+            parent, _, name = path.rpartition('/')
+            if entry.get('mode') == _SYMLINK_MODE:
+                entry_type = 'symlink'
+            else:
+                entry_type = _ENTRY_TYPES.get(entry.get('type'), 'file')
+            # 与 contents 接口的目录列表项保持相同的字段
+            item = {
+                'name': name,
+                'path': path,
+                'type': entry_type,
+                'sha': entry.get('sha'),
+                'size': entry.get('size', 0)
+            }
+            self._entries[path] = item
+            self._children.setdefault(parent, []).append(item)
+
+    @classmethod
+    def from_response(cls, response):
+        """
+        从 git/trees 接口的返回结果构建文件树
+
+        返回:
+        - RepoTree: 构建结果；返回为空或被截断（仓库过大）时返回 None，调用方应回退到逐个探测
+        """
+        if not response or not isinstance(response, dict) or 'tree' not in response:
+            return None
+        if response.get('truncated'):
+            return None
+        return cls(response.get('sha'), response['tree'])
+
+    def entry(self, path):
+        """返回路径对应的条目，不存在时返回 None"""
+        return self._entries.get(path.strip('/'))
+
+    def exists(self, path):
+        """路径是否存在（文件或目录）"""
+        return self.entry(path) is not None
+
+    def is_dir(self, path):
+        """路径是否为目录"""
+        entry = self.entry(path)
+        return entry is not None and entry['type'] == 'dir'
+
+    def first_existing(self, directory, names):
+        """
+        按优先级返回目录下第一个存在的文件名
+
+        参数:
+        - directory: 目录路径，仓库根目录为 ''
+        - names: 候选文件名列表（按优先级排列）
+
+        返回:
+        - str: 第一个存在的文件名，都不存在时返回 None
+        """
+        prefix = f"{directory.strip('/')}/" if directory.strip('/') else ''
+        for name in names:
+            if f'{prefix}{name}' in self._entries:
+                return name
+        return None
+
+    def list_dir(self, path):
+        """
+        列出目录下的直接子条目（格式与 contents 接口的目录列表相同）
+
+        返回:
+        - list: 子条目列表；路径不是目录时返回 None
+        """
+        path = path.strip('/')
+        if path and not self.is_dir(path):
+            return None
+        return list(self._children.get(path, []))
+
+
+def fetch_repo_tree(owner, repo, ref, github_token=None):
+    """
+    获取仓库指定分支的完整文件树
+
+    参数:
+    - owner: 仓库所有者
+    - repo: 仓库名称
+    - ref: 分支名、标签名或树的 SHA
+    - github_token: GitHub API token
+
+    返回:
+    - RepoTree: 获取失败或文件树被截断时返回 None
+    """
+    response = fetch_github_api(
+        f'https://api.github.com/repos/{owner}/{repo}/git/trees/{quote(ref, safe="/")}?recursive=1',
+        github_token
+    )
+    tree = RepoTree.from_response(response)
+    if response and tree is None:
+        print(f"仓库 {owner}/{repo} 的文件树过大被截断，回退到逐个探测")
+    return tree
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+批量任务调度模块
+提供工作窃取线程池：顶层任务按权重从大到小开始，任务内部提交的子任务放在当前线程的本地队列中，
+空闲线程从其他线程的队列中窃取子任务；自动模式下根据请求延迟和剩余配额调整并发数
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, as_completed
+
+from .github_api import get_latency_tracker, get_rate_limit_budget
+
+
+# 固定并发数未指定时的默认值
+DEFAULT_MAX_WORKERS = 5
+
+# 自动模式（--max-workers auto）的并发范围和初始值
+AUTO_MIN_WORKERS = 2
+AUTO_INITIAL_WORKERS = 4
+AUTO_MAX_WORKERS = 16
+
+# 自动模式下两次调整并发数的最小间隔（秒）
+ADJUST_INTERVAL = 0.5
+
+# 请求延迟超过基线的倍数时认为服务端已饱和，收缩并发数
+LATENCY_TOLERANCE = 2.0
+
+
+def parse_max_workers(value):
+    """
+    解析 --max-workers 参数
+
+    返回:
+    - 'auto' 或正整数
+    """
+    if value == 'auto':
+        return value
+    workers = int(value)
+    if workers < 1:
+        raise ValueError(f'并发数必须大于 0: {value}')
+    return workers
+
+
+class ScheduledTask:
+    """调度器中的单个任务"""
+
+    def __init__(self, scheduler, func, args, kwargs):
+        self._scheduler = scheduler
+        self._func = func
+        self._args = args
+        self._kwargs = kwargs
+        self.future = Future()
+
+    def done(self):
+        """任务是否已完成"""
+        return self.future.done()
+
+    def result(self):
+        """
+        等待并返回任务结果（任务抛出的异常会重新抛出）
+
+        在调度器的工作线程中调用时，等待期间会执行其他子任务，不会占着线程空等
+        """
+        return self._scheduler._wait(self)
+
+    def _run(self):
+        try:
+            result = self._func(*self._args, **self._kwargs)
+        except BaseException as e:
+            self.future.set_exception(e)
+        else:
+            self.future.set_result(result)
+
+
+class WorkScheduler:
+    """
+    工作窃取调度器
+
+    用法:
+        with WorkScheduler('auto', github_token) as scheduler:
+            results = scheduler.run(func, items, weight=...)
+
+    任务内部可以通过 scheduler.submit() 提交子任务并调用其 result() 等待结果。
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, github_token=None):
+        """
+        参数:
+        - max_workers: 工作线程数，'auto' 表示根据请求延迟和剩余配额自动调整
+        - github_token: 查询剩余配额使用的 token
+        """
+        self.adaptive = max_workers == 'auto'
+        self.max_workers = AUTO_MAX_WORKERS if self.adaptive else int(max_workers)
+        self.limit = min(AUTO_INITIAL_WORKERS, self.max_workers) if self.adaptive else self.max_workers
+        self.github_token = github_token
+        self.peak_workers = self.limit
+        self.steals = 0
+        # 慢启动阶段并发数按倍数增长，第一次观察到延迟升高后改为逐个增加
+        self._slow_start = self.adaptive
+
+        self._cond = threading.Condition()
+        self._jobs = deque()
+        self._local = [deque() for _ in range(self.max_workers)]
+        self._threads = []
+        self._pending_jobs = 0
+        self._finished_jobs = 0
+        self._shutdown = False
+        self._last_adjust = 0
+        self._thread_state = threading.local()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.shutdown()
+        return False
+
+    def start(self):
+        """启动工作线程（编号不小于当前并发上限的线程处于挂起状态）"""
+        for worker_id in range(self.max_workers):
+            thread = threading.Thread(target=self._worker, args=(worker_id,), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def shutdown(self):
+        """等待已提交的任务全部完成后停止工作线程"""
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def submit(self, func, *args, **kwargs):
+        """
+        提交任务
+
+        在工作线程中调用时作为子任务放入当前线程的本地队列，否则作为顶层任务排队
+
+        返回:
+        - ScheduledTask
+        """
+        task = ScheduledTask(self, func, args, kwargs)
+        worker_id = getattr(self._thread_state, 'worker_id', None)
+        with self._cond:
+            if worker_id is None:
+                self._jobs.append(task)
+                self._pending_jobs += 1
+                task.future.add_done_callback(self._job_finished)
+            else:
+                self._local[worker_id].append(task)
+            self._cond.notify_all()
+        return task
+
+    def run(self, func, items, weight=None, on_result=None):
+        """
+        处理所有条目，每个条目一个顶层任务
+
+        参数:
+        - func: 处理单个条目的函数
+        - items: 条目列表
+        - weight: 条目权重函数（可选），提供时权重大的条目先开始，相同权重保持原顺序
+        - on_result: 每个条目成功完成时的回调 on_result(条目, 结果)，在调用线程中执行（可选）
+
+        返回:
+        - list: [(条目, 结果或异常)]，顺序与 items 一致
+        """
+        order = list(range(len(items)))
+        if weight is not None:
+            order.sort(key=lambda index: -weight(items[index]))
+
+        tasks = [None] * len(items)
+        for index in order:
+            tasks[index] = self.submit(func, items[index])
+
+        future_to_index = {task.future: index for index, task in enumerate(tasks)}
+        for future in as_completed(future_to_index):
+            if on_result and future.exception() is None:
+                index = future_to_index[future]
+                on_result(items[index], future.result())
+
+        results = []
+        for item, task in zip(items, tasks):
+            error = task.future.exception()
+            results.append((item, error if error is not None else task.future.result()))
+        return results
+
+    def summary(self):
+        """返回调度统计的描述文字"""
+        mode = '自动' if self.adaptive else '固定'
+        return f"调度器: {mode}并发，峰值 {self.peak_workers} 个线程，窃取子任务 {self.steals} 次"
+
+    def _job_finished(self, _future):
+        with self._cond:
+            self._pending_jobs -= 1
+            self._finished_jobs += 1
+
+    def _next_task(self, worker_id, include_jobs=True):
+        """按本地队列、顶层任务、窃取其他线程子任务的顺序取下一个任务（调用方持有锁）"""
+        local = self._local[worker_id]
+        if local:
+            return local.pop()
+        if include_jobs and self._jobs:
+            return self._jobs.popleft()
+        for other in self._local:
+            if other:
+                self.steals += 1
+                return other.popleft()
+        return None
+
+    def _worker(self, worker_id):
+        self._thread_state.worker_id = worker_id
+        while True:
+            with self._cond:
+                while True:
+                    task = self._next_task(worker_id) if worker_id < self.limit else None
+                    if task is not None:
+                        break
+                    if self._shutdown and not self._jobs and not any(self._local):
+                        return
+                    self._cond.wait(ADJUST_INTERVAL)
+            self._execute(task)
+
+    def _execute(self, task):
+        task._run()
+        with self._cond:
+            self._cond.notify_all()
+        if self.adaptive:
+            self._adjust()
+
+    def _wait(self, task):
+        worker_id = getattr(self._thread_state, 'worker_id', None)
+        if worker_id is not None:
+            # 工作线程等待子任务时帮忙执行子任务（不取新的顶层任务，避免调用栈不断嵌套）
+            while True:
+                with self._cond:
+                    if task.done():
+                        break
+                    next_task = self._next_task(worker_id, include_jobs=False)
+                    if next_task is None:
+                        self._cond.wait(ADJUST_INTERVAL)
+                        continue
+                self._execute(next_task)
+        return task.future.result()
+
+    def _budget_cap(self, latency):
+        """
+        剩余配额不足以完成剩余任务时，按 配额恢复速度 x 请求延迟 限制并发数
+
+        返回:
+        - int: 并发上限，配额充足或未知时返回 None
+        """
+        budget = get_rate_limit_budget(self.github_token)
+        remaining, reset = budget.get('remaining'), budget.get('reset')
+        if remaining is None or not reset:
+            return None
+
+        tracker = get_latency_tracker()
+        with self._cond:
+            finished, pending = self._finished_jobs, self._pending_jobs
+        requests_per_job = tracker.count / finished if finished else 1
+        if remaining >= pending * requests_per_job:
+            return None
+
+        window = max(reset - time.time(), 1)
+        return max(1, int(remaining / window * latency) + 1)
+
+    def _adjust(self):
+        """
+        自动模式下调整并发数：请求延迟保持在基线附近时增加（慢启动阶段翻倍，之后每次加一），
+        延迟明显升高时按比例收缩，并受剩余配额限制
+        """
+        now = time.monotonic()
+        with self._cond:
+            if now - self._last_adjust < ADJUST_INTERVAL:
+                return
+            self._last_adjust = now
+
+        tracker = get_latency_tracker()
+        latency, baseline = tracker.average, tracker.baseline
+        if latency is None:
+            return
+
+        if latency > baseline * LATENCY_TOLERANCE:
+            self._slow_start = False
+            limit = int(self.limit * 0.75)
+        elif self._slow_start:
+            limit = self.limit * 2
+        else:
+            limit = self.limit + 1
+        cap = self._budget_cap(latency)
+        if cap is not None:
+            limit = min(limit, cap)
+        limit = max(min(limit, self.max_workers), min(AUTO_MIN_WORKERS, self.max_workers))
+
+        with self._cond:
+            if limit != self.limit:
+                self.limit = limit
+                self.peak_workers = max(self.peak_workers, limit)
+                self._cond.notify_all()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多关键词匹配模块
+提供 Aho-Corasick 自动机，一次扫描文本即可找出所有关键词的出现位置
+"""
+
+import re
+from collections import deque
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick 多模式子串匹配自动机
+
+    构建后不可修改，可在多线程间共享。
+    扫描时失败跳转已展开为确定性转移表，每个字符只需一次查表；
+    处于根状态时借助关键词正则直接跳到下一个关键词出现的位置，无命中的文本几乎不进入 Python 循环。
+    """
+
+    def __init__(self, keywords):
+        """
+        参数:
+        - keywords: 关键词列表（重复和空字符串会被忽略）
+        """
+        self.keywords = []
+        # 状态转移表、失败指针和每个状态的输出（以该状态结尾的关键词下标）
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+
+        seen = set()
+        for keyword in keywords:
+            if not keyword or keyword in seen:
+                continue
+            seen.add(keyword)
+            self._add(keyword, len(self.keywords))
+            self.keywords.append(keyword)
+
+        self._lengths = [len(keyword) for keyword in self.keywords]
+        self._build_fail_links()
+        # 所有关键词组成的正则，根状态下用它（在 C 层）直接找到下一个关键词出现的位置：
+        # 该位置之前不可能有关键词开始，从根状态在此处继续扫描不会漏掉任何命中
+        self._next_start = re.compile(
+            '|'.join(re.escape(keyword) for keyword in sorted(self.keywords, key=len, reverse=True))
+        ).search if self.keywords else None
+
+    def _add(self, keyword, index):
+        """把关键词加入字典树"""
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(index)
+
+    def _build_fail_links(self):
+        """
+        按广度优先顺序计算失败指针并合并后缀状态的输出，
+        同时把失败跳转展开进转移表，扫描时每个字符只需一次查表
+        """
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+        # 展开为确定性自动机：状态缺少的转移继承自失败状态（广度优先保证失败状态已展开）
+        self._delta = [dict(self._goto[0])]
+        self._delta.extend({} for _ in range(len(self._goto) - 1))
+        order = deque(self._goto[0].values())
+        while order:
+            state = order.popleft()
+            transitions = dict(self._delta[self._fail[state]])
+            transitions.update(self._goto[state])
+            self._delta[state] = transitions
+            order.extend(self._goto[state].values())
+
+    def _scan(self, text):
+        """运行自动机，生成 (结束位置 + 1, 命中状态)"""
+        delta, output = self._delta, self._output
+        skip_to_start = self._next_start
+        length = len(text)
+        state = 0
+        i = 0
+        while i < length:
+            if state == 0:
+                # 根状态下直接跳到下一个关键词出现的位置
+                match = skip_to_start(text, i)
+                if match is None:
+                    return
+                i = match.start()
+            state = delta[state].get(text[i], 0)
+            i += 1
+            if output[state]:
+                yield i, state
+
+    def iter_matches(self, text):
+        """
+        找出文本中所有关键词的出现（包括相互重叠的）
+
+        参数:
+        - text: 待扫描文本
+
+        返回:
+        - 生成器，按结束位置顺序生成 (起始位置, 关键词)
+        """
+        if not text or not self.keywords:
+            return
+        keywords, lengths, output = self.keywords, self._lengths, self._output
+        for end, state in self._scan(text):
+            for index in output[state]:
+                yield end - lengths[index], keywords[index]
+
+    def find_all(self, text):
+        """
+        返回文本中出现过的关键词集合
+
+        参数:
+        - text: 待扫描文本
+
+        返回:
+        - set: 出现过的关键词
+        """
+        found = set()
+        if not text or not self.keywords:
+            return found
+        keywords, output = self.keywords, self._output
+        for _, state in self._scan(text):
+            found.update(keywords[index] for index in output[state])
+        return found
@@ -9,6 +9,10 @@
 import re
 import base64
 
+from .text_match import AhoCorasick
+from .config import get_app_details_path, get_fnpack_details_path
+from .data_store import DataStore
+
 def validate_app_info(app_id, app_name, repo_url):
     """
     验证应用信息
@@ -156,6 +160,51 @@ LEGAL_SENSITIVE_WORDS = _process_word_list(_LEGAL_REFERENCE_WORDS)
 ENGLISH_SENSITIVE_WORDS = _process_word_list(_ENGLISH_REFERENCE_WORDS)
 
 
+# 预编译的敏感词自动机：中文参考词汇匹配原文，英文参考词汇匹配小写文本
+_LEGAL_WORD_MATCHER = AhoCorasick(LEGAL_SENSITIVE_WORDS)
+_ENGLISH_WORD_MATCHER = AhoCorasick(ENGLISH_SENSITIVE_WORDS)
+
+
+def _lower_with_offsets(text):
+    """
+    返回小写文本及其到原文的位置映射
+    
+    绝大多数文本小写后长度不变，映射为 None；个别字符（如 'İ'）小写后变长时，
+    返回小写文本每个位置对应的原文位置。
+    """
+    lower_text = text.lower()
+    if len(lower_text) == len(text):
+        return lower_text, None
+    
+    positions = []
+    for i, char in enumerate(text):
+        positions.extend([i] * len(char.lower()))
+    return lower_text, positions
+
+
+def find_sensitive_words(text):
+    """
+    扫描文本中的所有参考词汇（每类词汇只扫描一遍）
+    
+    参数:
+    - text: 要检查的文本内容
+    
+    返回:
+    - list: [(原文中的起始位置, 词汇)]，按位置排序，同一词汇多次出现会多次返回
+    """
+    if not text or not isinstance(text, str):
+        return []
+    
+    hits = list(_LEGAL_WORD_MATCHER.iter_matches(text))
+    
+    lower_text, positions = _lower_with_offsets(text)
+    for start, word in _ENGLISH_WORD_MATCHER.iter_matches(lower_text):
+        hits.append((positions[start] if positions else start, word))
+    
+    hits.sort()
+    return hits
+
+
 def check_content_guidelines(text):
     """
     检查文本是否符合内容指南
@@ -166,23 +215,17 @@ def check_content_guidelines(text):
     返回:
     - tuple: (is_acceptable: bool, flagged_items: list)
         - is_acceptable: 是否符合内容指南
-        - flagged_items: 标记的项目列表
+        - flagged_items: 标记的项目列表（按参考词汇表顺序，每个词只出现一次）
     """
     if not text or not isinstance(text, str):
         return True, []
     
-    flagged_items = []
-    lower_text = text.lower()
-    
-    # 检查中文参考词汇
-    for word in LEGAL_SENSITIVE_WORDS:
-        if word in text:
-            flagged_items.append(word)
+    found_legal = _LEGAL_WORD_MATCHER.find_all(text)
+    found_english = _ENGLISH_WORD_MATCHER.find_all(text.lower())
     
-    # 检查英文参考词汇
-    for word in ENGLISH_SENSITIVE_WORDS:
-        if word in lower_text:
-            flagged_items.append(word)
+    # 先中文后英文，保持参考词汇表中的顺序
+    flagged_items = [word for word in LEGAL_SENSITIVE_WORDS if word in found_legal]
+    flagged_items += [word for word in ENGLISH_SENSITIVE_WORDS if word in found_english]
     
     return len(flagged_items) == 0, flagged_items
 
@@ -215,4 +258,39 @@ def validate_content(app_name, app_description):
     return {
         'is_valid': len(errors) == 0,
         'errors': errors
-    }
\ No newline at end of file
+    }
+
+
+def audit_catalogue(catalogues=None):
+    """
+    批量审核应用目录中所有应用的名称和描述（参考词汇表变化后可重新扫描全部数据）
+    
+    参数:
+    - catalogues: {来源名称: 详情文件路径}，默认审核 app_details.json 和 fnpack_details.json
+    
+    返回:
+    - list: 命中的记录，每项为
+      {'source': 来源, 'id': 应用ID, 'name': 应用名称, 'field': 'name' 或 'description',
+       'hits': [(起始位置, 词汇)]}
+    """
+    if catalogues is None:
+        catalogues = {
+            'app_details': get_app_details_path(),
+            'fnpack_details': get_fnpack_details_path()
+        }
+    
+    findings = []
+    for source, path in catalogues.items():
+        for app in DataStore.load_json(path, {'apps': []}).get('apps', []):
+            for field in ('name', 'description'):
+                hits = find_sensitive_words(app.get(field))
+                if hits:
+                    findings.append({
+                        'source': source,
+                        'id': app.get('id', ''),
+                        'name': app.get('name', ''),
+                        'field': field,
+                        'hits': hits
+                    })
+    
+    return findings
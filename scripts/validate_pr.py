@@ -9,17 +9,29 @@ PR 验证脚本
 import os
 import sys
 import json
-import base64
 import re
 
 # 添加项目根目录到 Python 路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from utils import validate_app_info, GitHubAPI, validate_app_key
+from utils import (
+    validate_app_info,
+    GitHubAPI,
+    validate_app_key,
+    parse_github_url,
+    configure_connection_pool,
+    get_request_coalescer
+)
+from utils.github_graphql import fetch_repos_batch
+from utils.scheduler import WorkScheduler
 from fetch_app_info import fetch_app_info
 from fetch_fnpack_info import fetch_fnpack_info
 
 
+# 并发验证的工作线程数（'auto' 根据请求延迟和剩余配额自动调整）
+VALIDATE_MAX_WORKERS = 'auto'
+
+
 def check_app_id_exists(app_id, api):
     """
     检查应用ID是否已存在于主分支
@@ -40,107 +52,6 @@ def check_app_id_exists(app_id, api):
     return False
 
 
-def check_fnpack_key_exists(key, api):
-    """
-    检查 fnpack key 是否已存在于主分支
-    """
-    repo_owner = os.environ.get('REPO_OWNER', 'yuexps')
-    repo_name = os.environ.get('REPO_NAME', '2FStore')
-    
-    try:
-        print(f"正在检查 fnpack key {key} 是否存在于主分支...")
-        content = api.get_file_content(repo_owner, repo_name, 'fnpacks.json')
-        if content:
-            fnpacks_data = json.loads(content)
-            exists = any(fnpack.get('key') == key for fnpack in fnpacks_data.get('fnpacks', []))
-            print(f"fnpack key {key} 检查结果: {'已存在' if exists else '不存在'}")
-            return exists
-    except Exception as e:
-        print(f"检查 fnpack key 存在性时出错: {str(e)}")
-    return False
-
-
-def get_apps_json_from_pr(pr_number, api, repo_owner, repo_name):
-    """
-    从 PR 获取 apps.json 的内容
-    """
-    print(f"开始从PR #{pr_number} 获取apps.json内容...")
-    
-    # 获取 PR 信息
-    pr_result = api.get_pull_request(repo_owner, repo_name, pr_number)
-    if not pr_result['success']:
-        raise Exception(f"获取PR信息失败: {pr_result.get('error')}")
-    
-    pr_data = pr_result['data']
-    head_sha = pr_data.get('head', {}).get('sha')
-    head_ref = pr_data.get('head', {}).get('ref')
-    
-    if not head_sha:
-        raise Exception('无法获取PR的head分支SHA')
-    
-    print(f"PR head SHA: {head_sha}, 分支: {head_ref}")
-    
-    # 从 head 分支获取 apps.json
-    content = api.get_file_content(repo_owner, repo_name, 'apps.json', ref=head_sha)
-    if content:
-        print("成功从head分支获取并解码apps.json内容")
-        return json.loads(content)
-    
-    raise Exception('PR分支中的apps.json文件内容为空')
-
-
-def get_base_apps_json(base_sha, api, repo_owner, repo_name):
-    """
-    从 PR 的基础分支获取 apps.json 内容
-    """
-    try:
-        content = api.get_file_content(repo_owner, repo_name, 'apps.json', ref=base_sha)
-        if content:
-            return json.loads(content)
-    except Exception as e:
-        print(f"获取基础分支apps.json失败: {str(e)}")
-    return {'apps': []}
-
-
-def get_fnpacks_json_from_pr(pr_number, api, repo_owner, repo_name):
-    """
-    从 PR 获取 fnpacks.json 的内容
-    """
-    print(f"开始从PR #{pr_number} 获取fnpacks.json内容...")
-    
-    # 获取 PR 信息
-    pr_result = api.get_pull_request(repo_owner, repo_name, pr_number)
-    if not pr_result['success']:
-        raise Exception(f"获取PR信息失败: {pr_result.get('error')}")
-    
-    pr_data = pr_result['data']
-    head_sha = pr_data.get('head', {}).get('sha')
-    
-    if not head_sha:
-        raise Exception('无法获取PR的head分支SHA')
-    
-    # 从 head 分支获取 fnpacks.json
-    content = api.get_file_content(repo_owner, repo_name, 'fnpacks.json', ref=head_sha)
-    if content:
-        print("成功从head分支获取并解码fnpacks.json内容")
-        return json.loads(content)
-    
-    return None
-
-
-def get_base_fnpacks_json(base_sha, api, repo_owner, repo_name):
-    """
-    从 PR 的基础分支获取 fnpacks.json 内容
-    """
-    try:
-        content = api.get_file_content(repo_owner, repo_name, 'fnpacks.json', ref=base_sha)
-        if content:
-            return json.loads(content)
-    except Exception as e:
-        print(f"获取基础分支fnpacks.json失败: {str(e)}")
-    return {'fnpacks': []}
-
-
 def find_modified_fnpacks(pr_fnpacks_data, base_fnpacks_data):
     """
     找出PR中新增、修改或删除的 fnpack
@@ -214,6 +125,347 @@ def find_modified_apps(pr_apps_data, base_apps_data):
     
     return modified_apps, deleted_apps
 
+class CatalogueIndex:
+    """
+    清单文件（apps.json / fnpacks.json）的索引，整个 PR 验证过程只读取一次
+    
+    - by_key: {应用 ID 或 fnpack key: 条目}
+    - by_repo: {(owner, repo) 小写: [条目, ...]}
+    """
+    
+    def __init__(self, entries, key_field, repo_field):
+        """
+        参数:
+        - entries: 清单中的条目列表
+        - key_field: 唯一标识字段（'id' 或 'key'）
+        - repo_field: 仓库地址字段（'repository' 或 'repo'）
+        """
+        self.entries = entries
+        self.key_field = key_field
+        self.repo_field = repo_field
+        self.by_key = {entry.get(key_field): entry for entry in entries}
+        self.by_repo = {}
+        for entry in entries:
+            repo_key = self.repo_key(entry.get(repo_field))
+            if repo_key:
+                self.by_repo.setdefault(repo_key, []).append(entry)
+    
+    @staticmethod
+    def repo_key(repo_url):
+        """仓库地址的索引键，无法解析时返回 None"""
+        owner, repo = parse_github_url(repo_url)
+        if not owner or not repo:
+            return None
+        return owner.lower(), repo.lower()
+    
+    def same_repo(self, entry):
+        """返回与 entry 使用同一仓库的其他条目的标识"""
+        others = self.by_repo.get(self.repo_key(entry.get(self.repo_field)), [])
+        return [other.get(self.key_field) for other in others if other.get(self.key_field) != entry.get(self.key_field)]
+
+
+def load_catalogue(api, repo_owner, repo_name, filename, ref):
+    """
+    读取指定提交中的清单文件
+    
+    返回:
+    - dict: 解析后的清单，文件不存在或无法解析时返回 None
+    """
+    try:
+        content = api.get_file_content(repo_owner, repo_name, filename, ref=ref)
+        if content:
+            return json.loads(content)
+    except Exception as e:
+        print(f"读取 {ref[:7] if ref else '默认分支'} 中的 {filename} 失败: {str(e)}")
+    return None
+
+
+def new_result(kind, title):
+    """创建单个条目的验证结果"""
+    return {'kind': kind, 'title': title, 'errors': [], 'warnings': [], 'details': []}
+
+
+def validate_app_entry(app, base_index, head_index, github_token=None, prefetched=None):
+    """
+    验证 PR 中新增或修改的单个应用
+    
+    参数:
+    - app: apps.json 中的应用条目
+    - base_index / head_index: 基础分支和 PR 分支 apps.json 的 CatalogueIndex
+    - github_token: GitHub API token
+    - prefetched: GraphQL 批量抓取的仓库数据（可选）
+    
+    返回:
+    - dict: new_result() 格式的验证结果
+    """
+    app_id = app.get('id')
+    app_name = app.get('name')
+    repo_url = app.get('repository')
+    result = new_result('应用', f'{app_name} ({app_id})')
+    
+    validation_result = validate_app_info(app_id, app_name, repo_url)
+    if not validation_result['is_valid']:
+        result['errors'].extend(validation_result['errors'])
+        return result
+    
+    try:
+        github_app_info = fetch_app_info(repo_url, github_token, prefetched=prefetched)
+    except Exception as e:
+        result['errors'].append(f'获取GitHub应用信息预览失败: {str(e)}')
+        return result
+    
+    description = github_app_info.get('description', '暂无描述')
+    result['details'] = [
+        f'应用描述: {description[:50]}...' if len(description) > 50 else f'应用描述: {description}',
+        f'版本信息: {github_app_info.get("version", "未知")}',
+        f'作者信息: {github_app_info.get("author", "未知")}',
+        f'星标数量: {github_app_info.get("stars", 0)}',
+        f'分类信息: {github_app_info.get("category", "未分类")}'
+    ]
+    
+    download_url = github_app_info.get('downloadUrl')
+    if not download_url or download_url in ['暂无下载链接', '获取失败']:
+        result['warnings'].append('未能从GitHub仓库获取有效的下载链接')
+    else:
+        result['details'].append(f'下载链接: {download_url}')
+    
+    others = head_index.same_repo(app)
+    if others:
+        result['warnings'].append(f'仓库 {repo_url} 同时被应用 {", ".join(map(str, others))} 使用')
+    
+    if app_id in base_index.by_key:
+        result['details'].append(f'应用ID {app_id} 已存在，合并后将更新现有应用')
+    else:
+        result['details'].append(f'新应用 {app_name} ({app_id})')
+    return result
+
+
+def validate_fnpack_entry(fnpack, base_index, head_index, github_token=None, prefetched=None):
+    """
+    验证 PR 中新增或修改的单个 fnpack 仓库
+    
+    参数:
+    - fnpack: fnpacks.json 中的条目
+    - base_index / head_index: 基础分支和 PR 分支 fnpacks.json 的 CatalogueIndex
+    - github_token: GitHub API token
+    - prefetched: GraphQL 批量抓取的仓库数据（可选）
+    
+    返回:
+    - dict: new_result() 格式的验证结果
+    """
+    key = fnpack.get('key')
+    repo_url = fnpack.get('repo')
+    result = new_result('fnpack', f'{key} ({repo_url})')
+    
+    if not key or not re.match(r'^[a-zA-Z][a-zA-Z0-9_-]*$', key):
+        result['errors'].append(f'key 格式无效: {key}（必须以字母开头，只能包含字母、数字、下划线和连字符）')
+    if not repo_url or not re.match(r'^https://github\.com/[^/]+/[^/]+$', repo_url):
+        result['errors'].append(f'仓库 URL 格式无效: {repo_url}（必须是有效的 GitHub 仓库地址）')
+    if result['errors']:
+        return result
+    
+    try:
+        fnpack_info = fetch_fnpack_info(repo_url, github_token=github_token, prefetched=prefetched)
+    except Exception as e:
+        result['errors'].append(f'验证仓库失败: {str(e)}')
+        return result
+    
+    if not fnpack_info:
+        result['errors'].append('仓库中未找到有效的 fnpack.json 或无法解析')
+        return result
+    
+    app_count = len(fnpack_info) if isinstance(fnpack_info, dict) else 1
+    result['details'].append(f'仓库包含 {app_count} 个应用')
+    if isinstance(fnpack_info, dict):
+        for app_key, app_info in fnpack_info.items():
+            description = app_info.get('description', '暂无描述')
+            result['details'].append(
+                f'{app_info.get("name", app_key)}: 版本 {app_info.get("version", "未知")}，'
+                f'图标{"有" if app_info.get("iconUrl") else "无"}，'
+                f'下载{"有" if app_info.get("downloadUrl") else "无"}，'
+                f'描述 {description[:50]}{"..." if len(description) > 50 else ""}'
+            )
+    
+    others = head_index.same_repo(fnpack)
+    if others:
+        result['warnings'].append(f'仓库 {repo_url} 同时被 fnpack {", ".join(map(str, others))} 使用')
+    
+    if key in base_index.by_key:
+        result['details'].append(f'fnpack key {key} 已存在，合并后将更新现有仓库')
+    else:
+        result['details'].append(f'新 fnpack 仓库 {key}')
+    return result
+
+
+class ValidationReport:
+    """PR 验证报告，汇总所有条目的验证结果后统一输出"""
+    
+    def __init__(self):
+        self.results = []
+        self.notices = []
+    
+    def add(self, result):
+        """添加单个条目的验证结果"""
+        self.results.append(result)
+    
+    def notice(self, message):
+        """添加与具体条目无关的提示（如删除了哪些条目）"""
+        self.notices.append(message)
+    
+    @property
+    def failed(self):
+        """是否有验证失败的条目"""
+        return any(result['errors'] for result in self.results)
+    
+    def render(self):
+        """
+        生成报告文字
+        
+        返回:
+        - list: 文字行
+        """
+        lines = ['', '========== PR 验证报告 ==========']
+        for message in self.notices:
+            lines.append(f'⚠️ {message}')
+        for result in self.results:
+            status = '❌' if result['errors'] else ('⚠️' if result['warnings'] else '✅')
+            lines.append('')
+            lines.append(f"{status} {result['kind']}: {result['title']}")
+            lines.extend(f'  - 错误: {error}' for error in result['errors'])
+            lines.extend(f'  - 警告: {warning}' for warning in result['warnings'])
+            lines.extend(f'  {detail}' for detail in result['details'])
+        failed_count = sum(1 for result in self.results if result['errors'])
+        lines.append('')
+        lines.append(
+            f'共验证 {len(self.results)} 个条目，通过 {len(self.results) - failed_count} 个，失败 {failed_count} 个'
+        )
+        return lines
+
+
+def collect_apps_changes(api, repo_owner, repo_name, base_sha, head_sha, report):
+    """
+    读取基础分支和 PR 分支的 apps.json（各一次），找出新增或修改的应用
+    
+    返回:
+    - tuple: (修改的应用列表, 基础分支索引, PR 分支索引)
+    """
+    head_data = load_catalogue(api, repo_owner, repo_name, 'apps.json', head_sha)
+    if not head_data:
+        report.add({**new_result('文件', 'apps.json'), 'errors': ['无法从PR分支读取apps.json']})
+        return [], None, None
+    base_data = load_catalogue(api, repo_owner, repo_name, 'apps.json', base_sha) or {'apps': []}
+    
+    modified_apps, deleted_apps = find_modified_apps(head_data, base_data)
+    for app in deleted_apps:
+        report.notice(f"检测到应用删除: {app.get('name')} ({app.get('id')})，合并后将从应用列表中永久移除")
+    if not modified_apps and not deleted_apps:
+        print('apps.json 中没有检测到新增、修改或删除的应用')
+    
+    base_index = CatalogueIndex(base_data.get('apps', []), 'id', 'repository')
+    head_index = CatalogueIndex(head_data.get('apps', []), 'id', 'repository')
+    return modified_apps, base_index, head_index
+
+
+def collect_fnpacks_changes(api, repo_owner, repo_name, base_sha, head_sha, report):
+    """
+    读取基础分支和 PR 分支的 fnpacks.json（各一次），找出新增或修改的 fnpack
+    
+    返回:
+    - tuple: (修改的 fnpack 列表, 基础分支索引, PR 分支索引)
+    """
+    head_data = load_catalogue(api, repo_owner, repo_name, 'fnpacks.json', head_sha)
+    if not head_data:
+        report.notice('无法从 PR 获取 fnpacks.json，跳过 fnpack 验证')
+        return [], None, None
+    base_data = load_catalogue(api, repo_owner, repo_name, 'fnpacks.json', base_sha) or {'fnpacks': []}
+    
+    modified_fnpacks, deleted_fnpacks = find_modified_fnpacks(head_data, base_data)
+    for fnpack in deleted_fnpacks:
+        report.notice(f"检测到 fnpack 删除: {fnpack.get('key')} ({fnpack.get('repo')})，合并后将从 fnpack 列表中永久移除该仓库")
+    if not modified_fnpacks and not deleted_fnpacks:
+        print('fnpacks.json 中没有检测到新增、修改或删除的仓库')
+    
+    base_index = CatalogueIndex(base_data.get('fnpacks', []), 'key', 'repo')
+    head_index = CatalogueIndex(head_data.get('fnpacks', []), 'key', 'repo')
+    return modified_fnpacks, base_index, head_index
+
+
+def validate_pull_request(pr, api, repo_owner, repo_name, apps_changed, fnpacks_changed, github_token=None,
+                          max_workers=VALIDATE_MAX_WORKERS):
+    """
+    验证 PR 中 apps.json 和 fnpacks.json 的修改
+    
+    两个清单文件在基础分支和 PR 分支各读取一次并建立索引，
+    所有新增或修改的应用和 fnpack 先通过 GraphQL 批量预取仓库数据，再并发验证
+    
+    参数:
+    - pr: get_pull_request 返回的 PR 信息
+    - apps_changed / fnpacks_changed: PR 是否修改了 apps.json / fnpacks.json
+    - github_token: GitHub API token
+    - max_workers: 并发验证的线程数
+    
+    返回:
+    - ValidationReport: 验证报告
+    """
+    report = ValidationReport()
+    base_sha = pr.get('base', {}).get('sha')
+    head_sha = pr.get('head', {}).get('sha')
+    if not head_sha:
+        report.add({**new_result('PR', str(pr.get('number'))), 'errors': ['无法获取PR的head分支SHA']})
+        return report
+    print(f"PR head SHA: {head_sha}, 分支: {pr.get('head', {}).get('ref')}")
+    
+    jobs = []
+    app_repos = []
+    fnpack_repos = []
+    if apps_changed:
+        modified_apps, base_index, head_index = collect_apps_changes(
+            api, repo_owner, repo_name, base_sha, head_sha, report
+        )
+        for app in modified_apps:
+            jobs.append((validate_app_entry, app, base_index, head_index, app.get('repository')))
+            app_repos.append(parse_github_url(app.get('repository')))
+    if fnpacks_changed:
+        modified_fnpacks, base_index, head_index = collect_fnpacks_changes(
+            api, repo_owner, repo_name, base_sha, head_sha, report
+        )
+        for fnpack in modified_fnpacks:
+            jobs.append((validate_fnpack_entry, fnpack, base_index, head_index, fnpack.get('repo')))
+            fnpack_repos.append(parse_github_url(fnpack.get('repo')))
+    
+    if not jobs:
+        return report
+    
+    # 按批量更新的方式预取仓库数据，获取失败的仓库回退到 REST
+    prefetched_map = {}
+    if app_repos:
+        prefetched_map['app'] = fetch_repos_batch(
+            app_repos, github_token, history_path='manifest', files=['manifest']
+        )
+    if fnpack_repos:
+        prefetched_map['fnpack'] = fetch_repos_batch(
+            fnpack_repos, github_token, history_path='fnpack.json', files=['fnpack.json']
+        )
+    
+    def run_job(job):
+        validate, entry, base_index, head_index, repo_url = job
+        prefetched = prefetched_map.get('app' if validate is validate_app_entry else 'fnpack', {})
+        return validate(entry, base_index, head_index, github_token, prefetched.get(parse_github_url(repo_url)))
+    
+    print(f"开始并发验证 {len(jobs)} 个条目...")
+    scheduler = WorkScheduler(max_workers, github_token)
+    configure_connection_pool(scheduler.max_workers)
+    with scheduler:
+        outcomes = scheduler.run(run_job, jobs)
+    
+    for (validate, entry, _, _, _), outcome in outcomes:
+        if isinstance(outcome, Exception):
+            kind, key_field = ('应用', 'id') if validate is validate_app_entry else ('fnpack', 'key')
+            outcome = {**new_result(kind, str(entry.get(key_field))), 'errors': [f'验证出错: {str(outcome)}']}
+        report.add(outcome)
+    return report
+
+
 def run():
     """
     GitHub Action入口函数
@@ -239,192 +491,40 @@ def run():
             sys.exit(1)
         pr = pr_result['data']
         
-        # 获取 PR 修改的文件列表
-        files_result = api.get(f'https://api.github.com/repos/{repo_owner}/{repo_name}/pulls/{pull_request_number}/files')
-        if not files_result['success']:
-            print(f"获取PR文件列表失败: {files_result.get('error')}")
+        # 获取 PR 修改的文件列表（按需翻页，两个清单文件都找到后不再请求后续页面）
+        changed_files = []
+        apps_changed = fnpacks_changed = False
+        try:
+            for changed_file in api.paginate(f'repos/{repo_owner}/{repo_name}/pulls/{pull_request_number}/files'):
+                filename = changed_file.get('filename')
+                changed_files.append(filename)
+                apps_changed = apps_changed or filename == 'apps.json'
+                fnpacks_changed = fnpacks_changed or filename == 'fnpacks.json'
+                if apps_changed and fnpacks_changed:
+                    break
+        except RuntimeError as e:
+            print(f"获取PR文件列表失败: {str(e)}")
             sys.exit(1)
         
-        changed_files = [f.get('filename') for f in files_result.get('data', [])]
         print(f"PR 修改的文件: {changed_files}")
         
-        apps_changed = 'apps.json' in changed_files
-        fnpacks_changed = 'fnpacks.json' in changed_files
-        
-        # 验证 fnpacks.json 的修改
-        if fnpacks_changed:
-            validate_fnpacks_pr(pr, api, repo_owner, repo_name, pull_request_number)
-        
-        # 验证 apps.json 的修改
-        if apps_changed:
-            validate_apps_pr(pr, api, repo_owner, repo_name, pull_request_number)
-        
         if not apps_changed and not fnpacks_changed:
             print('PR 中没有检测到 apps.json 或 fnpacks.json 的修改')
             sys.exit(1)
         
-    except Exception as error:
-        print(f'验证PR失败: {str(error)}')
-        sys.exit(1)
-
-
-def validate_fnpacks_pr(pr, api, repo_owner, repo_name, pull_request_number):
-    """
-    验证 fnpacks.json 的 PR 修改
-    """
-    print('\n========== 验证 fnpacks.json ==========')
-    
-    # 从 PR 中获取 fnpacks.json 内容
-    pr_fnpacks_data = get_fnpacks_json_from_pr(pull_request_number, api, repo_owner, repo_name)
-    if not pr_fnpacks_data:
-        print('无法从 PR 获取 fnpacks.json')
-        return
-    
-    # 从基础分支获取 fnpacks.json 内容
-    base_fnpacks_data = get_base_fnpacks_json(pr['base']['sha'], api, repo_owner, repo_name)
-    
-    # 找出修改的 fnpack
-    modified_fnpacks, deleted_fnpacks = find_modified_fnpacks(pr_fnpacks_data, base_fnpacks_data)
-    
-    if len(modified_fnpacks) == 0 and len(deleted_fnpacks) == 0:
-        print('fnpacks.json 中没有检测到新增、修改或删除的仓库')
-        return
-    
-    # 处理删除的 fnpack
-    if len(deleted_fnpacks) > 0:
-        for fnpack in deleted_fnpacks:
-            key = fnpack.get('key')
-            repo = fnpack.get('repo')
-            print(f'检测到 fnpack 删除: {key} ({repo})')
-            print('⚠️ 注意: 此操作将从 fnpack 列表中永久移除该仓库')
-    
-    # 处理新增或修改的 fnpack
-    for fnpack in modified_fnpacks:
-        key = fnpack.get('key')
-        repo_url = fnpack.get('repo')
-        
-        print(f'\n--- 验证 fnpack: {key} ---')
-        
-        # 验证 key 格式
-        if not key or not re.match(r'^[a-zA-Z][a-zA-Z0-9_-]*$', key):
-            print(f'❌ key 格式无效: {key}')
-            print('   key 必须以字母开头，只能包含字母、数字、下划线和连字符')
-            sys.exit(1)
-        
-        # 验证 repo URL 格式
-        if not repo_url or not re.match(r'^https://github\.com/[^/]+/[^/]+$', repo_url):
-            print(f'❌ 仓库 URL 格式无效: {repo_url}')
-            print('   URL 必须是有效的 GitHub 仓库地址')
-            sys.exit(1)
+        report = validate_pull_request(
+            pr, api, repo_owner, repo_name, apps_changed, fnpacks_changed, github_token
+        )
+        for line in report.render():
+            print(line)
+        print(get_request_coalescer().summary())
         
-        # 验证仓库是否包含 fnpack.json
-        try:
-            print(f'正在验证仓库 {repo_url}...')
-            github_token = os.environ.get('GITHUB_TOKEN')
-            fnpack_info = fetch_fnpack_info(repo_url, github_token=github_token)
-            
-            if fnpack_info:
-                app_count = len(fnpack_info) if isinstance(fnpack_info, dict) else 1
-                print(f'✅ 仓库验证通过，包含 {app_count} 个应用')
-                
-                # 打印应用信息预览
-                if isinstance(fnpack_info, dict):
-                    for app_key, app_info in fnpack_info.items():
-                        print(f'\n  应用: {app_info.get("name", app_key)}')
-                        print(f'    版本: {app_info.get("version", "未知")}')
-                        print(f'    描述: {app_info.get("description", "暂无描述")[:50]}...' if len(app_info.get("description", "")) > 50 else f'    描述: {app_info.get("description", "暂无描述")}')
-                        print(f'    图标: {"✅ 有" if app_info.get("iconUrl") else "❌ 无"}')
-                        print(f'    下载: {"✅ 有" if app_info.get("downloadUrl") else "❌ 无"}')
-            else:
-                print(f'❌ 仓库中未找到有效的 fnpack.json 或无法解析')
-                sys.exit(1)
-                
-        except Exception as e:
-            print(f'❌ 验证仓库失败: {str(e)}')
+        if report.failed:
             sys.exit(1)
         
-        # 检查 key 是否已存在
-        if check_fnpack_key_exists(key, api):
-            print(f'⚠️ 注意: fnpack key {key} 已存在，合并后将更新现有仓库')
-        else:
-            print(f'✅ 验证通过: 新 fnpack 仓库 {key}')
-    
-    print('\n========== fnpacks.json 验证完成 ==========\n')
-
-
-def validate_apps_pr(pr, api, repo_owner, repo_name, pull_request_number):
-    """
-    验证 apps.json 的 PR 修改
-    """
-    print('\n========== 验证 apps.json ==========')
-    
-    # 从PR中获取apps.json内容
-    pr_apps_data = get_apps_json_from_pr(pull_request_number, api, repo_owner, repo_name)
-    
-    # 从基础分支获取apps.json内容
-    base_apps_data = get_base_apps_json(pr['base']['sha'], api, repo_owner, repo_name)
-    
-    # 找出新增或修改的应用
-    modified_apps, deleted_apps = find_modified_apps(pr_apps_data, base_apps_data)
-    
-    if len(modified_apps) == 0 and len(deleted_apps) == 0:
-        print('apps.json 中没有检测到新增、修改或删除的应用')
-        return
-    
-    # 处理删除的应用
-    if len(deleted_apps) > 0:
-        for deleted_app in deleted_apps:
-            app_id = deleted_app.get('id')
-            app_name = deleted_app.get('name')
-            print(f'检测到应用删除: {app_name} ({app_id})')
-            print('⚠️ 注意: 此操作将从应用列表中永久移除该应用')
-    
-    # 处理新增或修改的应用
-    for app in modified_apps:
-        app_id = app.get('id')
-        app_name = app.get('name')
-        repo_url = app.get('repository')
-        
-        print(f'\n--- 验证应用: {app_name} ({app_id}) ---')
-        
-        # 验证应用信息
-        validation_result = validate_app_info(app_id, app_name, repo_url)
-        
-        if not validation_result['is_valid']:
-            print('❌ 应用信息验证失败:')
-            for error in validation_result['errors']:
-                print(f'  - {error}')
-            sys.exit(1)
-        
-        # 获取GitHub上的应用信息
-        try:
-            print(f'正在获取GitHub上的应用信息用于预览...')
-            github_app_info = fetch_app_info(repo_url)
-            
-            print(f'  应用描述: {github_app_info.get("description", "暂无描述")[:50]}...' if len(github_app_info.get("description", "")) > 50 else f'  应用描述: {github_app_info.get("description", "暂无描述")}')
-            print(f'  版本信息: {github_app_info.get("version", "未知")}')
-            print(f'  作者信息: {github_app_info.get("author", "未知")}')
-            print(f'  星标数量: {github_app_info.get("stars", 0)}')
-            print(f'  分类信息: {github_app_info.get("category", "未分类")}')
-            
-            # 检查下载链接
-            download_url = github_app_info.get('downloadUrl')
-            if not download_url or download_url in ['暂无下载链接', '获取失败']:
-                print('  ❌ 警告：未能从GitHub仓库获取有效的下载链接')
-            else:
-                print(f'  ✅ 下载链接: {download_url}')
-            
-            # 检查应用ID是否已存在
-            if check_app_id_exists(app_id, api):
-                print(f'⚠️ 注意: 应用ID {app_id} 已存在，合并后将更新现有应用')
-            else:
-                print(f'✅ 验证通过: 新应用 {app_name} ({app_id})')
-            
-        except Exception as e:
-            print(f'❌ 获取GitHub应用信息预览失败: {str(e)}')
-            sys.exit(1)
-    
-    print('\n========== apps.json 验证完成 ==========\n')
+    except Exception as error:
+        print(f'验证PR失败: {str(error)}')
+        sys.exit(1)
 
 
 if __name__ == "__main__":